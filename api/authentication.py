@@ -0,0 +1,146 @@
+"""
+Аутентификация по токену с кэшированием.
+
+В кэше хранятся только идентификаторы пользователя и профиля, признак
+активности и признак подтвержденного email, но не сами объекты (хэш пароля
+в кэш не попадает). При попадании пользователь и профиль собираются из этих
+значений, поэтому аутентификация и проверка IsEmailVerified не обращаются
+к базе данных; остальные поля загружаются из БД одним запросом при первом
+обращении к любому из них.
+
+Запись кэша заменяется сигналами на короткую отметку о сбросе при удалении
+токена (выход из системы) и при сохранении пользователя или профиля (сброс
+пароля, смена email, подтверждение email). Пока отметка действует, данные
+читаются из БД и в кэш не записываются, а запись выполняется через add и не
+заменяет отметку: запрос, прочитавший данные до фиксации изменения, не вернет
+в кэш старые значения.
+"""
+
+import hashlib
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from my_auth.models import Profile
+
+TOKEN_CACHE_KEY = 'auth:token:{digest}'
+
+# Значение записи кэша после сброса
+TOKEN_INVALIDATED = 'invalidated'
+
+
+def get_token_cache_key(key: str) -> str:
+    """
+    Возвращает ключ кэша для токена. В ключе хранится хэш, а не сам токен.
+
+    :param key: Значение токена.
+    :return: Ключ кэша.
+    """
+
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return TOKEN_CACHE_KEY.format(digest=digest)
+
+
+def invalidate_token(key: str) -> None:
+    """
+    Сбрасывает токен в кэше.
+
+    :param key: Значение токена.
+    """
+
+    cache.set(get_token_cache_key(key), TOKEN_INVALIDATED, settings.AUTH_TOKEN_INVALIDATION_TIMEOUT)
+
+
+def invalidate_user_tokens(user_id: int) -> None:
+    """
+    Сбрасывает в кэше все токены пользователя.
+
+    :param user_id: Идентификатор пользователя.
+    """
+
+    keys = Token.objects.filter(user_id=user_id).values_list('key', flat=True)
+    cache.set_many({get_token_cache_key(key): TOKEN_INVALIDATED for key in keys},
+                   settings.AUTH_TOKEN_INVALIDATION_TIMEOUT)
+
+
+def _load_deferred_together(instance):
+    """
+    При обращении к незагруженному полю экземпляра загружает все
+    незагруженные поля одним запросом, а не по запросу на поле.
+    """
+
+    refresh_from_db = instance.refresh_from_db
+
+    def refresh_deferred(using=None, fields=None, **kwargs):
+        deferred = instance.get_deferred_fields()
+        if fields is not None and deferred.issuperset(fields):
+            fields = deferred
+        refresh_from_db(using=using, fields=fields, **kwargs)
+
+    instance.refresh_from_db = refresh_deferred
+    return instance
+
+
+def build_cached_token(cached: dict) -> Token:
+    """
+    Собирает токен, пользователя и профиль из записи кэша без запросов к БД.
+    Поля, которых нет в записи, загружаются из БД при первом обращении.
+
+    :param cached: Запись кэша токена.
+    :return: Токен со связанным пользователем (и профилем, если он есть).
+    """
+
+    user = _load_deferred_together(
+        User.from_db(DEFAULT_DB_ALIAS, ['id', 'is_active'], [cached['user_id'], cached['is_active']]))
+    if cached['profile_id'] is not None:
+        profile = _load_deferred_together(
+            Profile.from_db(DEFAULT_DB_ALIAS, ['id', 'user_id', 'email_verified'],
+                            [cached['profile_id'], cached['user_id'], cached['email_verified']]))
+        profile.user = user
+    token = Token.from_db(DEFAULT_DB_ALIAS, ['key', 'user_id'], [cached['key'], cached['user_id']])
+    token.user = user
+    return token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication, который собирает токен, пользователя и профиль
+    по записи кэша и обращается к базе данных только при промахе.
+    """
+
+    def authenticate_credentials(self, key):
+        """
+        Находит токен и пользователя по значению токена.
+
+        :param key: Значение токена из заголовка Authorization.
+        :return: Кортеж (пользователь, токен).
+        """
+
+        cache_key = get_token_cache_key(key)
+        cached = cache.get(cache_key)
+        if isinstance(cached, dict):
+            token = build_cached_token(cached)
+        else:
+            try:
+                token = Token.objects.select_related('user__profile').get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            # После сброса данные не кэшируются, пока действует отметка
+            if cached is None:
+                profile = getattr(token.user, 'profile', None)
+                cache.add(cache_key, {
+                    'key': token.key,
+                    'user_id': token.user_id,
+                    'is_active': token.user.is_active,
+                    'profile_id': profile.pk if profile else None,
+                    'email_verified': profile.email_verified if profile else False,
+                }, settings.AUTH_TOKEN_CACHE_TIMEOUT)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (token.user, token)
@@ -0,0 +1,29 @@
+"""
+ETag для условных GET-запросов к задачам.
+
+ETag строится из версии коллекции задач пользователя, полного пути
+запроса (с курсором, фильтрами и размером страницы), заголовка Accept
+(формат ответа) и языка запроса, поэтому ответ 304 отдается без обращения
+к таблице задач. Ответы с ETag отдаются с Vary: Accept, Accept-Language. Вскоре после записи ответ 200
+читается из основной базы: данные с отстающей реплики получили бы ETag
+новой версии.
+"""
+
+import hashlib
+from django.utils import translation
+from tasks.versioning import get_tasks_version, read_version_from_primary
+
+
+def tasks_etag(request, *args, **kwargs) -> str:
+    """
+    Вычисляет ETag ответа со списком или деталями задач пользователя.
+
+    :param request: HTTP запрос аутентифицированного пользователя.
+    :return: Значение ETag без кавычек.
+    """
+
+    version = get_tasks_version(request.user.id)
+    read_version_from_primary(version)
+    source = (f'{request.user.id}:{version}:{request.get_full_path()}:'
+              f'{request.META.get("HTTP_ACCEPT", "")}:{translation.get_language()}')
+    return hashlib.sha256(source.encode()).hexdigest()
@@ -0,0 +1,37 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class TaskCursorPagination(CursorPagination):
+    """
+    Курсорная пагинация списка задач.
+
+    Задачи упорядочены по (create_at, id) и читаются по составному индексу
+    (user, create_at, id). Это не составной ключ: курсор DRF хранит позицию
+    только по create_at и смещение, поэтому страница выбирается условием
+    create_at > позиции, а OFFSET пропускает задачи с одинаковым create_at,
+    уже показанные на предыдущей странице (обычно ноль строк). Поле id
+    лишь делает порядок однозначным.
+    Курсор непрозрачен для клиента и передается в параметре ``cursor``.
+    Размер страницы можно задать параметром ``page_size``, но не больше
+    ``settings.TASKS_MAX_PAGE_SIZE``.
+    """
+
+    ordering = ('create_at', 'id')
+    page_size = settings.TASKS_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.TASKS_MAX_PAGE_SIZE
+
+
+class TaskSearchPagination(PageNumberPagination):
+    """
+    Постраничная выдача результатов поиска задач.
+
+    Результаты поиска упорядочены по релевантности, поэтому вместо
+    курсора используется номер страницы. Размер страницы задается
+    так же, как и для списка задач.
+    """
+
+    page_size = settings.TASKS_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.TASKS_MAX_PAGE_SIZE
@@ -1,7 +1,9 @@
+from django.conf import settings
 from rest_framework import serializers
 from tasks.models import Task
 from django.contrib.auth.models import User
 from my_auth.models import Profile
+from my_auth.services import UserEmailLookup
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_decode
 
@@ -42,7 +44,53 @@ class TaskDetailSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Task
-        fields = '__all__'
+        exclude = ['search_vector']
+
+
+class BulkTaskCreateSerializer(serializers.Serializer):
+    """
+    Сериалайзер пакетного создания задач.
+
+    Проверяет только форму запроса: список задач не пуст и не длиннее
+    settings.TASKS_BULK_MAX_ITEMS. Каждая задача проверяется отдельно
+    сериализатором CreateTaskSerializer.
+    """
+
+    tasks = serializers.ListField(child=serializers.DictField(), allow_empty=False,
+                                  max_length=settings.TASKS_BULK_MAX_ITEMS)
+
+
+class BulkTaskUpdateItemSerializer(serializers.Serializer):
+    """
+    Сериалайзер изменения одной задачи в пакетном обновлении.
+
+    Поле 'id' обязательно, остальные поля передаются только при изменении.
+    """
+
+    id = serializers.IntegerField()
+    name = serializers.CharField(max_length=100, required=False)
+    description = serializers.CharField(allow_blank=True, required=False)
+    complete = serializers.BooleanField(required=False)
+
+
+class BulkTaskUpdateSerializer(serializers.Serializer):
+    """
+    Сериалайзер пакетного обновления задач.
+
+    Каждое изменение проверяется отдельно сериализатором BulkTaskUpdateItemSerializer.
+    """
+
+    tasks = serializers.ListField(child=serializers.DictField(), allow_empty=False,
+                                  max_length=settings.TASKS_BULK_MAX_ITEMS)
+
+
+class BulkTaskDeleteSerializer(serializers.Serializer):
+    """
+    Сериалайзер пакетного удаления задач.
+    """
+
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False,
+                                max_length=settings.TASKS_BULK_MAX_ITEMS)
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -84,7 +132,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         :raises serializers.ValidationError: Если email уже существует.
         """
 
-        if User.objects.filter(email=value).exists():
+        if UserEmailLookup.exists(value):
             raise serializers.ValidationError("Пользователь с таким e-mail уже существует.")
         return value
 
@@ -147,7 +195,7 @@ class PasswordResetSerializer(serializers.Serializer):
         """
 
         email = self.validated_data['email']
-        return User.objects.filter(email=email).first()
+        return UserEmailLookup.filter(email).first()
 
 
 class PasswordResetConfirmSerializer(serializers.Serializer):
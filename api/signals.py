@@ -0,0 +1,34 @@
+"""
+Сигналы на сброс кэша аутентификации по токену. Сброс выполняется после
+фиксации транзакции: до нее параллельный запрос прочитал бы из БД старые
+данные и снова записал их в кэш. Запрос, прочитавший данные до фиксации
+и записывающий их после сброса, останавливает отметка о сбросе
+(см. api.authentication).
+"""
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from my_auth.models import Profile
+from .authentication import invalidate_token, invalidate_user_tokens
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    # После удаления первичный ключ (значение токена) обнуляется, поэтому сохраняем его заранее
+    key = instance.key
+    transaction.on_commit(lambda: invalidate_token(key))
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens_on_user_save(sender, instance, created, **kwargs):
+    if not created:
+        transaction.on_commit(lambda: invalidate_user_tokens(instance.pk))
+
+
+@receiver(post_save, sender=Profile)
+def invalidate_user_tokens_on_profile_save(sender, instance, created, **kwargs):
+    if not created:
+        transaction.on_commit(lambda: invalidate_user_tokens(instance.user_id))
@@ -1,4 +1,8 @@
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase, APIClient
 from django.urls import reverse
 from rest_framework import status
@@ -7,7 +11,10 @@ from django.contrib.auth.models import User
 from unittest.mock import patch
 from rest_framework.test import APIRequestFactory
 from django.contrib.auth.models import AnonymousUser
-from tasks.models import Task
+from tasks.models import Task, TaskTombstone
+from toDo_app.ratelimit import limiter
+from toDo_app.testing import QueryBudgetMixin
+from .authentication import TOKEN_INVALIDATED, CachedTokenAuthentication, get_token_cache_key, invalidate_token
 from .permissions import IsEmailVerified
 from my_auth.models import Profile
 from .serializers import (
@@ -68,7 +75,7 @@ class UserRegistrationSerializerTests(TestCase):
         User.objects.create(username='existinguser', email='existing@example.com', password='password')
         data = {
             'username': 'newuser',
-            'email': 'existing@example.com',
+            'email': 'Existing@Example.com',
             'password': 'newpassword',
         }
         serializer = UserRegistrationSerializer(data=data)
@@ -102,6 +109,11 @@ class PasswordResetSerializerTests(TestCase):
         serializer.is_valid(raise_exception=True)
         self.assertEqual(serializer.get_user(), self.user)
 
+    def test_get_user_case_insensitive(self):
+        serializer = PasswordResetSerializer(data={'email': 'TEST@Example.com'})
+        serializer.is_valid(raise_exception=True)
+        self.assertEqual(serializer.get_user(), self.user)
+
     def test_get_user_invalid_email(self):
         data = {'email': 'invalid@example.com'}
         serializer = PasswordResetSerializer(data=data)
@@ -168,6 +180,76 @@ class IsEmailVerifiedTests(TestCase):
         self.assertFalse(permission.has_permission(request, None))
 
 
+class CachedTokenAuthenticationTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass', email='test@example.com')
+        self.user.profile.email_verified = True
+        self.user.profile.save()
+        self.token = Token.objects.create(user=self.user)
+        self.url = reverse('api:profile')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def test_token_cached_after_first_request(self):
+        self.client.get(self.url)
+        cached = cache.get(get_token_cache_key(self.token.key))
+        self.assertEqual(cached, {'key': self.token.key, 'user_id': self.user.pk, 'is_active': True,
+                                  'profile_id': self.user.profile.pk, 'email_verified': True})
+
+    def test_cached_token_authenticates_without_queries(self):
+        CachedTokenAuthentication().authenticate_credentials(self.token.key)
+        with self.assertNumQueries(0):
+            user, token = CachedTokenAuthentication().authenticate_credentials(self.token.key)
+            self.assertEqual((user.pk, token.key), (self.user.pk, self.token.key))
+            self.assertTrue(user.profile.email_verified)
+            self.assertIs(user.auth_token, token)
+        # Остальные поля загружаются из БД при обращении
+        self.assertEqual(user.username, 'testuser')
+
+    def test_invalidated_token_not_cached_again(self):
+        CachedTokenAuthentication().authenticate_credentials(self.token.key)
+        invalidate_token(self.token.key)
+        CachedTokenAuthentication().authenticate_credentials(self.token.key)
+        self.assertEqual(cache.get(get_token_cache_key(self.token.key)), TOKEN_INVALIDATED)
+
+    def test_invalid_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_inactive_user_rejected_from_cache(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_invalidates_cache(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('api:logout'))
+        self.assertEqual(cache.get(get_token_cache_key(self.token.key)), TOKEN_INVALIDATED)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_email_change_invalidates_cache(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.profile.email_verified = False
+            self.user.profile.save()
+        self.assertEqual(cache.get(get_token_cache_key(self.token.key)), TOKEN_INVALIDATED)
+        response = self.client.get(reverse('api:task-list'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @patch('api.views.EmailService.send_new_password_email')
+    def test_password_reset_invalidates_cache(self, mock_send_email):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('api:password_reset'), {'email': 'test@example.com'})
+        self.assertEqual(cache.get(get_token_cache_key(self.token.key)), TOKEN_INVALIDATED)
+
+
 class TaskListViewTests(APITestCase):
 
     def setUp(self):
@@ -196,7 +278,69 @@ class TaskListViewTests(APITestCase):
         url = reverse('api:task-list')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_list_tasks_cursor_pagination(self):
+        for i in range(3, 6):
+            Task.objects.create(name=f'Task {i}', user=self.user_with_verified_email)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token_verified.key)
+        url = reverse('api:task-list')
+
+        names = []
+        response = self.client.get(url, {'page_size': 2})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            names.extend(task['name'] for task in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(names, ['Task 1', 'Task 2', 'Task 3', 'Task 4', 'Task 5'])
+
+    def test_list_tasks_not_modified(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token_verified.key)
+        url = reverse('api:task-list')
+        response = self.client.get(url)
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(name='Task 3', user=self.user_with_verified_email)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_tasks_etag_varies_on_format_and_language(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token_verified.key)
+        url = reverse('api:task-list')
+        response = self.client.get(url, HTTP_ACCEPT='application/json')
+        etag = response['ETag']
+        self.assertIn('Accept-Language', response['Vary'])
+
+        response = self.client.get(url, HTTP_ACCEPT='text/html', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(url, HTTP_ACCEPT='application/json', HTTP_ACCEPT_LANGUAGE='en',
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_tasks_not_modified_without_queries(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token_verified.key)
+        url = reverse('api:task-list')
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_tasks_invalid_cursor(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token_verified.key)
+        url = reverse('api:task-list')
+        response = self.client.get(url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_list_tasks_unverified_user(self):
         self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token_unverified.key)
@@ -211,6 +355,91 @@ class TaskListViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class TaskSearchViewTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.user.profile.email_verified = True
+        self.user.profile.save()
+        self.other_user = User.objects.create_user(username='otheruser', password='testpass')
+        self.token = Token.objects.create(user=self.user)
+        self.url = reverse('api:task-search')
+
+        Task.objects.create(name='Купить молоко', description='В магазине у дома', user=self.user)
+        Task.objects.create(name='Позвонить маме', description='Спросить про молоко', user=self.user)
+        Task.objects.create(name='Прочитать книгу', user=self.user)
+        Task.objects.create(name='Купить молоко', user=self.other_user)
+
+    def test_search_by_name_and_description(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        response = self.client.get(self.url, {'q': 'молоко'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        names = {task['name'] for task in response.data['results']}
+        self.assertEqual(names, {'Купить молоко', 'Позвонить маме'})
+
+    def test_search_only_own_tasks(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        response = self.client.get(self.url, {'q': 'Купить'})
+        self.assertEqual(response.data['count'], 1)
+
+    def test_search_empty_query(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        response = self.client.get(self.url, {'q': '  '})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
+
+    def test_search_unauthenticated_user(self):
+        response = self.client.get(self.url, {'q': 'молоко'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(TASKS_SYNC_OVERLAP_SECONDS=0)
+class TaskChangesViewTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.user.profile.email_verified = True
+        self.user.profile.save()
+        self.token = Token.objects.create(user=self.user)
+        self.url = reverse('api:task-changes')
+        self.task_to_update = Task.objects.create(name='Task to update', user=self.user)
+        self.task_to_delete = Task.objects.create(name='Task to delete', user=self.user)
+        Task.objects.create(name='Unchanged task', user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def test_initial_sync_requests_reset(self):
+        # Только аутентификация по токену: задачи не выбираются
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['reset'])
+        self.assertEqual(response.data['updated'], [])
+        self.assertTrue(response.data['sync_token'])
+
+    def test_delta_sync_returns_only_changes(self):
+        sync_token = self.client.get(self.url).data['sync_token']
+
+        self.task_to_update.complete = True
+        self.task_to_update.save()
+        deleted_id = self.task_to_delete.id
+        self.task_to_delete.delete()
+        Task.objects.create(name='New task', user=self.user)
+
+        response = self.client.get(self.url, {'since': sync_token})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['reset'])
+        self.assertEqual({task['name'] for task in response.data['updated']}, {'Task to update', 'New task'})
+        self.assertEqual(response.data['deleted'], [deleted_id])
+
+        response = self.client.get(self.url, {'since': response.data['sync_token']})
+        self.assertEqual(response.data['updated'], [])
+        self.assertEqual(response.data['deleted'], [])
+
+    def test_invalid_sync_token(self):
+        response = self.client.get(self.url, {'since': 'invalid'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
 class TaskCreateViewTests(APITestCase):
 
     def setUp(self):
@@ -272,6 +501,21 @@ class TaskDetailUpdateViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['name'], 'Test Task')
 
+    def test_get_task_detail_not_modified(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        url = f'/api/v1/tasks/{self.task.id}/'
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(url, {'name': 'Updated Task', 'description': '', 'complete': True})
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['name'], 'Updated Task')
+
     def test_get_task_detail_unverified_user(self):
         self.profile.email_verified = False
         self.profile.save()
@@ -318,6 +562,102 @@ class TaskDeleteViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
+class TaskBulkViewsTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.user.profile.email_verified = True
+        self.user.profile.save()
+        self.other_user = User.objects.create_user(username='otheruser', password='testpass')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def test_bulk_create(self):
+        data = {'tasks': [{'name': 'Task 1'}, {'name': ''}, {'name': 'Task 3', 'description': 'Description'}]}
+        response = self.client.post(reverse('api:task-bulk-create'), data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([result['status'] for result in response.data['results']], ['created', 'invalid', 'created'])
+        self.assertEqual(set(Task.objects.filter(user=self.user).values_list('name', flat=True)), {'Task 1', 'Task 3'})
+
+    def test_bulk_create_query_count_does_not_grow(self):
+        url = reverse('api:task-bulk-create')
+
+        def count_queries(size):
+            data = {'tasks': [{'name': f'Task {i}'} for i in range(size)]}
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(context.captured_queries)
+
+        count_queries(1)  # токен попадает в кэш аутентификации
+        self.assertEqual(count_queries(5), count_queries(100))
+
+    def test_bulk_create_too_many_items(self):
+        data = {'tasks': [{'name': 'Task'}] * (settings.TASKS_BULK_MAX_ITEMS + 1)}
+        response = self.client.post(reverse('api:task-bulk-create'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Task.objects.exists())
+
+    def test_bulk_update(self):
+        first = Task.objects.create(name='Task 1', user=self.user)
+        second = Task.objects.create(name='Task 2', user=self.user)
+        foreign = Task.objects.create(name='Foreign task', user=self.other_user)
+        data = {'tasks': [
+            {'id': first.id, 'complete': True},
+            {'id': second.id, 'complete': True, 'name': 'Renamed'},
+            {'id': foreign.id, 'complete': True},
+        ]}
+        response = self.client.post(reverse('api:task-bulk-update'), data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([(result['index'], result['id'], result['status']) for result in response.data['results']],
+                         [(0, first.id, 'updated'), (1, second.id, 'updated'), (2, foreign.id, 'not_found')])
+        second.refresh_from_db()
+        foreign.refresh_from_db()
+        self.assertTrue(second.complete)
+        self.assertEqual(second.name, 'Renamed')
+        self.assertFalse(foreign.complete)
+
+    def test_bulk_update_invalid_item_keeps_order(self):
+        task = Task.objects.create(name='Task 1', user=self.user)
+        data = {'tasks': [{'id': task.id, 'complete': True}, {'id': task.id, 'name': ''}]}
+        response = self.client.post(reverse('api:task-bulk-update'), data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([(result['index'], result['id'], result['status']) for result in response.data['results']],
+                         [(0, task.id, 'updated'), (1, task.id, 'invalid')])
+
+    def test_bulk_update_rejects_duplicate_ids(self):
+        task = Task.objects.create(name='Task 1', user=self.user)
+        data = {'tasks': [{'id': task.id, 'name': 'First'}, {'id': task.id, 'name': 'Second'}]}
+        response = self.client.post(reverse('api:task-bulk-update'), data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([(result['index'], result['id'], result['status']) for result in response.data['results']],
+                         [(0, task.id, 'updated'), (1, task.id, 'invalid')])
+        self.assertIn('id', response.data['results'][1]['errors'])
+        task.refresh_from_db()
+        self.assertEqual(task.name, 'First')
+
+    def test_bulk_delete(self):
+        own = Task.objects.create(name='Task 1', user=self.user)
+        foreign = Task.objects.create(name='Foreign task', user=self.other_user)
+        data = {'ids': [own.id, foreign.id]}
+        response = self.client.post(reverse('api:task-bulk-delete'), data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertFalse(Task.objects.filter(pk=own.pk).exists())
+        self.assertTrue(Task.objects.filter(pk=foreign.pk).exists())
+        self.assertTrue(TaskTombstone.objects.filter(user=self.user, task_id=own.id).exists())
+
+    def test_bulk_delete_unverified_user(self):
+        self.user.profile.email_verified = False
+        self.user.profile.save()
+        response = self.client.post(reverse('api:task-bulk-delete'), {'ids': [1]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
 class RegisterViewTests(APITestCase):
     def setUp(self):
         self.url = reverse('api:register')
@@ -513,6 +853,48 @@ class ProfileViewTests(APITestCase):
         self.assertIn('user_errors', response.data)
 
 
+@override_settings(RATELIMIT_RATES={'login_ip': '3/m', 'login_account': '2/m',
+                                    'password_reset_ip': '3/m', 'password_reset_account': '1/h'})
+class AuthThrottleTests(APITestCase):
+    def setUp(self):
+        limiter.reset()
+        self.addCleanup(limiter.reset)
+        self.user = User.objects.create_user(username='testuser', password='testpass', email='test@example.com')
+
+    @patch('api.views.authenticate', return_value=None)
+    def test_login_throttled_per_account_before_authentication(self, mock_authenticate):
+        for _ in range(2):
+            self.client.post(reverse('api:login'), {'username': 'testuser', 'password': 'wrong'})
+
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('api:login'), {'username': 'TestUser', 'password': 'wrong'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(mock_authenticate.call_count, 2)
+
+    @patch('api.views.authenticate', return_value=None)
+    def test_login_throttled_per_ip(self, mock_authenticate):
+        for number in range(3):
+            self.client.post(reverse('api:login'), {'username': f'user{number}', 'password': 'wrong'})
+
+        response = self.client.post(reverse('api:login'), {'username': 'testuser', 'password': 'testpass'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        response = self.client.post(reverse('api:login'), {'username': 'testuser', 'password': 'testpass'},
+                                    REMOTE_ADDR='203.0.113.5')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @patch('my_auth.services.EmailService.send_new_password_email')
+    def test_password_reset_throttled_per_email(self, mock_send_new_password_email):
+        response = self.client.post(reverse('api:password_reset'), {'email': 'test@example.com'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('api:password_reset'), {'email': 'TEST@example.com'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        mock_send_new_password_email.assert_called_once()
+
+
 class PasswordResetViewTests(APITestCase):
     def setUp(self):
         self.user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass')
@@ -583,3 +965,59 @@ class TaskConfirmViewTests(APITestCase):
         url = reverse('api:task-confirm', kwargs={'pk': self.task.pk})
         response = self.client.patch(url)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class QueryBudgetTests(QueryBudgetMixin, APITestCase):
+    """
+    Бюджеты запросов к БД для эндпоинтов API. Токен уже в кэше аутентификации,
+    поэтому бюджет не зависит от числа задач: рост запросов означает N+1.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.user.profile.email_verified = True
+        self.user.profile.save()
+        self.token = Token.objects.create(user=self.user)
+        self.tasks = [Task.objects.create(name=f'Task {i}', description='Description', user=self.user)
+                      for i in range(10)]
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.client.get(reverse('api:profile'))
+
+    def test_task_list_budget(self):
+        with self.assertQueryBudget(1):
+            response = self.client.get(reverse('api:task-list'))
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_task_detail_budget(self):
+        with self.assertQueryBudget(1):
+            response = self.client.get(reverse('api:task-detail-update', args=[self.tasks[0].pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_task_search_budget(self):
+        with self.assertQueryBudget(2):
+            response = self.client.get(reverse('api:task-search'), {'q': 'Task'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_task_changes_budget(self):
+        sync_token = self.client.get(reverse('api:task-changes')).data['sync_token']
+        with self.assertQueryBudget(2):
+            response = self.client.get(reverse('api:task-changes'), {'since': sync_token})
+        self.assertEqual(len(response.data['updated']), 10)
+
+    def test_profile_budget(self):
+        # В кэше аутентификации нет полей профиля: пользователь и профиль загружаются по запросу на каждый
+        with self.assertQueryBudget(2):
+            response = self.client.get(reverse('api:profile'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_budget_exceeded_fails(self):
+        with self.assertRaises(AssertionError):
+            with self.assertQueryBudget(0):
+                User.objects.count()
+
+    def test_repeated_queries_fail(self):
+        with self.assertRaises(AssertionError):
+            with self.assertQueryBudget(100):
+                for task in Task.objects.filter(user=self.user)[:3]:
+                    User.objects.get(pk=task.user_id)
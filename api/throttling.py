@@ -0,0 +1,40 @@
+from rest_framework.throttling import BaseThrottle
+from toDo_app.ratelimit import check_rate_limit
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Ограничение запросов корзинами токенов по IP-адресу и по учетной записи.
+
+    Лимиты берутся из settings.RATELIMIT_RATES['<scope>_ip'] и ['<scope>_account'],
+    учетная запись — из поля account_field тела запроса.
+    """
+
+    scope = None
+    account_field = None
+
+    def allow_request(self, request, view) -> bool:
+        """
+        :param request: HTTP запрос.
+        :param view: Представление, к которому осуществляется доступ.
+        :return: True, если во всех корзинах запроса есть токены.
+        """
+
+        account = None
+        if self.account_field and hasattr(request.data, 'get'):
+            account = request.data.get(self.account_field)
+        self.wait_seconds = check_rate_limit(request, self.scope, account)
+        return not self.wait_seconds
+
+    def wait(self) -> float:
+        return self.wait_seconds
+
+
+class LoginThrottle(TokenBucketThrottle):
+    scope = 'login'
+    account_field = 'username'
+
+
+class PasswordResetThrottle(TokenBucketThrottle):
+    scope = 'password_reset'
+    account_field = 'email'
@@ -1,13 +1,20 @@
 from django.urls import path
 from .views import (TaskListView, TaskCreateView, TaskDetailUpdateView,
                     TaskDeleteView, RegisterView, LogoutView, LoginView,
-                    ProfileView, PasswordResetView, TaskConfirmView)
+                    ProfileView, PasswordResetView, TaskConfirmView, TaskSearchView,
+                    TaskChangesView, TaskBulkCreateView, TaskBulkUpdateView,
+                    TaskBulkDeleteView)
 
 app_name = 'api'
 
 urlpatterns = [
     path('tasks/', TaskListView.as_view(), name='task-list'),
     path('tasks/create/', TaskCreateView.as_view(), name='task-create'),
+    path('tasks/search/', TaskSearchView.as_view(), name='task-search'),
+    path('tasks/changes/', TaskChangesView.as_view(), name='task-changes'),
+    path('tasks/bulk/create/', TaskBulkCreateView.as_view(), name='task-bulk-create'),
+    path('tasks/bulk/update/', TaskBulkUpdateView.as_view(), name='task-bulk-update'),
+    path('tasks/bulk/delete/', TaskBulkDeleteView.as_view(), name='task-bulk-delete'),
     path('tasks/<int:pk>/', TaskDetailUpdateView.as_view(), name='task-detail-update'),
     path('tasks/<int:pk>/delete/', TaskDeleteView.as_view(), name='task-delete'),
     path('register/', RegisterView.as_view(), name='register'),
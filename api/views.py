@@ -13,10 +13,19 @@ from tasks.models import Task
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from rest_framework.views import APIView
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
+from .etags import tasks_etag
 from .filters import TaskFilter
+from .pagination import TaskCursorPagination, TaskSearchPagination
+from tasks.search import search_tasks
+from tasks.bulk import bulk_create_tasks, bulk_delete_tasks, bulk_update_tasks, get_owned_task_ids
+from tasks.sync import InvalidSyncToken, get_task_changes, parse_sync_token
 from .serializers import (TaskSerializer, CreateTaskSerializer, TaskDetailSerializer,
                           UserRegistrationSerializer, ProfileSerializer, UserSerializer,
-                          PasswordResetSerializer)
+                          PasswordResetSerializer, BulkTaskCreateSerializer, BulkTaskUpdateSerializer,
+                          BulkTaskUpdateItemSerializer, BulkTaskDeleteSerializer)
 from rest_framework.permissions import IsAuthenticated
 from my_auth.services import EmailService
 from django.contrib import messages
@@ -26,21 +35,27 @@ from django.contrib.auth import authenticate
 from rest_framework.permissions import AllowAny
 from rest_framework.authtoken.models import Token
 from .permissions import IsEmailVerified
+from .throttling import LoginThrottle, PasswordResetThrottle
 from django.contrib.auth.models import User
 
 logger = logging.getLogger(__name__)
 
 
+@method_decorator(vary_on_headers('Accept', 'Accept-Language'), name='get')
+@method_decorator(condition(etag_func=tasks_etag), name='get')
 class TaskListView(ListAPIView):
     """
     Этот класс предоставляет API для получения списка задач,
     связанных с текущим пользователем. Доступ к этому представлению
     разрешен только для пользователей с подтвержденным адресом электронной почты.
+    Список отдается постранично с курсорной пагинацией и поддерживает
+    условные запросы по ETag (If-None-Match).
     """
 
     serializer_class = TaskSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TaskFilter
+    pagination_class = TaskCursorPagination
     permission_classes = [IsEmailVerified]
 
     def get_queryset(self) -> QuerySet[Task]:
@@ -69,6 +84,102 @@ class TaskListView(ListAPIView):
         return super().handle_exception(exc)
 
 
+class TaskSearchView(ListAPIView):
+    """
+    Этот класс предоставляет API для полнотекстового поиска по названию
+    и описанию задач текущего пользователя. Строка поиска передается
+    в параметре ``q``, результаты упорядочены по релевантности.
+    Доступ к этому представлению разрешен только для пользователей
+    с подтвержденным адресом электронной почты.
+    """
+
+    serializer_class = TaskSerializer
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = TaskFilter
+    pagination_class = TaskSearchPagination
+    permission_classes = [IsEmailVerified]
+
+    def get_queryset(self) -> QuerySet[Task]:
+        """
+        Возвращает задачи текущего пользователя, найденные по строке поиска.
+
+        :return: QuerySet найденных задач.
+        """
+
+        query = self.request.query_params.get('q', '')
+        return search_tasks(Task.objects.filter(user=self.request.user), query)
+
+    def handle_exception(self, exc: Exception) -> Response:
+        """
+        Обрабатывает исключения, возникающие при выполнении запроса.
+        Если возникло исключение PermissionDenied, возвращает
+        сообщение с просьбой подтвердить адрес электронной почты.
+
+        :param exc: Исключение, возникшее при выполнении запроса.
+        :return: Response с сообщением об ошибке или результатом
+        обработки исключения.
+        """
+
+        if isinstance(exc, PermissionDenied):
+            return Response({'detail': 'Пожалуйста, подтвердите адрес электронной почты.'},
+                            status=status.HTTP_403_FORBIDDEN)
+        return super().handle_exception(exc)
+
+
+class TaskChangesView(APIView):
+    """
+    Этот класс предоставляет API дельта-синхронизации задач текущего
+    пользователя. Клиент передает токен прошлой синхронизации в параметре
+    ``since`` и получает только созданные и измененные задачи и
+    идентификаторы удаленных задач, а также новый токен. Без токена или
+    с устаревшим токеном возвращается только флаг ``reset`` и новый токен:
+    клиент загружает задачи постранично через список задач.
+    Доступ к этому представлению разрешен только для пользователей
+    с подтвержденным адресом электронной почты.
+    """
+
+    permission_classes = [IsEmailVerified]
+
+    def get(self, request) -> Response:
+        """
+        Возвращает изменения задач с момента прошлой синхронизации.
+
+        :param request: HTTP запрос.
+        :return: Response с изменениями задач и новым токеном синхронизации.
+        """
+
+        token = request.query_params.get('since')
+        try:
+            since = parse_sync_token(token) if token else None
+        except InvalidSyncToken:
+            return Response({'detail': 'Недействительный токен синхронизации.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        changes = get_task_changes(request.user, since)
+        return Response({
+            'updated': TaskSerializer(changes['updated'], many=True).data,
+            'deleted': changes['deleted'],
+            'reset': changes['reset'],
+            'sync_token': changes['sync_token'],
+        })
+
+    def handle_exception(self, exc: Exception) -> Response:
+        """
+        Обрабатывает исключения, возникающие при выполнении запроса.
+        Если возникло исключение PermissionDenied, возвращает
+        сообщение с просьбой подтвердить адрес электронной почты.
+
+        :param exc: Исключение, возникшее при выполнении запроса.
+        :return: Response с сообщением об ошибке или результатом
+        обработки исключения.
+        """
+
+        if isinstance(exc, PermissionDenied):
+            return Response({'detail': 'Пожалуйста, подтвердите адрес электронной почты.'},
+                            status=status.HTTP_403_FORBIDDEN)
+        return super().handle_exception(exc)
+
+
 class TaskCreateView(CreateAPIView):
     """
     Этот класс предоставляет API для создания новой задачи,
@@ -87,7 +198,7 @@ class TaskCreateView(CreateAPIView):
         """
 
         serializer.save(user=self.request.user)
-        logger.info(f"Пользователь {self.request.user.username} создал новую задачу.")
+        logger.info("Пользователь %s создал новую задачу.", self.request.user.username)
 
     def handle_exception(self, exc: Exception) -> Response:
         """
@@ -107,12 +218,15 @@ class TaskCreateView(CreateAPIView):
         return super().handle_exception(exc)
 
 
+@method_decorator(vary_on_headers('Accept', 'Accept-Language'), name='get')
+@method_decorator(condition(etag_func=tasks_etag), name='get')
 class TaskDetailUpdateView(RetrieveUpdateAPIView):
     """
     Этот класс предоставляет API для получения и обновления
     информации о задаче, связанной с текущим пользователем.
     Доступ к этому представлению разрешен только для пользователей
     с подтвержденным адресом электронной почты.
+    Получение задачи поддерживает условные запросы по ETag (If-None-Match).
     """
 
     permission_classes = [IsEmailVerified]
@@ -174,7 +288,7 @@ class TaskDeleteView(DestroyAPIView):
         :return: QuerySet задач пользователя.
         """
 
-        logger.info(f"Пользователь {self.request.user.username} удалил задачу.")
+        logger.info("Пользователь %s удалил задачу.", self.request.user.username)
         return Task.objects.filter(user=self.request.user)
 
     def handle_exception(self, exc: Exception) -> Response:
@@ -194,6 +308,188 @@ class TaskDeleteView(DestroyAPIView):
         return super().handle_exception(exc)
 
 
+class TaskBulkCreateView(APIView):
+    """
+    Этот класс предоставляет API для пакетного создания задач
+    текущего пользователя. Все корректные задачи создаются одним
+    запросом к базе данных, для каждой задачи возвращается результат.
+    Доступ к этому представлению разрешен только для пользователей
+    с подтвержденным адресом электронной почты.
+    """
+
+    permission_classes = [IsEmailVerified]
+
+    def post(self, request) -> Response:
+        """
+        Обрабатывает пакетное создание задач.
+
+        :param request: HTTP запрос со списком задач в поле 'tasks'.
+        :return: Response с результатом по каждой задаче: 201, если созданы
+                 все задачи, иначе 207.
+        """
+
+        serializer = BulkTaskCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = []
+        valid_indexes, valid_items = [], []
+        for index, item in enumerate(serializer.validated_data['tasks']):
+            item_serializer = CreateTaskSerializer(data=item)
+            if item_serializer.is_valid():
+                valid_indexes.append(index)
+                valid_items.append(item_serializer.validated_data)
+            else:
+                results.append({'index': index, 'status': 'invalid', 'errors': item_serializer.errors})
+
+        tasks = bulk_create_tasks(request.user.id, valid_items)
+        results.extend({'index': index, 'status': 'created', 'id': task.id}
+                       for index, task in zip(valid_indexes, tasks))
+        results.sort(key=lambda result: result['index'])
+        logger.info("Пользователь %s создал %s задач пакетом.", request.user.username, len(tasks))
+
+        response_status = status.HTTP_201_CREATED if len(tasks) == len(results) else status.HTTP_207_MULTI_STATUS
+        return Response({'results': results}, status=response_status)
+
+    def handle_exception(self, exc: Exception) -> Response:
+        """
+        Обрабатывает исключения, возникающие при выполнении запроса.
+        Если возникло исключение PermissionDenied, возвращает
+        сообщение с просьбой подтвердить адрес электронной почты.
+
+        :param exc: Исключение, возникшее при выполнении запроса.
+        :return: Response с сообщением об ошибке или результатом
+        обработки исключения.
+        """
+
+        if isinstance(exc, PermissionDenied):
+            return Response({'detail': 'Пожалуйста, подтвердите адрес электронной почты.'},
+                            status=status.HTTP_403_FORBIDDEN)
+        return super().handle_exception(exc)
+
+
+class TaskBulkUpdateView(APIView):
+    """
+    Этот класс предоставляет API для пакетного обновления задач
+    текущего пользователя. Одинаковые изменения применяются одним
+    запросом UPDATE ... WHERE id IN (...). Задачи других пользователей
+    не изменяются и возвращаются со статусом 'not_found', повторные
+    изменения одной задачи — со статусом 'invalid'.
+    Доступ к этому представлению разрешен только для пользователей
+    с подтвержденным адресом электронной почты.
+    """
+
+    permission_classes = [IsEmailVerified]
+
+    def post(self, request) -> Response:
+        """
+        Обрабатывает пакетное обновление задач.
+
+        :param request: HTTP запрос со списком изменений в поле 'tasks'.
+        :return: Response с результатом по каждому изменению: 200, если обновлены
+                 все задачи, иначе 207.
+        """
+
+        serializer = BulkTaskUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = []
+        changes = {}
+        valid_items = []
+        for index, item in enumerate(serializer.validated_data['tasks']):
+            item_serializer = BulkTaskUpdateItemSerializer(data=item)
+            if item_serializer.is_valid():
+                fields = dict(item_serializer.validated_data)
+                task_id = fields.pop('id')
+                if task_id in changes:
+                    # Повтор задачи в пакете отклоняется: применяется только первое изменение
+                    results.append({'index': index, 'id': task_id, 'status': 'invalid',
+                                    'errors': {'id': ['Задача уже изменяется в этом пакете.']}})
+                    continue
+                changes[task_id] = fields
+                valid_items.append((index, task_id))
+            else:
+                results.append({'index': index, 'id': item.get('id'), 'status': 'invalid',
+                                'errors': item_serializer.errors})
+
+        owned_ids = get_owned_task_ids(request.user.id, changes)
+        bulk_update_tasks(request.user.id, {task_id: fields for task_id, fields in changes.items()
+                                            if task_id in owned_ids})
+        results.extend({'index': index, 'id': task_id, 'status': 'updated' if task_id in owned_ids else 'not_found'}
+                       for index, task_id in valid_items)
+        results.sort(key=lambda result: result['index'])
+        logger.info("Пользователь %s обновил %s задач пакетом.", request.user.username, len(owned_ids))
+
+        all_updated = all(result['status'] == 'updated' for result in results)
+        return Response({'results': results},
+                        status=status.HTTP_200_OK if all_updated else status.HTTP_207_MULTI_STATUS)
+
+    def handle_exception(self, exc: Exception) -> Response:
+        """
+        Обрабатывает исключения, возникающие при выполнении запроса.
+        Если возникло исключение PermissionDenied, возвращает
+        сообщение с просьбой подтвердить адрес электронной почты.
+
+        :param exc: Исключение, возникшее при выполнении запроса.
+        :return: Response с сообщением об ошибке или результатом
+        обработки исключения.
+        """
+
+        if isinstance(exc, PermissionDenied):
+            return Response({'detail': 'Пожалуйста, подтвердите адрес электронной почты.'},
+                            status=status.HTTP_403_FORBIDDEN)
+        return super().handle_exception(exc)
+
+
+class TaskBulkDeleteView(APIView):
+    """
+    Этот класс предоставляет API для пакетного удаления задач
+    текущего пользователя одним запросом DELETE. Задачи других
+    пользователей не удаляются и возвращаются со статусом 'not_found'.
+    Доступ к этому представлению разрешен только для пользователей
+    с подтвержденным адресом электронной почты.
+    """
+
+    permission_classes = [IsEmailVerified]
+
+    def post(self, request) -> Response:
+        """
+        Обрабатывает пакетное удаление задач.
+
+        :param request: HTTP запрос со списком идентификаторов задач в поле 'ids'.
+        :return: Response с результатом по каждой задаче: 200, если удалены
+                 все задачи, иначе 207.
+        """
+
+        serializer = BulkTaskDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        task_ids = list(dict.fromkeys(serializer.validated_data['ids']))
+        deleted_ids = set(bulk_delete_tasks(request.user.id, task_ids))
+        results = [{'id': task_id, 'status': 'deleted' if task_id in deleted_ids else 'not_found'}
+                   for task_id in task_ids]
+        logger.info("Пользователь %s удалил %s задач пакетом.", request.user.username, len(deleted_ids))
+
+        all_deleted = len(deleted_ids) == len(results)
+        return Response({'results': results},
+                        status=status.HTTP_200_OK if all_deleted else status.HTTP_207_MULTI_STATUS)
+
+    def handle_exception(self, exc: Exception) -> Response:
+        """
+        Обрабатывает исключения, возникающие при выполнении запроса.
+        Если возникло исключение PermissionDenied, возвращает
+        сообщение с просьбой подтвердить адрес электронной почты.
+
+        :param exc: Исключение, возникшее при выполнении запроса.
+        :return: Response с сообщением об ошибке или результатом
+        обработки исключения.
+        """
+
+        if isinstance(exc, PermissionDenied):
+            return Response({'detail': 'Пожалуйста, подтвердите адрес электронной почты.'},
+                            status=status.HTTP_403_FORBIDDEN)
+        return super().handle_exception(exc)
+
+
 class RegisterView(CreateAPIView):
     """
     Этот класс предоставляет API для регистрации новых пользователей.
@@ -226,20 +522,20 @@ class RegisterView(CreateAPIView):
 
         # Сохраняем пользователя
         user = user_serializer.save()
-        logger.info(f"Зарегистрирован пользователь: {user.username}")
+        logger.info("Зарегистрирован пользователь: %s", user.username)
 
         # Создаем или обновляем профиль
         profile, created = Profile.objects.get_or_create(user=user)
         profile.agreement_accepted = True
         profile.save()
-        logger.info(f"Создан профиль для пользователя: {user.username}")
+        logger.info("Создан профиль для пользователя: %s", user.username)
 
         # Отправляем электронное письмо для подтверждения
         try:
             EmailService.send_verification_email(request, user)  # Отправляем письмо
             messages.success(request, 'Регистрация прошла успешна! Проверьте вашу почту для подтверждения.')
         except Exception as e:
-            logger.error(f"Не удалось отправить письмо с подтверждением для пользователя {user.username}: {str(e)}")
+            logger.error("Не удалось отправить письмо с подтверждением для пользователя %s: %s", user.username, e)
             messages.warning(request, 'Регистрация успешна, но не удалось отправить письмо с подтверждением. '
                                       'Пожалуйста, проверьте вашу почту позже.')
 
@@ -263,15 +559,19 @@ class LogoutView(APIView):
         """
 
         request.user.auth_token.delete()
-        logger.info(f"Пользователь успешно вышел: {request.user.username}")
+        logger.info("Пользователь успешно вышел: %s", request.user.username)
         return Response(status=status.HTTP_200_OK)
 
 
 class LoginView(APIView):
     """
     Этот класс предоставляет API для входа пользователей в систему.
+    Попытки входа ограничены по IP-адресу и по имени пользователя,
+    пароль проверяется в пуле потоков хэширования (my_auth.hashers).
     """
 
+    throttle_classes = [LoginThrottle]
+
     def post(self, request) -> Response:
         """
         Обрабатывает вход пользователя в систему.
@@ -288,15 +588,15 @@ class LoginView(APIView):
             return Response({'error': 'Имя пользователя и пароль обязательны.'}, status=status.HTTP_400_BAD_REQUEST)
 
         # Аутентификация пользователя
-        user = authenticate(username=username, password=password)
+        user = authenticate(request, username=username, password=password)
 
         if user is not None:
             # Если аутентификация успешна, получаем или создаем токен
             token, created = Token.objects.get_or_create(user=user)
-            logger.info(f"Авторизовался пользователь: {username}")
+            logger.info("Авторизовался пользователь: %s", username)
             return Response({'token': token.key}, status=status.HTTP_200_OK)
         else:
-            logger.warning(f"Неудачная попытка авторизации для пользователя: {username}")
+            logger.warning("Неудачная попытка авторизации для пользователя: %s", username)
             return Response({'error': 'Неверные учетные данные'}, status=status.HTTP_401_UNAUTHORIZED)
 
 
@@ -344,10 +644,10 @@ class ProfileView(RetrieveUpdateAPIView):
 
             user_serializer.save()
             profile_serializer.save()
-            logger.info(f"Пользователь {request.user.username} обновил свой профиль.")
+            logger.info("Пользователь %s обновил свой профиль.", request.user.username)
             return Response({'user': user_serializer.data, 'profile': profile_serializer.data})
 
-        logger.info(f"Пользователь {request.user.username} ошибка обновления профиля.")
+        logger.info("Пользователь %s ошибка обновления профиля.", request.user.username)
         return Response({'user_errors': user_serializer.errors},
                         status=status.HTTP_400_BAD_REQUEST)
 
@@ -355,9 +655,12 @@ class ProfileView(RetrieveUpdateAPIView):
 class PasswordResetView(GenericAPIView):
     """
     Этот класс предоставляет API для сброса пароля пользователя.
+    Запросы ограничены по IP-адресу и по E-mail.
     """
 
+    authentication_classes = []
     permission_classes = [AllowAny]
+    throttle_classes = [PasswordResetThrottle]
     serializer_class = PasswordResetSerializer
 
     def post(self, request, *args, **kwargs) -> Response:
@@ -385,7 +688,7 @@ class PasswordResetView(GenericAPIView):
 
         # Отправка нового пароля пользователю
         EmailService.send_new_password_email(user, new_password)
-        logger.info(f"Пользователь {request.user.username} сбросил свой пароль.")
+        logger.info("Пользователь %s сбросил свой пароль.", user.username)
         return Response({"detail": "Новый пароль отправлен на ваш email."}, status=status.HTTP_200_OK)
 
 
@@ -417,5 +720,5 @@ class TaskConfirmView(UpdateAPIView):
         # Обновление поля complete
         task.complete = True
         task.save()  # Сохраняем изменения в базе данных
-        logger.info(f"Пользователь {request.user.username} подтвердил задачу.")
+        logger.info("Пользователь %s подтвердил задачу.", request.user.username)
         return Response({"detail": "Задача успешно подтверждена."}, status=status.HTTP_200_OK)
@@ -0,0 +1,35 @@
+"""
+Настройки gunicorn для метрик Prometheus и логов в нескольких процессах.
+
+Gunicorn загружает этот файл из рабочего каталога автоматически. Перед запуском
+воркеров удаляются файлы метрик прошлого запуска, а при завершении воркера
+его файлы помечаются как файлы завершенного процесса. Каждый воркер пишет
+логи в свой файл (см. LOGFILE_NAME).
+"""
+
+import glob
+import os
+from prometheus_client import multiprocess
+
+
+def on_starting(server):
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path and os.path.isdir(path):
+        for filename in glob.glob(os.path.join(path, '*.db')):
+            os.remove(filename)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def pre_fork(server, worker):
+    # Номер воркера для файла логов: свободный номер среди работающих воркеров,
+    # поэтому файл одновременно пишет только один процесс
+    used = {getattr(running, 'log_slot', None) for running in server.WORKERS.values()}
+    worker.log_slot = next(slot for slot in range(len(used) + 1) if slot not in used)
+
+
+def post_fork(server, worker):
+    os.environ['LOG_PROCESS_NAME'] = f'web-{worker.log_slot}'
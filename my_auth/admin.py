@@ -13,6 +13,9 @@ class ProductAdmin(admin.ModelAdmin):
 
     Атрибуты:
         list_display (tuple): Поля, которые будут отображаться в списке задач.
+        list_select_related (tuple): Связи, загружаемые вместе со списком
+        (Profile.__str__ и колонка user обращаются к пользователю).
     """
 
     list_display = "user", "bio", "avatar", "agreement_accepted"
+    list_select_related = "user",
@@ -0,0 +1,253 @@
+"""
+Проверка занятости имени пользователя и E-mail при регистрации.
+
+Занятые значения хранятся в фильтре Блума: битовая строка в Redis общая для
+всех процессов (новые значения добавляются атомарным SETBIT), а каждый процесс
+держит ее копию и обновляет раз в AVAILABILITY_REFRESH_SECONDS. Если фильтр
+говорит, что значения нет, ответ дается без запросов к БД и к Redis; при
+вероятном совпадении выполняется точная проверка в БД.
+
+Фильтр в Redis создается только перестроением по БД, которое вместе с ним
+записывает отметку о построении. Добавление значения не создает ключ: биты
+выставляются Lua-скриптом, только если фильтр и отметка существуют. Пока
+фильтра или отметки нет (не перестроен, вытеснен, остался неполный ключ),
+все проверки выполняются в БД.
+
+Копия процесса может не знать о значениях, добавленных другими процессами
+за последние AVAILABILITY_REFRESH_SECONDS. Для подсказки при вводе это
+допустимо: окончательную проверку выполняет форма регистрации.
+Без AVAILABILITY_REDIS_URL фильтр строится по БД в памяти процесса
+и так же перестраивается раз в AVAILABILITY_REFRESH_SECONDS.
+"""
+
+import functools
+import hashlib
+import logging
+import threading
+import time
+import redis
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+from .services import UserEmailLookup
+
+logger = logging.getLogger(__name__)
+
+AVAILABILITY_FILTER_KEY = 'auth:availability:{kind}'
+AVAILABILITY_BUILT_KEY = 'auth:availability:{kind}:built'
+USERNAME = 'username'
+EMAIL = 'email'
+
+# Выставляет биты значения, только если фильтр построен; возвращает 1, если биты выставлены
+ADD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1], KEYS[2]) < 2 then
+    return 0
+end
+for i = 1, #ARGV do
+    redis.call('SETBIT', KEYS[1], ARGV[i], 1)
+end
+return 1
+"""
+
+
+@functools.lru_cache
+def _get_client(url: str) -> redis.Redis:
+    return redis.Redis.from_url(url)
+
+
+def get_redis_client() -> redis.Redis | None:
+    """
+    :return: Клиент Redis для фильтров или None, если фильтры хранятся только в процессе.
+    """
+
+    if not settings.AVAILABILITY_REDIS_URL:
+        return None
+    return _get_client(settings.AVAILABILITY_REDIS_URL)
+
+
+def bloom_positions(value: str, bits: int, hashes: int) -> list:
+    """
+    :return: Номера битов значения (двойное хэширование по blake2b).
+    """
+
+    digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+    first = int.from_bytes(digest[:8], 'big')
+    step = int.from_bytes(digest[8:], 'big') | 1
+    return [(first + i * step) % bits for i in range(hashes)]
+
+
+class BloomFilter:
+    """
+    Фильтр Блума с порядком битов как у SETBIT/GETBIT в Redis
+    (бит 0 — старший бит первого байта).
+    """
+
+    def __init__(self, bits: int, hashes: int, data: bytes = b''):
+        self.bits = bits
+        self.hashes = hashes
+        self.data = bytearray(data)
+        # Redis возвращает строку только до последнего ненулевого байта
+        self.data.extend(bytes((bits + 7) // 8 - len(self.data)))
+
+    def positions(self, value: str) -> list:
+        return bloom_positions(value, self.bits, self.hashes)
+
+    def add(self, value: str):
+        for position in self.positions(value):
+            self.data[position >> 3] |= 0x80 >> (position & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.data[position >> 3] & (0x80 >> (position & 7)) for position in self.positions(value))
+
+
+def _new_filter(data: bytes = b'') -> BloomFilter:
+    return BloomFilter(settings.AVAILABILITY_BLOOM_BITS, settings.AVAILABILITY_BLOOM_HASHES, data)
+
+
+def _iter_values(kind: str, queryset=None):
+    users = User.objects.all() if queryset is None else queryset
+    if kind == USERNAME:
+        yield from users.values_list('username', flat=True).iterator(chunk_size=5000)
+    else:
+        for email in users.exclude(email='').values_list('email', flat=True).iterator(chunk_size=5000):
+            yield UserEmailLookup.normalize(email)
+
+
+class AvailabilityFilter:
+    """
+    Фильтр занятых значений одного вида (имена пользователей или E-mail).
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.key = AVAILABILITY_FILTER_KEY.format(kind=kind)
+        self.built_key = AVAILABILITY_BUILT_KEY.format(kind=kind)
+        self._filter = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _get_filter(self) -> BloomFilter | None:
+        """
+        :return: Копия фильтра процесса или None, если фильтр в Redis не построен.
+        """
+
+        client = get_redis_client()
+        with self._lock:
+            if self._filter is not None and time.monotonic() - self._loaded_at <= settings.AVAILABILITY_REFRESH_SECONDS:
+                return self._filter
+
+            if client is None:
+                # Без Redis копия процесса перестраивается по БД: так в нее попадают
+                # значения, добавленные другими процессами
+                self._filter = self.build()
+            else:
+                data, built = client.mget(self.key, self.built_key)
+                self._filter = _new_filter(data) if data is not None and built is not None else None
+            self._loaded_at = time.monotonic()
+            return self._filter
+
+    def might_contain(self, value: str) -> bool:
+        """
+        :return: False, если значение точно свободно; True, если оно, возможно, занято.
+        """
+
+        try:
+            bloom = self._get_filter()
+        except redis.RedisError as e:
+            logger.error(f'Фильтр занятых значений ({self.kind}) недоступен: {str(e)}')
+            return True
+        return bloom is None or value in bloom
+
+    def add(self, value: str):
+        """
+        Добавляет занятое значение в копию процесса и в общий фильтр в Redis,
+        если он построен.
+        """
+
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(value)
+        client = get_redis_client()
+        if client is None:
+            return
+        try:
+            client.eval(ADD_SCRIPT, 2, self.key, self.built_key,
+                        *bloom_positions(value, settings.AVAILABILITY_BLOOM_BITS, settings.AVAILABILITY_BLOOM_HASHES))
+        except redis.RedisError as e:
+            logger.error(f'Не удалось добавить значение в фильтр ({self.kind}): {str(e)}')
+
+    def build(self, queryset=None) -> BloomFilter:
+        bloom = _new_filter()
+        for value in _iter_values(self.kind, queryset):
+            bloom.add(value)
+        return bloom
+
+    def rebuild(self) -> BloomFilter:
+        """
+        Строит фильтр заново по БД и атомарно заменяет им фильтр в Redis
+        вместе с отметкой о построении.
+        """
+
+        bloom = self.build()
+        client = get_redis_client()
+        if client is not None:
+            temporary_key = f'{self.key}:rebuild'
+            client.set(temporary_key, bytes(bloom.data))
+            pipeline = client.pipeline(transaction=True)
+            pipeline.rename(temporary_key, self.key)
+            pipeline.set(self.built_key, 1)
+            pipeline.execute()
+        with self._lock:
+            self._filter = bloom
+            self._loaded_at = time.monotonic()
+        return bloom
+
+    def reset(self):
+        with self._lock:
+            self._filter = None
+
+
+username_filter = AvailabilityFilter(USERNAME)
+email_filter = AvailabilityFilter(EMAIL)
+
+
+class AvailabilityService:
+    """
+    Проверка занятости имени пользователя и E-mail через фильтры Блума.
+    """
+
+    @staticmethod
+    def is_username_taken(username: str) -> bool:
+        if not username_filter.might_contain(username):
+            return False
+        return User.objects.filter(username=username).exists()
+
+    @staticmethod
+    def is_email_taken(email: str) -> bool:
+        if not email_filter.might_contain(UserEmailLookup.normalize(email)):
+            return False
+        return UserEmailLookup.exists(email)
+
+    @staticmethod
+    def add_user(user: User):
+        """
+        Добавляет имя и E-mail пользователя в фильтры. Значения не удаляются:
+        лишнее значение дает только лишнюю проверку в БД.
+        """
+
+        username_filter.add(user.username)
+        if user.email:
+            email_filter.add(UserEmailLookup.normalize(user.email))
+
+    @staticmethod
+    def rebuild():
+        """
+        Перестраивает оба фильтра. Пользователи, зарегистрированные во время
+        перестроения, добавляются повторно после замены фильтров.
+        """
+
+        started = timezone.now()
+        username_filter.rebuild()
+        email_filter.rebuild()
+        for user in User.objects.filter(date_joined__gte=started).only('username', 'email'):
+            AvailabilityService.add_user(user)
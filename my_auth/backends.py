@@ -0,0 +1,168 @@
+"""
+Бэкенд аутентификации, загружающий пользователя вместе с профилем.
+
+AuthenticationMiddleware получает пользователя сессии через get_user,
+поэтому профиль (подтверждение email, аватар) доступен в представлениях
+и шаблонах без отдельного запроса к базе данных. authenticate и aauthenticate
+выбирают пользователя тем же запросом.
+
+authenticate и aauthenticate проверяют пароль в пуле потоков хэширования
+(my_auth.hashers); aauthenticate выполняет запросы к базе данных через
+асинхронный ORM. Модульная функция
+aauthenticate повторяет django.contrib.auth.authenticate: выбор бэкендов по
+сигнатуре, остановка на PermissionDenied и сигнал user_login_failed.
+"""
+
+import inspect
+import re
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model, load_backend
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import verify_password
+from django.contrib.auth.signals import user_login_failed
+from django.core.exceptions import PermissionDenied
+from django.views.decorators.debug import sensitive_variables
+from .hashers import hash_in_pool, run_hashing
+
+UserModel = get_user_model()
+
+# Учетные данные с такими именами не передаются в сигнал user_login_failed, как в django.contrib.auth
+SENSITIVE_CREDENTIALS = re.compile('api|token|key|secret|password|signature', re.I)
+CLEANSED_SUBSTITUTE = '********************'
+
+
+class ProfileModelBackend(ModelBackend):
+    """
+    ModelBackend, который выбирает пользователя и профиль одним запросом.
+    """
+
+    @staticmethod
+    def get_queryset():
+        return UserModel._default_manager.select_related('profile')
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        """
+        Вариант ModelBackend.authenticate, который загружает пользователя вместе с профилем.
+        Хэш пароля проверяется и при необходимости пересчитывается в пуле потоков хэширования.
+
+        :param request: HTTP запрос.
+        :return: Объект User или None.
+        """
+
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = self.get_queryset().get(**{UserModel.USERNAME_FIELD: username})
+        except UserModel.DoesNotExist:
+            # Хэширование для несуществующего пользователя выравнивает время ответа, как в ModelBackend
+            hash_in_pool(UserModel().set_password, password)
+            return None
+
+        is_correct, must_update = hash_in_pool(verify_password, password, user.password)
+        if not is_correct or not self.user_can_authenticate(user):
+            return None
+        if must_update:
+            # Хэш прежнего алгоритма или параметров пересчитывается выбранным алгоритмом
+            hash_in_pool(user.set_password, password)
+            user.save(update_fields=['password'])
+        return user
+
+    def get_user(self, user_id):
+        """
+        Возвращает активного пользователя с загруженным профилем.
+
+        :param user_id: Идентификатор пользователя из сессии.
+        :return: Объект User или None.
+        """
+
+        try:
+            user = self.get_queryset().get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        """
+        Асинхронный вариант authenticate. Хэш пароля проверяется и при
+        необходимости пересчитывается в пуле потоков хэширования.
+
+        :param request: HTTP запрос.
+        :return: Объект User или None.
+        """
+
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = await self.get_queryset().aget(**{UserModel.USERNAME_FIELD: username})
+        except UserModel.DoesNotExist:
+            # Хэширование для несуществующего пользователя выравнивает время ответа, как в ModelBackend
+            await run_hashing(UserModel().set_password, password)
+            return None
+
+        is_correct, must_update = await run_hashing(verify_password, password, user.password)
+        if not is_correct or not self.user_can_authenticate(user):
+            return None
+        if must_update:
+            # Хэш прежнего алгоритма или параметров пересчитывается выбранным алгоритмом
+            await run_hashing(user.set_password, password)
+            await user.asave(update_fields=['password'])
+        return user
+
+
+def clean_credentials(credentials: dict) -> dict:
+    """
+    :return: Копия учетных данных, в которой значения секретных полей заменены звездочками.
+    """
+
+    return {key: CLEANSED_SUBSTITUTE if SENSITIVE_CREDENTIALS.search(key) else value
+            for key, value in credentials.items()}
+
+
+def _get_compatible_backends(request, **credentials):
+    """
+    :return: Пары (бэкенд, путь) для бэкендов, сигнатура которых принимает переданные учетные данные.
+    """
+
+    for backend_path in settings.AUTHENTICATION_BACKENDS:
+        backend = load_backend(backend_path)
+        authenticate = getattr(backend, 'aauthenticate', backend.authenticate)
+        try:
+            inspect.signature(authenticate).bind(request, **credentials)
+        except TypeError:
+            continue
+        yield backend, backend_path
+
+
+@sensitive_variables('credentials')
+async def aauthenticate(request=None, **credentials):
+    """
+    Асинхронный вариант authenticate для бэкендов из AUTHENTICATION_BACKENDS.
+    Бэкенды с aauthenticate проверяют пароль в пуле потоков хэширования,
+    остальные вызываются через sync_to_async. Если ни один бэкенд не принял
+    учетные данные, отправляется сигнал user_login_failed.
+
+    :param request: HTTP запрос.
+    :return: Объект User или None.
+    """
+
+    for backend, backend_path in _get_compatible_backends(request, **credentials):
+        try:
+            if hasattr(backend, 'aauthenticate'):
+                user = await backend.aauthenticate(request, **credentials)
+            else:
+                user = await sync_to_async(backend.authenticate)(request, **credentials)
+        except PermissionDenied:
+            # Бэкенд запретил вход: остальные бэкенды не проверяются
+            break
+        if user is None:
+            continue
+        user.backend = backend_path
+        return user
+
+    await user_login_failed.asend(sender=__name__, credentials=clean_credentials(credentials), request=request)
+    return None
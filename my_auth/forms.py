@@ -1,4 +1,5 @@
 from .models import Profile
+from .services import UserEmailLookup
 from django import forms
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
@@ -42,7 +43,7 @@ class UserRegistrationForm(forms.ModelForm):
         """
 
         email = self.cleaned_data.get('email')
-        if User.objects.filter(email=email).exists():
+        if email and UserEmailLookup.exists(email):
             raise ValidationError("Пользователь с таким email уже существует.")
         return email
 
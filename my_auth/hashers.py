@@ -0,0 +1,94 @@
+"""
+Хэширование паролей.
+
+Алгоритм выбирается настройкой PASSWORD_HASHER, параметры argon2 и scrypt
+задаются в настройках. Хэши прежних алгоритмов и параметров проверяются
+и при успешном входе пересчитываются выбранным алгоритмом.
+
+Пароль при входе проверяется в отдельном пуле из PASSWORD_HASHING_THREADS
+потоков: argon2, scrypt и PBKDF2 освобождают GIL, а размер пула ограничивает
+число одновременных проверок в процессе, поэтому волна попыток входа
+не занимает все ядра и не задерживает другие запросы.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, ScryptPasswordHasher
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2id с параметрами из настроек PASSWORD_ARGON2_*.
+    """
+
+    @property
+    def time_cost(self) -> int:
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self) -> int:
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self) -> int:
+        return settings.PASSWORD_ARGON2_PARALLELISM
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """
+    scrypt с параметрами из настроек PASSWORD_SCRYPT_*.
+    """
+
+    @property
+    def work_factor(self) -> int:
+        return settings.PASSWORD_SCRYPT_WORK_FACTOR
+
+    @property
+    def block_size(self) -> int:
+        return settings.PASSWORD_SCRYPT_BLOCK_SIZE
+
+    @property
+    def parallelism(self) -> int:
+        return settings.PASSWORD_SCRYPT_PARALLELISM
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_hashing_executor() -> ThreadPoolExecutor:
+    """
+    :return: Пул потоков хэширования процесса (создается при первом обращении).
+    """
+
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASHING_THREADS,
+                                           thread_name_prefix='password-hashing')
+        return _executor
+
+
+async def run_hashing(func, *args):
+    """
+    Выполняет хэширование в пуле потоков хэширования.
+
+    :param func: функция без обращений к БД (verify_password, make_password, set_password)
+    :return: результат функции
+    """
+
+    return await asyncio.get_running_loop().run_in_executor(get_hashing_executor(), func, *args)
+
+
+def hash_in_pool(func, *args):
+    """
+    Синхронный вариант run_hashing: выполняет хэширование в пуле потоков
+    хэширования и ждет результата.
+
+    :param func: функция без обращений к БД (verify_password, make_password, set_password)
+    :return: результат функции
+    """
+
+    return get_hashing_executor().submit(func, *args).result()
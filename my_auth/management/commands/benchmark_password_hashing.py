@@ -0,0 +1,66 @@
+"""
+Замер скорости проверки паролей разными алгоритмами.
+
+Для каждого алгоритма из PASSWORD_HASHER_CLASSES выводит время одной
+проверки, количество входов в секунду на одно ядро (проверки подряд в одном
+потоке) и в пуле потоков, как при входе.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает скорость проверки паролей (входов/с на ядро) для алгоритмов хэширования'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hashers', nargs='+', default=list(settings.PASSWORD_HASHER_CLASSES),
+                            help='Алгоритмы: ' + ', '.join(settings.PASSWORD_HASHER_CLASSES))
+        parser.add_argument('--iterations', type=int, default=20, help='Количество проверок в каждом замере')
+        parser.add_argument('--threads', type=int, default=settings.PASSWORD_HASHING_THREADS,
+                            help='Количество потоков пула')
+
+    def handle(self, *args, **options):
+        unknown = set(options['hashers']) - set(settings.PASSWORD_HASHER_CLASSES)
+        if unknown:
+            raise CommandError(f'Неизвестные алгоритмы: {", ".join(sorted(unknown))}')
+
+        self.stdout.write(f'Ядер: {os.cpu_count()}, потоков пула: {options["threads"]}')
+        self.stdout.write(f'{"Алгоритм":<10}{"Параметры":<28}{"мс/проверка":>13}{"входов/с на ядро":>18}'
+                          f'{"входов/с в пуле":>17}')
+        for name in options['hashers']:
+            hasher = import_string(settings.PASSWORD_HASHER_CLASSES[name])()
+            serial, pooled = self.measure(hasher, options['iterations'], options['threads'])
+            self.stdout.write(f'{name:<10}{self.describe(hasher):<28}{1000 / serial:>13.1f}{serial:>18.1f}'
+                              f'{pooled:>17.1f}')
+
+    @staticmethod
+    def measure(hasher, iterations: int, threads: int) -> tuple:
+        """
+        :return: проверок в секунду в одном потоке и в пуле из threads потоков
+        """
+        password = 'benchmark-password'
+        encoded = hasher.encode(password, hasher.salt())
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            hasher.verify(password, encoded)
+        serial = iterations / (time.perf_counter() - started)
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            started = time.perf_counter()
+            list(executor.map(hasher.verify, [password] * iterations * threads, [encoded] * iterations * threads))
+            pooled = iterations * threads / (time.perf_counter() - started)
+        return serial, pooled
+
+    @staticmethod
+    def describe(hasher) -> str:
+        if hasattr(hasher, 'memory_cost'):
+            return f'm={hasher.memory_cost} КиБ, t={hasher.time_cost}, p={hasher.parallelism}'
+        if hasattr(hasher, 'work_factor'):
+            return f'N={hasher.work_factor}, r={hasher.block_size}, p={hasher.parallelism}'
+        return f'{hasher.iterations} итераций'
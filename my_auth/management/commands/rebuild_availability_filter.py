@@ -0,0 +1,23 @@
+"""
+Перестроение фильтров занятых имен пользователей и E-mail по базе данных.
+
+Запускается при первом развертывании, после массового создания или удаления
+пользователей в обход сигналов и после изменения AVAILABILITY_BLOOM_BITS
+или AVAILABILITY_BLOOM_HASHES.
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from my_auth.availability import AvailabilityService, email_filter, username_filter
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает фильтры Блума занятых имен пользователей и E-mail'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        AvailabilityService.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Фильтры {username_filter.key} и {email_filter.key} перестроены '
+            f'за {time.perf_counter() - started:.1f} с'
+        ))
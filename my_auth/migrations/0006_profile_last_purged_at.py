@@ -0,0 +1,39 @@
+# Generated by Django 5.1.1 on 2026-10-18 21:05
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def delete_per_user_schedules(apps, schema_editor):
+    """
+    Удаляет устаревшие периодические задачи удаления, созданные для каждого пользователя.
+    """
+
+    PeriodicTask = apps.get_model('django_celery_beat', 'PeriodicTask')
+    PeriodicTasks = apps.get_model('django_celery_beat', 'PeriodicTasks')
+    deleted, _ = PeriodicTask.objects.filter(name__startswith='delete_tasks_',
+                                             task='my_auth.tasks.delete_completed_tasks').delete()
+    if deleted:
+        # Сообщаем планировщику celery beat, что расписание изменилось
+        PeriodicTasks.objects.update_or_create(ident=1, defaults={'last_update': timezone.now()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('my_auth', '0005_profile_delete_frequency'),
+        ('django_celery_beat', '0019_alter_periodictasks_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='last_purged_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['delete_frequency', 'last_purged_at'], name='profile_purge_due_idx'),
+        ),
+        migrations.RunPython(delete_per_user_schedules, migrations.RunPython.noop),
+    ]
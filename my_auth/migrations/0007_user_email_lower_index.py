@@ -0,0 +1,24 @@
+# Generated by Django 5.1.1 on 2026-10-18 22:10
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+from toDo_app.operations import AddModelIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('my_auth', '0006_profile_last_purged_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddModelIndexConcurrently(
+            app_label='auth',
+            model_name='user',
+            index=models.Index(Lower('email'), name='auth_user_email_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:52
+
+import my_auth.models
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('my_auth', '0007_user_email_lower_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailverification',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True, default=my_auth.models.get_verification_expiry),
+        ),
+        migrations.AlterField(
+            model_name='emailverification',
+            name='token',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+    ]
@@ -1,5 +1,8 @@
+from datetime import timedelta
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 import uuid
 
 
@@ -36,6 +39,7 @@ class Profile(models.Model):
         cookies_accepted (BooleanField): Статус согласие на использования Cookies (согласен/не согласен),
          по умолчанию False.
         delete_frequency (CharField): Частота удаления выполненых задач, по умолчанию ('never','Никогда')
+        last_purged_at (DateTimeField): Время последнего удаления выполненных задач по расписанию.
 
 
     """
@@ -43,6 +47,9 @@ class Profile(models.Model):
     class Meta:
         verbose_name = "Профиль"
         verbose_name_plural = "Профили"
+        indexes = [
+            models.Index(fields=['delete_frequency', 'last_purged_at'], name='profile_purge_due_idx'),
+        ]
 
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     bio = models.TextField(max_length=500, blank=True)
@@ -58,6 +65,7 @@ class Profile(models.Model):
         ('week', 'Раз в неделю'),
         ('month', 'Раз в месяц'),
     ], default='never')
+    last_purged_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self) -> str:
         """
@@ -67,16 +75,28 @@ class Profile(models.Model):
         return self.user.username
 
 
+def get_verification_expiry():
+    """
+    Возвращает время окончания действия нового токена подтверждения E-mail.
+    """
+
+    return timezone.now() + timedelta(hours=settings.EMAIL_VERIFICATION_TTL_HOURS)
+
+
 class EmailVerification(models.Model):
     """
     Модель создания токена для подтверждения E-mail.
 
     Хранит информацию о профиле и токене для подтверждения адреса электронной почты.
+    Токен одноразовый: при подтверждении expires_at переносится на текущее время,
+    поэтому использованные и просроченные токены удаляются одной выборкой по индексу expires_at.
 
      Атрибуты:
         profile (OneToOneField): Ссылка на пользователя, которому был отправлен токен.
-        token (UUIDField): Токен пользователя для подтверждения E-mail
+        token (UUIDField): Токен пользователя для подтверждения E-mail (уникальный индекс).
+        expires_at (DateTimeField): Время, до которого токен действителен.
     """
 
     profile = models.OneToOneField(Profile, on_delete=models.CASCADE)
-    token = models.UUIDField(default=uuid.uuid4, editable=False)
+    token = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
+    expires_at = models.DateTimeField(default=get_verification_expiry, db_index=True)
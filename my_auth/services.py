@@ -1,12 +1,14 @@
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
+from django.db.models.functions import Lower
 from django.urls import reverse
-from .models import EmailVerification
+from .models import EmailVerification, get_verification_expiry
 from .tasks import send_verification_email_task, send_new_password_email_task
 from django.core.exceptions import ObjectDoesNotExist
 import random
+import uuid
 import logging
 import string
-from django_celery_beat.models import PeriodicTask, IntervalSchedule, CrontabSchedule
-import json
 
 logger = logging.getLogger(__name__)
 
@@ -24,8 +26,10 @@ class EmailService:
         try:
             # Получаем профиль пользователя
             profile = user.profile
-            # Создаем или получаем токен верификации
-            email_verification, created = EmailVerification.objects.get_or_create(profile=profile)
+            # Выпускаем новый токен верификации: прежняя ссылка перестает действовать
+            email_verification, created = EmailVerification.objects.update_or_create(
+                profile=profile, defaults={'token': uuid.uuid4(), 'expires_at': get_verification_expiry()}
+            )
             # Генерируем ссылку для подтверждения
             verification_link = request.build_absolute_uri(
                 reverse('my_auth:verify_email', args=[email_verification.token])
@@ -48,6 +52,30 @@ class EmailService:
         send_new_password_email_task.delay(user.email, new_password)
 
 
+class UserEmailLookup:
+    """
+    Поиск пользователей по E-mail без учета регистра.
+
+    Условие lower(email) = нормализованный адрес использует индекс
+    auth_user_email_lower_idx (lookup iexact строится через UPPER и его не использует).
+    """
+
+    @staticmethod
+    def normalize(email: str) -> str:
+        return email.strip().lower()
+
+    @staticmethod
+    def filter(email: str) -> QuerySet[User]:
+        """
+        Возвращает пользователей с указанным E-mail.
+        """
+        return User.objects.alias(email_lower=Lower('email')).filter(email_lower=UserEmailLookup.normalize(email))
+
+    @staticmethod
+    def exists(email: str) -> bool:
+        return UserEmailLookup.filter(email).exists()
+
+
 class PasswordGenerator:
     """
     Генератор паролей
@@ -68,44 +96,3 @@ class PasswordGenerator:
 
         return ''.join(password)
 
-
-class TaskScheduler:
-    """
-    Класс создания и применения рассписания на удаление выполненных задач
-    """
-
-    def __init__(self, profile):
-        self.profile = profile
-        self.task_name = f'delete_tasks_{self.profile.user.username}'
-
-    def schedule_deletion_tasks(self):
-        """
-        Создаем расписание
-        """
-
-        # Удаляем старую задачу, если она существует
-        PeriodicTask.objects.filter(name=self.task_name).delete()
-
-        schedule = self.get_schedule()
-        if schedule:
-            PeriodicTask.objects.create(
-                interval=schedule if isinstance(schedule, IntervalSchedule) else None,
-                crontab=schedule if isinstance(schedule, CrontabSchedule) else None,
-                name=self.task_name,
-                task='my_auth.tasks.delete_completed_tasks',
-                args=json.dumps([self.profile.user.id]),  # Передаем user_id в качестве аргумента
-            )
-
-    def get_schedule(self):
-        """
-        Устанавливаем рассписание в зависимости от выбора пользователя
-        """
-
-        schedule_map = {
-            'minute': IntervalSchedule.objects.get_or_create(every=1, period=IntervalSchedule.MINUTES)[0],
-            'hour': IntervalSchedule.objects.get_or_create(every=1, period=IntervalSchedule.HOURS)[0],
-            'day': IntervalSchedule.objects.get_or_create(every=1, period=IntervalSchedule.DAYS)[0],
-            'week': IntervalSchedule.objects.get_or_create(every=7, period=IntervalSchedule.DAYS)[0],
-            'month': CrontabSchedule.objects.get_or_create(minute=0, hour=0, day_of_month=1)[0],
-        }
-        return schedule_map.get(self.profile.delete_frequency)
@@ -1,10 +1,12 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
+from .availability import AvailabilityService
 from .models import Profile
 
 """
-Сигналы на создание и сохранение профиля при регистрации пользователя 
+Сигналы на создание и сохранение профиля при регистрации пользователя
+и на добавление имени и E-mail пользователя в фильтры занятых значений
 """
 
 
@@ -17,3 +19,13 @@ def create_user_profile(sender, instance, created, **kwargs):
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
     instance.profile.save()
+
+
+@receiver(post_save, sender=User)
+def add_user_to_availability_filters(sender, instance, created, update_fields=None, **kwargs):
+    # Сохранения отдельных полей без имени и E-mail (например, last_login при входе) пропускаются;
+    # полное сохранение может менять E-mail, поэтому значения добавляются
+    if not created and update_fields is not None and not {'username', 'email'} & set(update_fields):
+        return
+    # Добавляется сразу, а не после фиксации: при откате останется только лишнее значение
+    AvailabilityService.add_user(instance)
@@ -3,8 +3,15 @@ import logging
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
+from datetime import timedelta
 from decouple import config
-from tasks.models import Task
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from tasks.models import TaskTombstone
+from tasks.purge import CompletedTasksPurger
+from toDo_app.metrics import CELERY_TASK_FAILURES
+from .models import EmailVerification, Profile
 
 """ Задачи Celery  для отправки писем """
 
@@ -32,6 +39,8 @@ def send_verification_email_task(verification_link, user_email):
         )
         logger.info(f'Письмо с подтверждением было отправлено на {user_email}')
     except Exception as e:
+        # Ошибка не пробрасывается, поэтому сигнал task_failure не отправляется
+        CELERY_TASK_FAILURES.labels(task=send_verification_email_task.name).inc()
         logger.error(f'Неудачная попытка отправить письмо пользователю на E-mail: {user_email}: {str(e)}')
 
 
@@ -56,6 +65,7 @@ def send_new_password_email_task(user_email, new_password):
         )
         logger.info(f'Новый пароль был отправлен пользователю на почту {user_email}')
     except Exception as e:
+        CELERY_TASK_FAILURES.labels(task=send_new_password_email_task.name).inc()
         logger.error(f'Неудачная попытка отправки пароля пользователю на почту {user_email}: {str(e)}')
 
 
@@ -67,8 +77,96 @@ def send_new_password_email_task(user_email, new_password):
 @shared_task
 def delete_completed_tasks(user_id):
     try:
-        # Удаляем все выполненные задачи для данного пользователя
-        Task.objects.filter(user_id=user_id, complete=True).delete()
-        logger.info(f'Удалены выполненые задачи у пользователя {user_id}')
+        # Удаляем все выполненные задачи для данного пользователя пачками
+        purger = CompletedTasksPurger()
+        purger.purge([user_id])
+        logger.info(f'Удалены выполненые задачи у пользователя {user_id}: {purger.stats()}')
     except Exception as e:
+        CELERY_TASK_FAILURES.labels(task=delete_completed_tasks.name).inc()
         logger.error(f'Неудачная попытка удаления выполненнх задач у пользователя {user_id}: {str(e)}')
+
+
+"""
+Задача Celery удаления выполненных задач по расписанию.
+
+Для каждой частоты из Profile.delete_frequency в CELERY_BEAT_SCHEDULE есть
+одна периодическая задача. Она выбирает пользователей, у которых удаление
+еще не выполнялось в текущем периоде (по Profile.last_purged_at), и удаляет
+их выполненные задачи группами пользователей и пачками задач.
+"""
+
+# Длительность периода для каждой частоты удаления. Пользователь считается
+# ожидающим удаления, если с прошлого удаления прошло больше половины периода.
+PURGE_PERIODS = {
+    'minute': timedelta(minutes=1),
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1),
+    'month': timedelta(days=28),
+}
+
+
+@shared_task
+def purge_completed_tasks(frequency):
+    now = timezone.now()
+    cutoff = now - PURGE_PERIODS[frequency] / 2
+    due_profiles = (Profile.objects
+                    .filter(delete_frequency=frequency)
+                    .filter(Q(last_purged_at__isnull=True) | Q(last_purged_at__lte=cutoff))
+                    .order_by('user_id'))
+
+    purger = CompletedTasksPurger()
+    users_count = 0
+    last_user_id = 0
+    while True:
+        user_ids = list(due_profiles.filter(user_id__gt=last_user_id)
+                        .values_list('user_id', flat=True)[:settings.TASKS_PURGE_USERS_CHUNK])
+        if not user_ids:
+            break
+        try:
+            purger.purge(user_ids)
+            Profile.objects.filter(user_id__in=user_ids).update(last_purged_at=now)
+            users_count += len(user_ids)
+        except Exception as e:
+            logger.error(f'Неудачная попытка удаления выполненных задач у пользователей '
+                         f'{user_ids[0]}-{user_ids[-1]} ({frequency}): {str(e)}')
+        last_user_id = user_ids[-1]
+
+    logger.info(f'Удаление выполненных задач ({frequency}): пользователей {users_count}, {purger.stats()}')
+
+
+"""
+Задача Celery удаления устаревших записей об удаленных задачах
+"""
+
+
+@shared_task
+def delete_expired_task_tombstones():
+    horizon = timezone.now() - timedelta(days=settings.TASKS_SYNC_TOMBSTONE_DAYS)
+    try:
+        deleted, _ = TaskTombstone.objects.filter(deleted_at__lt=horizon).delete()
+        logger.info(f'Удалено устаревших записей об удаленных задачах: {deleted}')
+    except Exception as e:
+        logger.error(f'Неудачная попытка удаления устаревших записей об удаленных задачах: {str(e)}')
+
+
+"""
+Задача Celery удаления использованных и просроченных токенов подтверждения E-mail
+"""
+
+
+@shared_task
+def delete_expired_email_verifications():
+    now = timezone.now()
+    deleted = 0
+    try:
+        # Пачками по индексу expires_at, чтобы не держать долгую блокировку таблицы
+        while True:
+            ids = list(EmailVerification.objects.filter(expires_at__lte=now)
+                       .values_list('pk', flat=True)[:settings.EMAIL_VERIFICATION_CLEANUP_BATCH])
+            if not ids:
+                break
+            deleted += EmailVerification.objects.filter(pk__in=ids).delete()[0]
+        logger.info(f'Удалено использованных и просроченных токенов подтверждения E-mail: {deleted}')
+    except Exception as e:
+        logger.error(f'Неудачная попытка удаления токенов подтверждения E-mail: {str(e)}')
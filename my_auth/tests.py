@@ -1,15 +1,35 @@
 import json
 import string
+import tempfile
+import threading
 import uuid
+from datetime import timedelta
+from io import StringIO
+from asgiref.sync import async_to_sync
 from decouple import config
-from django.test import TestCase
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
 from django.urls import reverse
-from unittest.mock import patch, MagicMock, call
+from unittest.mock import patch, MagicMock
 from django.contrib import messages
-from django.contrib.auth import get_user_model
+from django.contrib.auth import BACKEND_SESSION_KEY, authenticate, get_user_model
+from django.contrib.auth.backends import BaseBackend
+from django.contrib.auth.models import update_last_login
+from django.contrib.auth.signals import user_login_failed
+from django.core.exceptions import PermissionDenied
+from django.utils import timezone
+from tasks.models import Task, TaskTombstone
+from toDo_app.ratelimit import limiter
+from toDo_app.testing import QueryBudgetMixin
+from .availability import AvailabilityService, BloomFilter, email_filter, username_filter
+from django.contrib.auth.hashers import make_password, verify_password
+from .backends import ProfileModelBackend, aauthenticate, clean_credentials
+from .hashers import run_hashing
 from .models import Profile, EmailVerification
-from .services import EmailService, PasswordGenerator, TaskScheduler
-from .tasks import send_verification_email_task, send_new_password_email_task, delete_completed_tasks
+from .services import EmailService, PasswordGenerator, UserEmailLookup
+from .tasks import (send_verification_email_task, send_new_password_email_task, delete_completed_tasks,
+                    delete_expired_email_verifications, delete_expired_task_tombstones, purge_completed_tasks)
 
 User = get_user_model()
 
@@ -45,6 +65,10 @@ class ProfileModelTests(TestCase):
 
     def test_profile_avatar_upload_path(self):
         from django.core.files.uploadedfile import SimpleUploadedFile
+        # Файл сохраняется во временный каталог, а не в media/ проекта
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
         profile = Profile.objects.get(user=self.user)
         avatar_file = SimpleUploadedFile("test_avatar.jpg", b"file_content", content_type="image/jpeg")
         profile.avatar = avatar_file
@@ -73,6 +97,148 @@ class ProfileModelTests(TestCase):
         self.assertEqual(new_profile.delete_frequency, 'never')
 
 
+class ProfileModelBackendTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.backend = ProfileModelBackend()
+
+    def test_get_user_loads_profile(self):
+        user = self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertFalse(user.profile.email_verified)
+
+    def test_get_user_inactive(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+    def test_get_user_missing(self):
+        self.assertIsNone(self.backend.get_user(0))
+
+    def test_session_of_previous_backend_resolves(self):
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        response = self.client.get(reverse('my_auth:profile', args=[self.user.pk]))
+        self.assertEqual(response.wsgi_request.user, self.user)
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY], 'my_auth.backends.ProfileModelBackend')
+
+    @patch('my_auth.backends.verify_password', wraps=verify_password)
+    def test_failed_login_hashes_once(self, mock_verify):
+        self.assertIsNone(async_to_sync(aauthenticate)(username='testuser', password='wrongpassword'))
+        mock_verify.assert_called_once()
+
+
+class DenyingBackend(BaseBackend):
+    def authenticate(self, request, username=None, password=None):
+        raise PermissionDenied
+
+
+class TokenOnlyBackend(BaseBackend):
+    def authenticate(self, request, token=None):
+        raise AssertionError('Бэкенд не принимает имя пользователя и пароль')
+
+
+class PasswordHashingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+
+    def test_default_hasher_is_tuned_argon2(self):
+        self.assertTrue(self.user.password.startswith('argon2$argon2id$v=19$m=19456,t=2,p=1$'))
+
+    async def test_aauthenticate(self):
+        user = await aauthenticate(username='testuser', password='testpassword')
+        self.assertEqual(user, self.user)
+        self.assertEqual(user.backend, 'my_auth.backends.ProfileModelBackend')
+        self.assertIsNone(await aauthenticate(username='testuser', password='wrongpassword'))
+        self.assertIsNone(await aauthenticate(username='nobody', password='testpassword'))
+
+    async def test_aauthenticate_sends_login_failed(self):
+        received = []
+
+        def receiver(sender, credentials, request, **kwargs):
+            received.append(credentials)
+
+        user_login_failed.connect(receiver)
+        try:
+            self.assertIsNone(await aauthenticate(username='testuser', password='wrongpassword'))
+        finally:
+            user_login_failed.disconnect(receiver)
+        self.assertEqual(received, [{'username': 'testuser', 'password': '********************'}])
+
+    def test_clean_credentials(self):
+        self.assertEqual(clean_credentials({'username': 'testuser', 'api_token': 'secret', 'password': 'secret'}),
+                         {'username': 'testuser', 'api_token': '********************',
+                          'password': '********************'})
+
+    @override_settings(AUTHENTICATION_BACKENDS=['my_auth.tests.DenyingBackend', 'my_auth.backends.ProfileModelBackend'])
+    async def test_aauthenticate_stops_on_permission_denied(self):
+        self.assertIsNone(await aauthenticate(username='testuser', password='testpassword'))
+
+    @override_settings(AUTHENTICATION_BACKENDS=['my_auth.tests.TokenOnlyBackend', 'my_auth.backends.ProfileModelBackend'])
+    async def test_aauthenticate_skips_incompatible_backends(self):
+        user = await aauthenticate(username='testuser', password='testpassword')
+        self.assertEqual(user.backend, 'my_auth.backends.ProfileModelBackend')
+
+    def test_authenticate_loads_profile(self):
+        for user in (async_to_sync(aauthenticate)(username='testuser', password='testpassword'),
+                     ProfileModelBackend().authenticate(None, username='testuser', password='testpassword')):
+            with self.assertNumQueries(0):
+                self.assertFalse(user.profile.email_verified)
+
+    async def test_legacy_hash_upgraded_on_login(self):
+        self.user.password = make_password('testpassword', hasher='pbkdf2_sha256')
+        await self.user.asave()
+
+        self.assertIsNotNone(await aauthenticate(username='testuser', password='testpassword'))
+        await self.user.arefresh_from_db()
+        self.assertTrue(self.user.password.startswith('argon2$'))
+
+    async def test_hash_upgraded_when_parameters_change(self):
+        with override_settings(PASSWORD_ARGON2_TIME_COST=3):
+            self.assertIsNotNone(await aauthenticate(username='testuser', password='testpassword'))
+        await self.user.arefresh_from_db()
+        self.assertIn('t=3', self.user.password)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_password_hashing', '--hashers', 'argon2', '--iterations', '1', '--threads', '1',
+                     stdout=out)
+        self.assertIn('argon2    m=19456', out.getvalue())
+
+    async def test_hashing_runs_in_pool(self):
+        thread = await run_hashing(threading.current_thread)
+        self.assertTrue(thread.name.startswith('password-hashing'))
+
+    def test_authenticate_verifies_in_pool(self):
+        self.user.password = make_password('testpassword', hasher='pbkdf2_sha256')
+        self.user.save()
+        threads = []
+
+        def verify(*args):
+            threads.append(threading.current_thread().name)
+            return verify_password(*args)
+
+        with patch('my_auth.backends.verify_password', side_effect=verify):
+            self.assertEqual(authenticate(username='testuser', password='testpassword'), self.user)
+        self.assertTrue(threads[0].startswith('password-hashing'))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('argon2$'))
+
+
+class ProfileAdminTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(username='admin', password='adminpass')
+        for i in range(5):
+            get_user_model().objects.create_user(username=f'user{i}', password='testpass')
+        self.client.force_login(self.admin)
+
+    def test_changelist_without_repeated_queries(self):
+        url = reverse('admin:my_auth_profile_changelist')
+        # Часть запросов выполняет admin_interface (тема админки)
+        with self.assertQueryBudget(11):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+
 class CustomLoginViewTests(TestCase):
 
     def setUp(self):
@@ -94,6 +260,40 @@ class CustomLoginViewTests(TestCase):
         self.assertEqual(login_error, "Неправильное имя пользователя или пароль.")
 
 
+@override_settings(RATELIMIT_RATES={'login_ip': '20/m', 'login_account': '2/m',
+                                    'password_reset_ip': '2/m', 'password_reset_account': '1/h'})
+class RateLimitedViewsTests(TestCase):
+
+    def setUp(self):
+        limiter.reset()
+        self.addCleanup(limiter.reset)
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+
+    @patch('django.contrib.auth.forms.authenticate', return_value=None)
+    def test_login_rejected_before_authentication(self, mock_authenticate):
+        for _ in range(2):
+            self.client.post(reverse('my_auth:login'), {'username': 'testuser', 'password': 'wrongpassword'})
+
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('my_auth:login'), {'username': 'testuser', 'password': 'testpassword'})
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(int(response['Retry-After']) > 0)
+        self.assertEqual(mock_authenticate.call_count, 2)
+
+    def test_login_form_not_limited(self):
+        for _ in range(3):
+            response = self.client.get(reverse('my_auth:login'))
+        self.assertEqual(response.status_code, 200)
+
+    @patch('my_auth.views.EmailService.send_new_password_email')
+    def test_password_reset_limited_per_ip(self, mock_send_email):
+        self.client.post(reverse('my_auth:password_reset'), {'username': 'testuser'})
+        self.client.post(reverse('my_auth:password_reset'), {'username': 'otheruser'})
+        response = self.client.post(reverse('my_auth:password_reset'), {'username': 'thirduser'})
+        self.assertEqual(response.status_code, 429)
+        mock_send_email.assert_called_once()
+
+
 class RegisterViewTests(TestCase):
 
     @patch('my_auth.services.EmailService.send_verification_email')
@@ -225,6 +425,24 @@ class VerifyEmailViewTests(TestCase):
 
         mock_send_verification_email.assert_not_called()
 
+    def test_verify_email_token_single_use(self):
+        self.client.get(reverse('my_auth:verify_email', kwargs={'token': str(self.token)}))
+        self.client.logout()
+
+        response = self.client.get(reverse('my_auth:verify_email', kwargs={'token': str(self.token)}))
+
+        self.assertTemplateUsed(response, 'verification_failed.html')
+        self.assertLessEqual(EmailVerification.objects.get(token=self.token).expires_at, timezone.now())
+
+    def test_verify_email_expired_token(self):
+        EmailVerification.objects.filter(token=self.token).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        response = self.client.get(reverse('my_auth:verify_email', kwargs={'token': str(self.token)}))
+
+        self.assertTemplateUsed(response, 'verification_failed.html')
+        self.profile.refresh_from_db()
+        self.assertFalse(self.profile.email_verified)
+
 
 class ResendVerificationTokenViewTests(TestCase):
 
@@ -319,6 +537,112 @@ class CheckEmailViewTests(TestCase):
         response = self.client.get(reverse('my_auth:check_email'), {'email': 'nonexistent@example.com'})
         self.assertJSONEqual(response.content, {'exists': False})
 
+    def test_check_email_case_insensitive(self):
+        response = self.client.get(reverse('my_auth:check_email'), {'email': ' Test@Example.COM'})
+        self.assertJSONEqual(response.content, {'exists': True})
+
+    def test_lookup_uses_lower_email_index(self):
+        with self.assertNumQueries(1) as context:
+            UserEmailLookup.exists('TEST@example.com')
+        self.assertIn('LOWER("auth_user"."email")', context.captured_queries[0]['sql'])
+
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, User._meta.db_table)
+        self.assertIn('auth_user_email_lower_idx', constraints)
+
+
+class AvailabilityServiceTests(TestCase):
+
+    def setUp(self):
+        username_filter.reset()
+        email_filter.reset()
+        self.user = User.objects.create_user(username='testuser', email='Test@Example.com', password='testpassword')
+
+    @staticmethod
+    def build_filters():
+        # Без Redis фильтры строятся по БД при первой проверке
+        AvailabilityService.is_username_taken('warmup')
+        AvailabilityService.is_email_taken('warmup@example.com')
+
+    def test_bloom_filter_membership(self):
+        bloom = BloomFilter(1024, 5)
+        bloom.add('testuser')
+        self.assertIn('testuser', bloom)
+        self.assertNotIn('otheruser', bloom)
+        self.assertEqual(len(bloom.data), 128)
+
+    def test_bloom_filter_uses_redis_bit_order(self):
+        bloom = BloomFilter(16, 1)
+        position = bloom.positions('testuser')[0]
+        bloom.add('testuser')
+        restored = BloomFilter(16, 1, bytes(bloom.data).rstrip(b'\x00'))
+        self.assertEqual(restored.data[position // 8], 0x80 >> (position % 8))
+        self.assertIn('testuser', restored)
+
+    def test_free_value_checked_without_queries(self):
+        self.build_filters()
+        with self.assertNumQueries(0):
+            self.assertFalse(AvailabilityService.is_username_taken('nonexistentuser'))
+            self.assertFalse(AvailabilityService.is_email_taken('nonexistent@example.com'))
+
+    def test_probable_match_checked_in_database(self):
+        self.build_filters()
+        with self.assertNumQueries(2):
+            self.assertTrue(AvailabilityService.is_username_taken('testuser'))
+            self.assertTrue(AvailabilityService.is_email_taken(' TEST@example.com'))
+
+    def test_new_user_added_to_built_filter(self):
+        self.build_filters()
+        User.objects.create_user(username='newuser', email='new@example.com', password='testpassword')
+        self.assertTrue(username_filter.might_contain('newuser'))
+        self.assertTrue(AvailabilityService.is_email_taken('NEW@example.com'))
+
+    @patch('my_auth.signals.AvailabilityService.add_user')
+    def test_login_does_not_update_filters(self, mock_add_user):
+        update_last_login(None, self.user)
+        mock_add_user.assert_not_called()
+
+        self.user.email = 'changed@example.com'
+        self.user.save(update_fields=['email'])
+        mock_add_user.assert_called_once_with(self.user)
+
+    @override_settings(AVAILABILITY_REDIS_URL='redis://redis:6379/0')
+    @patch('my_auth.availability.get_redis_client')
+    def test_add_does_not_create_redis_filter(self, mock_get_client):
+        username_filter.add('newuser')
+        args = mock_get_client.return_value.eval.call_args.args
+        self.assertIn("redis.call('EXISTS', KEYS[1], KEYS[2]) < 2", args[0])
+        self.assertEqual(args[1:4], (2, username_filter.key, username_filter.built_key))
+        mock_get_client.return_value.setbit.assert_not_called()
+
+    @override_settings(AVAILABILITY_REDIS_URL='redis://redis:6379/0')
+    @patch('my_auth.availability.get_redis_client')
+    def test_unbuilt_redis_filter_falls_back_to_database(self, mock_get_client):
+        # Ключ без отметки о построении — неполный фильтр
+        mock_get_client.return_value.mget.return_value = [b'\x00' * 8, None]
+        self.assertTrue(username_filter.might_contain('nonexistentuser'))
+        self.assertFalse(AvailabilityService.is_username_taken('nonexistentuser'))
+
+    def test_local_filter_refreshed_from_database(self):
+        self.build_filters()
+        # Пользователь, зарегистрированный другим процессом, не попадает в копию этого процесса
+        User.objects.bulk_create([User(username='otherprocess', email='other@example.com')])
+        self.assertFalse(username_filter.might_contain('otherprocess'))
+
+        with override_settings(AVAILABILITY_REFRESH_SECONDS=0):
+            self.assertTrue(username_filter.might_contain('otherprocess'))
+
+    def test_rebuild_command(self):
+        self.build_filters()
+        User.objects.bulk_create([User(username='bulkuser', email='bulk@example.com')])
+        self.assertFalse(username_filter.might_contain('bulkuser'))
+
+        out = StringIO()
+        call_command('rebuild_availability_filter', stdout=out)
+        self.assertIn('auth:availability:username', out.getvalue())
+        self.assertTrue(AvailabilityService.is_username_taken('bulkuser'))
+        self.assertTrue(AvailabilityService.is_email_taken('bulk@example.com'))
+
 
 class PasswordResetViewTests(TestCase):
 
@@ -446,34 +770,72 @@ class EmailTasksTests(TestCase):
 
 class DeleteCompletedTasksTests(TestCase):
 
-    @patch('tasks.models.Task.objects.filter')
-    def test_delete_completed_tasks(self, mock_filter):
-        user_id = 1
-        mock_filter.return_value.delete.return_value = None  # Эмулируем успешное удаление
+    def test_delete_completed_tasks(self):
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        Task.objects.create(user=user, name='Completed', complete=True)
+        open_task = Task.objects.create(user=user, name='Open')
+
+        delete_completed_tasks(user.id)
+
+        self.assertEqual(list(Task.objects.filter(user=user)), [open_task])
+
+
+class DeleteExpiredTaskTombstonesTests(TestCase):
+
+    def test_delete_expired_task_tombstones(self):
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        expired = TaskTombstone.objects.create(user=user, task_id=1)
+        TaskTombstone.objects.filter(pk=expired.pk).update(deleted_at=timezone.now() - timedelta(days=365))
+        fresh = TaskTombstone.objects.create(user=user, task_id=2)
+
+        delete_expired_task_tombstones()
+
+        self.assertEqual(list(TaskTombstone.objects.values_list('pk', flat=True)), [fresh.pk])
+
 
-        delete_completed_tasks(user_id)
+class DeleteExpiredEmailVerificationsTests(TestCase):
 
-        mock_filter.assert_called_once_with(user_id=user_id, complete=True)
-        mock_filter.return_value.delete.assert_called_once()
+    @override_settings(EMAIL_VERIFICATION_CLEANUP_BATCH=2)
+    def test_delete_expired_email_verifications(self):
+        profiles = [User.objects.create_user(username=f'user{i}', password='testpass').profile for i in range(4)]
+        for profile in profiles[:3]:
+            EmailVerification.objects.create(profile=profile, expires_at=timezone.now() - timedelta(seconds=1))
+        active = EmailVerification.objects.create(profile=profiles[3])
+
+        delete_expired_email_verifications()
+
+        self.assertEqual(list(EmailVerification.objects.values_list('pk', flat=True)), [active.pk])
 
 
 class EmailServiceTests(TestCase):
 
     @patch('my_auth.services.send_verification_email_task.delay')
-    @patch('my_auth.services.EmailVerification.objects.get_or_create')
-    def test_send_verification_email(self, mock_get_or_create, mock_send_verification_email_task):
+    @patch('my_auth.services.EmailVerification.objects.update_or_create')
+    def test_send_verification_email(self, mock_update_or_create, mock_send_verification_email_task):
         user = User.objects.create_user(username='testuser', email='test@example.com', password='testpassword')
         profile, created = Profile.objects.get_or_create(user=user)
 
-        mock_get_or_create.return_value = (EmailVerification(profile=profile), True)
+        mock_update_or_create.return_value = (EmailVerification(profile=profile), True)
         request = MagicMock()
         request.build_absolute_uri.return_value = 'http://example.com/verify?token=123'
 
         EmailService.send_verification_email(request, user)
 
-        mock_get_or_create.assert_called_once_with(profile=profile)
+        mock_update_or_create.assert_called_once()
+        self.assertEqual(mock_update_or_create.call_args.kwargs['profile'], profile)
         mock_send_verification_email_task.assert_called_once_with('http://example.com/verify?token=123', user.email)
 
+    @patch('my_auth.services.send_verification_email_task.delay')
+    def test_resend_issues_new_token(self, mock_send_verification_email_task):
+        user = User.objects.create_user(username='testuser', email='test@example.com', password='testpassword')
+        old = EmailVerification.objects.create(profile=user.profile, expires_at=timezone.now())
+
+        EmailService.send_verification_email(MagicMock(), user)
+
+        verification = EmailVerification.objects.get(profile=user.profile)
+        self.assertNotEqual(verification.token, old.token)
+        self.assertGreater(verification.expires_at, timezone.now())
+
     @patch('my_auth.services.send_new_password_email_task.delay')
     def test_send_new_password_email(self, mock_send_new_password_email_task):
         user = User.objects.create_user(username='testuser', email='test@example.com', password='testpassword')
@@ -497,40 +859,42 @@ class PasswordGeneratorTests(TestCase):
         self.assertTrue(any(c in string.punctuation for c in password))
 
 
-class TaskSchedulerTests(TestCase):
-
-    @patch('my_auth.services.PeriodicTask.objects.create')
-    @patch('my_auth.services.PeriodicTask.objects.filter')
-    @patch('my_auth.services.IntervalSchedule.objects.get_or_create')
-    def test_schedule_deletion_tasks(self, mock_get_or_create, mock_filter, mock_create):
-        user = User.objects.create_user(username='testuser', email='test@example.com', password='testpassword')
-        profile, created = Profile.objects.get_or_create(user=user)
-        profile.delete_frequency = 'hour'
-        profile.save()
-        scheduler = TaskScheduler(profile)
-
-        mock_get_or_create.return_value = (MagicMock(), True)
-
-        scheduler.schedule_deletion_tasks()
-
-        mock_filter.assert_called_once_with(name=scheduler.task_name)
-        mock_create.assert_called_once()
-        self.assertEqual(mock_create.call_args[1]['args'], json.dumps([profile.user.id]))
-
-    @patch('my_auth.services.IntervalSchedule.objects.get_or_create')
-    def test_get_schedule(self, mock_get_or_create):
-        user = User.objects.create_user(username='testuser', email='test@example.com', password='testpassword')
-        profile, created = Profile.objects.get_or_create(user=user)
-        profile.delete_frequency = 'hours'
-        profile.save()
-        scheduler = TaskScheduler(profile)
+class PurgeCompletedTasksTests(TestCase):
 
-        scheduler.get_schedule()
-
-        expected_calls = [
-            call(every=1, period='minutes'),
-            call(every=1, period='hours'),
-            call(every=1, period='days'),
-            call(every=7, period='days'),
-        ]
-        mock_get_or_create.assert_has_calls(expected_calls, any_order=True)
+    def setUp(self):
+        self.minute_user = User.objects.create_user(username='minuteuser', password='testpassword')
+        self.minute_user.profile.delete_frequency = 'minute'
+        self.minute_user.profile.save()
+        self.never_user = User.objects.create_user(username='neveruser', password='testpassword')
+        for user in (self.minute_user, self.never_user):
+            Task.objects.create(user=user, name='Completed', complete=True)
+            Task.objects.create(user=user, name='Open')
+
+    def test_purge_due_users(self):
+        purge_completed_tasks('minute')
+
+        self.assertFalse(Task.objects.filter(user=self.minute_user, complete=True).exists())
+        self.assertTrue(Task.objects.filter(user=self.minute_user, complete=False).exists())
+        self.assertEqual(Task.objects.filter(user=self.never_user).count(), 2)
+        self.assertTrue(TaskTombstone.objects.filter(user=self.minute_user).exists())
+        self.minute_user.profile.refresh_from_db()
+        self.assertIsNotNone(self.minute_user.profile.last_purged_at)
+
+    def test_skip_recently_purged_users(self):
+        Profile.objects.filter(user=self.minute_user).update(last_purged_at=timezone.now())
+
+        purge_completed_tasks('minute')
+
+        self.assertTrue(Task.objects.filter(user=self.minute_user, complete=True).exists())
+
+    @override_settings(TASKS_PURGE_USERS_CHUNK=1, TASKS_PURGE_BATCH_SIZE=1, TASKS_PURGE_BATCH_PAUSE=0)
+    def test_purge_in_chunks(self):
+        second_user = User.objects.create_user(username='seconduser', password='testpassword')
+        second_user.profile.delete_frequency = 'minute'
+        second_user.profile.save()
+        Task.objects.create(user=second_user, name='Completed 1', complete=True)
+        Task.objects.create(user=second_user, name='Completed 2', complete=True)
+
+        purge_completed_tasks('minute')
+
+        self.assertFalse(Task.objects.filter(user__in=[self.minute_user, second_user], complete=True).exists())
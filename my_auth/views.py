@@ -2,10 +2,11 @@ from django.shortcuts import get_object_or_404
 from django.contrib.auth import update_session_auth_hash
 from django.shortcuts import render, redirect
 from .models import Profile, EmailVerification
-from .services import PasswordGenerator, EmailService, TaskScheduler
+from .availability import AvailabilityService
+from .services import PasswordGenerator, EmailService
 import json
 import logging
-from django.utils import translation
+from django.utils import timezone, translation
 from django.utils.translation import gettext as _
 from django.contrib.auth import login
 from django.http import JsonResponse, HttpResponse, HttpResponseRedirect
@@ -20,16 +21,19 @@ from .forms import UserRegistrationForm, ProfileForm, UsernameForm
 from django.utils.decorators import method_decorator
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import PasswordChangeForm
+from toDo_app.ratelimit import ratelimit
 
 logger = logging.getLogger(__name__)
 
 
+@method_decorator(ratelimit('login', 'username'), name='dispatch')
 class CustomLoginView(LoginView):
     """
     Кастомный класс авторизации, который обрабатывает вход пользователей.
 
     Если пользователь уже аутентифицирован, он будет перенаправлен на главную страницу.
     Также добавляет сообщения об успешной регистрации и ошибках входа в контекст.
+    Попытки входа ограничены по IP-адресу и по имени пользователя.
     """
 
     template_name = 'login.html'
@@ -273,21 +277,24 @@ class VerifyEmailView(View):
         Если токен действителен, активирует пользователя и перенаправляет на главную страницу.
         """
 
-        try:
-            verification = EmailVerification.objects.get(token=token)
-            profile = verification.profile
-            profile.email_verified = True  # Устанавливаем статус подтверждения
-            profile.user.is_active = True  # Активируем пользователя
-            profile.user.save()
-            profile.save()
-            verification.delete()  # Удаляем токен после подтверждения
-            login(request, profile.user)  # Вход пользователя
-            logger.info(f'Пользователь {profile.user.username} подтвердил свой E-mail.')
-            return redirect('task:task_view')  # Перенаправление на главную страницу
-        except EmailVerification.DoesNotExist:
-            logger.warning(f'Ошибка подтверждения E-mail: неверный токен.')
+        now = timezone.now()
+        # Токен используется одним запросом по уникальному индексу: повторный
+        # или одновременный переход по ссылке и просроченный токен ничего не обновят
+        used = EmailVerification.objects.filter(token=token, expires_at__gt=now).update(expires_at=now)
+        if not used:
+            logger.warning('Ошибка подтверждения E-mail: неверный или просроченный токен.')
             return render(request, 'verification_failed.html')
 
+        verification = EmailVerification.objects.select_related('profile__user').get(token=token)
+        profile = verification.profile
+        profile.email_verified = True  # Устанавливаем статус подтверждения
+        profile.user.is_active = True  # Активируем пользователя
+        profile.user.save()
+        profile.save()
+        login(request, profile.user)  # Вход пользователя
+        logger.info(f'Пользователь {profile.user.username} подтвердил свой E-mail.')
+        return redirect('task:task_view')  # Перенаправление на главную страницу
+
 
 class ResendVerificationTokenView(View):
     """
@@ -385,7 +392,7 @@ class CheckUsernameView(View):
 
         username = request.GET.get('username', None)
         if username:
-            exists = User.objects.filter(username=username).exists()
+            exists = AvailabilityService.is_username_taken(username)
             return JsonResponse({'exists': exists})
         logger.info(f'Попытка регистрации пользователь {username} cуществует.')
         return JsonResponse({'exists': False})
@@ -406,17 +413,19 @@ class CheckEmailView(View):
 
         email = request.GET.get('email', None)
         if email:
-            exists = User.objects.filter(email=email).exists()
+            exists = AvailabilityService.is_email_taken(email)
             return JsonResponse({'exists': exists})
         logger.info(f'Попытка регистрации пользователь с данной почтой уже существует.')
         return JsonResponse({'exists': False})
 
 
+@method_decorator(ratelimit('password_reset', 'username'), name='dispatch')
 class PasswordResetView(View):
     """
     Класс сброса пароля.
 
     Позволяет пользователю сбросить пароль, отправляя новый пароль на его email.
+    Запросы ограничены по IP-адресу и по имени пользователя.
     """
 
     template_name = 'password_reset.html'
@@ -475,6 +484,8 @@ class UpdateProfileView(LoginRequiredMixin, View):
     Класс обновления профиля пользователя.
 
     Позволяет пользователю обновлять настройки профиля, такие как частота удаления задач.
+    Удаление выполненных задач по выбранной частоте выполняет общая периодическая
+    задача my_auth.tasks.purge_completed_tasks.
     """
 
     def post(self, request) -> JsonResponse:
@@ -489,10 +500,7 @@ class UpdateProfileView(LoginRequiredMixin, View):
 
             if 'delete_frequency' in data and data['delete_frequency']:
                 profile.delete_frequency = data['delete_frequency']
-                profile.save()
-
-                scheduler = TaskScheduler(profile)
-                scheduler.schedule_deletion_tasks()
+                profile.save(update_fields=['delete_frequency'])
                 message_confirm = _('Частота удаления задач успешно обновлена!')
 
                 return JsonResponse({'status': 'success', 'message': message_confirm})
@@ -69,9 +69,6 @@ dateDisplay.textContent = currentDate.toLocaleDateString('ru-RU', {
     day: 'numeric'
 });
 
-// Инициализация счетчика невыполненных задач
-updateIncompleteCount();
-
 // Обработчики событий
 addTaskButton.addEventListener('click', showModal);
 closeModal.addEventListener('click', hideModal);
@@ -81,6 +78,21 @@ taskList.addEventListener('change', handleTaskChange);
 taskList.addEventListener('click', handleDeleteTask);
 completedList.addEventListener('click', handleDeleteTask);
 
+// Подгрузка задач порциями: по кнопке и автоматически, когда кнопка попадает в область видимости
+document.querySelectorAll('.load-more-tasks').forEach(button => {
+    button.addEventListener('click', () => loadMoreTasks(button));
+});
+if ('IntersectionObserver' in window) {
+    const loadMoreObserver = new IntersectionObserver(entries => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                loadMoreTasks(entry.target);
+            }
+        });
+    });
+    document.querySelectorAll('.load-more-tasks').forEach(button => loadMoreObserver.observe(button));
+}
+
 // Обработчики для настроек
 settingsButton.addEventListener('click', showSettingsModal);
 closeSettingsModal.addEventListener('click', hideSettingsModal);
@@ -172,7 +184,7 @@ function addTask(event) {
                 taskInput.value = '';
                 taskDescription.value = '';
                 hideModal();
-                updateIncompleteCount();
+                changeIncompleteCount(1);
             } else {
                 alert('Ошибка добавления задачи: ' + data.error);
             }
@@ -215,10 +227,45 @@ function createTaskElement(taskId, taskName, taskDescriptionText) {
     return taskItem;
 }
 
-function updateIncompleteCount() {
-    const checkboxes = taskList.querySelectorAll('input[type="checkbox"]');
-    const completedCount = Array.from(checkboxes).filter(checkbox => checkbox.checked).length;
-    incompleteCount.textContent = checkboxes.length - completedCount; // Обновляем текст счетчика
+// Счетчик невыполненных задач приходит с сервера: на странице есть не все задачи
+function changeIncompleteCount(delta) {
+    incompleteCount.textContent = Math.max(0, Number(incompleteCount.textContent) + delta);
+}
+
+// Загружает следующую порцию задач в список, указанный в data-target кнопки
+function loadMoreTasks(button) {
+    if (button.disabled || (button.dataset.loaded === 'true' && !button.dataset.cursor)) {
+        return;
+    }
+    const list = document.getElementById(button.dataset.target);
+    const params = new URLSearchParams({complete: button.dataset.complete});
+    if (button.dataset.cursor) {
+        params.set('cursor', button.dataset.cursor);
+    }
+
+    button.disabled = true;
+    fetch(`${button.dataset.url}?${params}`, {
+        headers: {'X-Requested-With': 'XMLHttpRequest'}
+    })
+        .then(handleResponse)
+        .then(data => {
+            const template = document.createElement('template');
+            template.innerHTML = data.html;
+            // Пропускаем задачи, которые уже есть на странице (добавлены или перемещены после загрузки)
+            template.content.querySelectorAll('[data-task-id]').forEach(item => {
+                if (!document.querySelector(`[data-task-id="${item.dataset.taskId}"]`)) {
+                    list.appendChild(item);
+                }
+            });
+            button.dataset.cursor = data.next || '';
+            button.dataset.loaded = 'true';
+            button.style.display = data.next ? '' : 'none';
+            button.disabled = false;
+        })
+        .catch(error => {
+            button.disabled = false;
+            handleError(error);
+        });
 }
 
 function handleTaskChange(event) {
@@ -240,10 +287,11 @@ function handleTaskChange(event) {
                 if (data.success) {
                     if (event.target.checked) {
                         moveToCompletedList(taskItem, taskId);
+                        changeIncompleteCount(-1);
                     } else {
                         moveToTaskList(taskItem, taskId);
+                        changeIncompleteCount(1);
                     }
-                    updateIncompleteCount();
                 } else {
                     alert('Ошибка обновления задачи: ' + data.error);
                 }
@@ -292,8 +340,10 @@ function handleDeleteTask(event) {
             .then(handleResponse)
             .then(data => {
                 if (data.success) {
+                    if (taskItem.classList.contains('task-item')) {
+                        changeIncompleteCount(-1);
+                    }
                     taskItem.remove();
-                    updateIncompleteCount();
                 } else {
                     alert('Ошибка удаления задачи: ' + data.error);
                 }
@@ -302,6 +352,81 @@ function handleDeleteTask(event) {
     }
 }
 
+// Живые обновления: изменения задач из других вкладок и устройств приходят через Server-Sent Events
+const tasksMain = document.querySelector('main[data-events-url]');
+if (tasksMain && 'EventSource' in window) {
+    let tasksVersion = tasksMain.dataset.tasksVersion;
+    const taskEvents = new EventSource(tasksMain.dataset.eventsUrl);
+    taskEvents.addEventListener('tasks', event => {
+        const data = JSON.parse(event.data);
+        // Страница уже построена по этой версии задач
+        if (data.version === tasksVersion) {
+            return;
+        }
+        tasksVersion = data.version;
+        applyTaskEvent(data);
+    });
+}
+
+// Событие содержит только идентификаторы: данные задач и счетчик запрашиваются у сервера
+function applyTaskEvent(data) {
+    // Слишком большое изменение (удаление выполненных задач) приходит без идентификаторов
+    if (data.resync) {
+        window.location.reload();
+        return;
+    }
+
+    data.deleted.forEach(taskId => {
+        const item = document.querySelector(`[data-task-id="${taskId}"]`);
+        if (item) {
+            item.remove();
+        }
+    });
+
+    const params = new URLSearchParams({ids: data.saved.join(',')});
+    fetch(`${tasksMain.dataset.syncUrl}?${params}`, {
+        headers: {'X-Requested-With': 'XMLHttpRequest'}
+    })
+        .then(handleResponse)
+        .then(result => applySavedTasks(result.tasks, result.incomplete_count))
+        .catch(error => console.error('Ошибка:', error));
+}
+
+function applySavedTasks(tasks, count) {
+    // Выполненные задачи добавляются, только если их список уже загружался
+    const completedLoaded = document.getElementById('completedListMore').dataset.loaded === 'true';
+    tasks.forEach(task => {
+        const existing = document.querySelector(`[data-task-id="${task.id}"]`);
+        const item = buildTaskItem(task);
+        if (existing && existing.className === item.className) {
+            existing.replaceWith(item);
+            return;
+        }
+        if (existing) {
+            existing.remove();
+        }
+        if (!task.complete) {
+            taskList.appendChild(item);
+        } else if (completedLoaded) {
+            completedList.appendChild(item);
+        }
+    });
+
+    incompleteCount.textContent = count;
+}
+
+function buildTaskItem(task) {
+    const openItem = createTaskElement(task.id, '', '');
+    const item = task.complete ? createCompletedElement(task.id, openItem) : openItem;
+    const [nameElement, descriptionElement] = task.complete
+        ? item.querySelectorAll('.completed-label')
+        : [item.querySelector('label'), item.querySelector('.task-details span')];
+    // Текст задач вставляется через textContent, а не как HTML
+    nameElement.textContent = task.name;
+    descriptionElement.textContent = task.description;
+    return item;
+}
+
 // Функция для получения CSRF-токена
 function getCookie(name) {
     let cookieValue = null;
@@ -318,42 +443,6 @@ function getCookie(name) {
     return cookieValue;
 }
 
-// Примените обработчик к задачам, загружаемым из базы данных
-document.querySelectorAll('.task-item').forEach(taskItem => {
-    const taskId = taskItem.getAttribute('data-task-id');
-    addDeleteTaskHandler(taskItem, taskId);
-});
-
-// Примените обработчик к выполненным задачам
-document.querySelectorAll('.completed-item').forEach(completedItem => {
-    const taskId = completedItem.getAttribute('data-task-id');
-    addDeleteTaskHandler(completedItem, taskId);
-});
-
-// Функция для добавления обработчика удаления задачи
-function addDeleteTaskHandler(taskItem, taskId) {
-    const deleteButton = taskItem.querySelector('.delete-task');
-    deleteButton.addEventListener('click', function () {
-        fetch(`/delete-task/${taskId}/`, {
-            method: 'DELETE',
-            headers: {
-                'Content-Type': 'application/json',
-                'X-CSRFToken': getCookie('csrftoken')
-            }
-        })
-            .then(handleResponse)
-            .then(data => {
-                if (data.success) {
-                    taskItem.remove();
-                    updateIncompleteCount();
-                } else {
-                    alert('Ошибка удаления задачи: ' + data.error);
-                }
-            })
-            .catch(handleError);
-    });
-}
-
 // Функция для сохранения настроек
 function saveSettings(event) {
     event.preventDefault();
@@ -0,0 +1,114 @@
+"""
+Пакетные операции над задачами пользователя.
+
+Операции выполняются набором SQL-запросов на весь пакет без загрузки
+объектов и без сигналов моделей, поэтому сами записывают сведения об
+удаленных задачах, меняют версию коллекции задач пользователя
+и публикуют событие об изменении задач.
+"""
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+from .models import Task, TaskTombstone
+from .events import publish_tasks_changed
+from .versioning import bump_tasks_version
+
+
+def get_owned_task_ids(user_id: int, task_ids) -> set[int]:
+    """
+    Возвращает идентификаторы из task_ids, принадлежащие пользователю.
+
+    :param user_id: Идентификатор пользователя.
+    :param task_ids: Идентификаторы задач из запроса.
+    :return: Множество идентификаторов задач пользователя.
+    """
+
+    return set(Task.objects.filter(user_id=user_id, id__in=set(task_ids)).values_list('id', flat=True))
+
+
+def bulk_create_tasks(user_id: int, items: list[dict]) -> list[Task]:
+    """
+    Создает задачи пользователя одним INSERT.
+
+    :param user_id: Идентификатор пользователя.
+    :param items: Проверенные данные задач (name, description, complete).
+    :return: Созданные задачи с заполненными id.
+    """
+
+    with transaction.atomic():
+        tasks = Task.objects.bulk_create([Task(user_id=user_id, **item) for item in items])
+        transaction.on_commit(lambda: bump_tasks_version(user_id))
+        publish_tasks_changed(user_id, saved_ids=[task.id for task in tasks])
+    return tasks
+
+
+def bulk_update_tasks(user_id: int, changes: dict[int, dict]) -> None:
+    """
+    Обновляет задачи пользователя, группируя одинаковые изменения
+    в один UPDATE ... WHERE id IN (...).
+
+    :param user_id: Идентификатор пользователя.
+    :param changes: Изменения полей по идентификаторам задач пользователя.
+    """
+
+    groups = {}
+    for task_id, fields in changes.items():
+        groups.setdefault(tuple(sorted(fields.items())), []).append(task_id)
+
+    now = timezone.now()
+    with transaction.atomic():
+        for fields, task_ids in groups.items():
+            Task.objects.filter(user_id=user_id, id__in=task_ids).update(updated_at=now, **dict(fields))
+        transaction.on_commit(lambda: bump_tasks_version(user_id))
+        publish_tasks_changed(user_id, saved_ids=changes.keys())
+
+
+def delete_task_rows(task_ids: list[int]) -> int:
+    """
+    Удаляет строки задач одним DELETE ... WHERE id IN (...).
+
+    QuerySet.delete() загружает задачи и отправляет post_delete для каждой,
+    а сигнал записывает сведения об удалении по одной задаче, поэтому
+    запрос выполняется через курсор. Сведения об удаленных задачах, версию
+    коллекции и событие записывает вызывающий код.
+
+    :param task_ids: Идентификаторы задач, выбранные с блокировкой в текущей транзакции.
+    :return: Количество удаленных строк.
+    """
+
+    connection = connections[router.db_for_write(Task)]
+    table = connection.ops.quote_name(Task._meta.db_table)
+    column = connection.ops.quote_name(Task._meta.pk.column)
+    placeholders = ', '.join(['%s'] * len(task_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({placeholders})', task_ids)
+        return cursor.rowcount
+
+
+def bulk_delete_tasks(user_id: int, task_ids) -> list[int]:
+    """
+    Удаляет задачи пользователя одним DELETE без загрузки объектов
+    и записывает сведения об удаленных задачах одним INSERT. Удаляемые
+    строки выбираются с блокировкой внутри транзакции, поэтому сведения
+    записываются только о действительно удаленных задачах.
+
+    :param user_id: Идентификатор пользователя.
+    :param task_ids: Идентификаторы задач из запроса.
+    :return: Идентификаторы удаленных задач пользователя.
+    """
+
+    task_ids = list(task_ids)
+    if not task_ids:
+        return []
+
+    with transaction.atomic():
+        task_ids = list(Task.objects.select_for_update()
+                        .filter(user_id=user_id, id__in=task_ids).order_by('id').values_list('id', flat=True))
+        if not task_ids:
+            return []
+        delete_task_rows(task_ids)
+        TaskTombstone.objects.bulk_create([TaskTombstone(user_id=user_id, task_id=task_id) for task_id in task_ids])
+        transaction.on_commit(lambda: bump_tasks_version(user_id))
+        publish_tasks_changed(user_id, deleted_ids=task_ids)
+    return task_ids
+
@@ -0,0 +1,135 @@
+"""
+События об изменении задач для всех вкладок и устройств пользователя.
+
+После фиксации транзакции изменения публикуются в канал Redis pub/sub
+пользователя, а представление TaskEventsView передает их браузеру
+потоком Server-Sent Events. Событие содержит только версию коллекции
+задач и идентификаторы сохраненных и удаленных задач: публикация не
+обращается к БД, а клиент сам запрашивает данные сохраненных задач
+и количество невыполненных у TaskSyncView. Если идентификаторов больше
+TASKS_EVENTS_MAX_IDS (удаление выполненных задач), вместо них отправляется
+признак resync, и клиент загружает страницу задач заново.
+Без settings.TASKS_EVENTS_REDIS_URL события отключены.
+"""
+
+import functools
+import json
+import logging
+import time
+import redis
+import redis.asyncio
+from django.conf import settings
+from django.db import transaction
+from .versioning import get_tasks_version
+
+logger = logging.getLogger(__name__)
+
+TASK_EVENTS_CHANNEL = 'tasks:events:{user_id}'
+
+# Интервал переподключения EventSource после закрытия потока (мс)
+TASK_EVENTS_RETRY = 3000
+
+
+@functools.lru_cache
+def _get_client(url: str) -> redis.Redis:
+    return redis.Redis.from_url(url)
+
+
+def get_redis_client() -> redis.Redis | None:
+    """
+    Возвращает клиент Redis для событий задач.
+
+    :return: Клиент Redis или None, если события отключены.
+    """
+
+    if not settings.TASKS_EVENTS_REDIS_URL:
+        return None
+    return _get_client(settings.TASKS_EVENTS_REDIS_URL)
+
+
+def publish_tasks_changed(user_id: int, saved_ids=(), deleted_ids=()) -> None:
+    """
+    Публикует событие об изменении задач пользователя после фиксации транзакции.
+
+    :param user_id: Идентификатор пользователя.
+    :param saved_ids: Идентификаторы созданных или измененных задач.
+    :param deleted_ids: Идентификаторы удаленных задач.
+    """
+
+    if get_redis_client() is None:
+        return
+    saved_ids, deleted_ids = list(saved_ids), list(deleted_ids)
+    transaction.on_commit(lambda: _publish(user_id, saved_ids, deleted_ids))
+
+
+def _publish(user_id: int, saved_ids: list[int], deleted_ids: list[int]) -> None:
+    # Версия уже сменена: ее смена регистрируется в on_commit раньше публикации
+    payload = {'version': get_tasks_version(user_id)}
+    if len(saved_ids) + len(deleted_ids) > settings.TASKS_EVENTS_MAX_IDS:
+        payload['resync'] = True
+    else:
+        payload.update(saved=saved_ids, deleted=deleted_ids)
+    try:
+        get_redis_client().publish(TASK_EVENTS_CHANNEL.format(user_id=user_id), json.dumps(payload))
+    except redis.RedisError:
+        # Событие не должно ломать запись задач: клиенты догонят изменения при перезагрузке
+        logger.exception(f'Не удалось опубликовать событие задач пользователя {user_id}')
+
+
+def stream_task_events(user_id: int):
+    """
+    Генератор потока Server-Sent Events с изменениями задач пользователя.
+
+    Во время простоя отправляет комментарии-пинги, чтобы прокси не закрывали
+    соединение, и завершается через settings.TASKS_EVENTS_STREAM_TIMEOUT
+    секунд, после чего браузер переподключается сам.
+
+    :param user_id: Идентификатор пользователя.
+    :return: Генератор строк в формате text/event-stream.
+    """
+
+    pubsub = get_redis_client().pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(TASK_EVENTS_CHANNEL.format(user_id=user_id))
+    deadline = time.monotonic() + settings.TASKS_EVENTS_STREAM_TIMEOUT
+    try:
+        yield f'retry: {TASK_EVENTS_RETRY}\n\n'
+        while time.monotonic() < deadline:
+            message = pubsub.get_message(timeout=settings.TASKS_EVENTS_HEARTBEAT)
+            yield _format_event(message)
+    finally:
+        pubsub.close()
+
+
+async def astream_task_events(user_id: int):
+    """
+    Асинхронный вариант stream_task_events для запуска под ASGI: ожидание
+    событий не занимает поток, поэтому один процесс держит тысячи потоков.
+
+    Клиент Redis создается на время потока, так как соединения asyncio
+    привязаны к циклу событий.
+
+    :param user_id: Идентификатор пользователя.
+    :return: Асинхронный генератор строк в формате text/event-stream.
+    """
+
+    client = redis.asyncio.Redis.from_url(settings.TASKS_EVENTS_REDIS_URL)
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    await pubsub.subscribe(TASK_EVENTS_CHANNEL.format(user_id=user_id))
+    deadline = time.monotonic() + settings.TASKS_EVENTS_STREAM_TIMEOUT
+    try:
+        yield f'retry: {TASK_EVENTS_RETRY}\n\n'
+        while time.monotonic() < deadline:
+            message = await pubsub.get_message(timeout=settings.TASKS_EVENTS_HEARTBEAT)
+            yield _format_event(message)
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
+
+
+def _format_event(message: dict | None) -> str:
+    if message is None:
+        return ': ping\n\n'
+    data = message['data']
+    if isinstance(data, bytes):
+        data = data.decode()
+    return f'event: tasks\ndata: {data}\n\n'
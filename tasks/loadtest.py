@@ -0,0 +1,249 @@
+"""
+Генератор нагрузки на эндпоинты задач (страница задач и API).
+
+Виртуальные пользователи выполняют смесь операций: просмотр списка,
+создание, отметку выполнения и удаление задач. Запросы отправляются
+асинхронно по постоянным HTTP/1.1 соединениям, по одному соединению
+на каждый из concurrency исполнителей. Для каждой операции считаются
+перцентили задержки p50/p95/p99 и ошибки, для всего прогона — пропускная
+способность.
+"""
+
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+OPERATIONS = ('list', 'create', 'toggle', 'delete')
+
+# Смесь операций по умолчанию (веса)
+DEFAULT_MIX = {'list': 60, 'create': 15, 'toggle': 20, 'delete': 5}
+
+API_TARGET = 'api'
+WEB_TARGET = 'web'
+
+
+def parse_mix(value: str) -> dict:
+    """
+    :param value: веса операций вида 'list=60,create=15,toggle=20,delete=5'
+    :return: словарь весов операций
+    """
+    mix = {}
+    for part in value.split(','):
+        operation, _, weight = part.partition('=')
+        operation = operation.strip()
+        if operation not in OPERATIONS:
+            raise ValueError(f'Неизвестная операция: {operation}')
+        mix[operation] = int(weight)
+    if not any(mix.values()):
+        raise ValueError('Нужна хотя бы одна операция с ненулевым весом')
+    return mix
+
+
+def percentile(values: list, percent: float) -> float:
+    """
+    Перцентиль по методу ближайшего ранга.
+
+    :param values: отсортированные значения
+    :param percent: перцентиль от 0 до 100
+    """
+    if not values:
+        return 0.0
+    rank = max(1, -(-len(values) * percent // 100))
+    return values[int(rank) - 1]
+
+
+@dataclass
+class VirtualUser:
+    """
+    Пользователь, от имени которого отправляются запросы.
+
+    Атрибуты:
+        target (str): 'api' (токен) или 'web' (сессия и CSRF-токен).
+        headers (list): Заголовки аутентификации.
+        task_ids (list): Известные идентификаторы задач пользователя.
+    """
+
+    target: str
+    headers: list
+    task_ids: list = field(default_factory=list)
+
+
+@dataclass
+class LoadStats:
+    latencies: dict = field(default_factory=lambda: defaultdict(list))
+    errors: dict = field(default_factory=lambda: defaultdict(int))
+    started: float = 0.0
+    finished: float = 0.0
+
+    def add(self, name: str, latency: float, ok: bool):
+        self.latencies[name].append(latency)
+        if not ok:
+            self.errors[name] += 1
+
+    @property
+    def total(self) -> int:
+        return sum(len(values) for values in self.latencies.values())
+
+    @property
+    def elapsed(self) -> float:
+        return self.finished - self.started
+
+    @property
+    def throughput(self) -> float:
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def rows(self) -> list:
+        """
+        :return: строки отчета: (операция, запросов, ошибок, p50, p95, p99), задержки в мс
+        """
+        rows = []
+        for name in sorted(self.latencies):
+            values = sorted(self.latencies[name])
+            rows.append((name, len(values), self.errors[name],
+                         *(percentile(values, percent) * 1000 for percent in (50, 95, 99))))
+        return rows
+
+
+class HttpClient:
+    """Минимальный клиент HTTP/1.1 с постоянным соединением."""
+
+    def __init__(self, base_url: str):
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.host_header = url.netloc
+        self.reader = self.writer = None
+
+    async def request(self, method: str, target: str, headers=(), body: bytes = b'') -> tuple:
+        """
+        :return: код ответа и тело ответа
+        """
+        lines = [f'{method} {target} HTTP/1.1', f'Host: {self.host_header}', f'Content-Length: {len(body)}',
+                 *(f'{name}: {value}' for name, value in headers)]
+        try:
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+            await self.writer.drain()
+            status, response_headers, content = await self._read_response()
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            await self.close()
+            raise ConnectionError(f'Ошибка соединения при запросе {method} {target}')
+
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, content
+
+    async def _read_response(self) -> tuple:
+        status_line = await self.reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await self.reader.readuntil(b'\r\n')) != b'\r\n':
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if 'content-length' in headers:
+            content = await self.reader.readexactly(int(headers['content-length']))
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while size := int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16):
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readexactly(2)
+            await self.reader.readuntil(b'\r\n')
+            content = b''.join(chunks)
+        else:
+            content = await self.reader.read()
+            headers['connection'] = 'close'
+        return status, headers, content
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+def build_request(user: VirtualUser, operation: str) -> tuple:
+    """
+    Собирает запрос операции для пользователя. Отметка выполнения и удаление
+    без известных задач заменяются созданием задачи.
+
+    :return: операция, метод, путь и тело запроса
+    """
+    if operation in ('toggle', 'delete') and not user.task_ids:
+        operation = 'create'
+
+    if operation == 'list':
+        return operation, 'GET', '/api/v1/tasks/' if user.target == API_TARGET else '/tasks/', None
+    if operation == 'create':
+        body = {'name': f'Нагрузочная задача {random.randrange(10 ** 6)}', 'description': 'Создана load_test'}
+        return operation, 'POST', '/api/v1/tasks/create/' if user.target == API_TARGET else '/add-task/', body
+    if operation == 'toggle':
+        task_id = random.choice(user.task_ids)
+        body = {'complete': random.random() < 0.5}
+        if user.target == API_TARGET:
+            return operation, 'PATCH', f'/api/v1/tasks/{task_id}/', body
+        return operation, 'POST', f'/update-task/{task_id}/', body
+
+    # Задача удаляется из списка сразу, чтобы ее не выбрал другой исполнитель
+    task_id = user.task_ids.pop(random.randrange(len(user.task_ids)))
+    if user.target == API_TARGET:
+        return operation, 'DELETE', f'/api/v1/tasks/{task_id}/delete/', None
+    return operation, 'DELETE', f'/delete-task/{task_id}/', None
+
+
+async def run_worker(client: HttpClient, users: list, mix: dict, stats: LoadStats, deadline: float,
+                     budget: list):
+    operations, weights = zip(*mix.items())
+    while time.perf_counter() < deadline and budget[0] != 0:
+        budget[0] -= 1
+        user = random.choice(users)
+        operation, method, path, body = build_request(user, random.choices(operations, weights)[0])
+        headers = list(user.headers)
+        content = b''
+        if body is not None:
+            content = json.dumps(body).encode()
+            headers.append(('Content-Type', 'application/json'))
+
+        started = time.perf_counter()
+        try:
+            status, response = await client.request(method, path, headers, content)
+        except ConnectionError:
+            status, response = None, b''
+        latency = time.perf_counter() - started
+
+        ok = status is not None and status < 400
+        stats.add(f'{user.target}:{operation}', latency, ok)
+        if ok and operation == 'create':
+            data = json.loads(response)
+            user.task_ids.append(data.get('id') or data.get('task_id'))
+
+
+async def run_load(base_url: str, users: list, mix: dict = None, concurrency: int = 10,
+                   duration: float = 30, requests: int = 0) -> LoadStats:
+    """
+    Запускает нагрузку и собирает статистику.
+
+    :param base_url: адрес приложения, например http://127.0.0.1:8000
+    :param users: виртуальные пользователи
+    :param mix: веса операций
+    :param concurrency: количество одновременных запросов
+    :param duration: длительность прогона (сек.)
+    :param requests: наибольшее количество запросов (0 — без ограничения)
+    """
+    stats = LoadStats()
+    clients = [HttpClient(base_url) for _ in range(concurrency)]
+    budget = [requests or -1]
+    stats.started = time.perf_counter()
+    try:
+        await asyncio.gather(*(run_worker(client, users, mix or DEFAULT_MIX, stats,
+                                          stats.started + duration, budget)
+                               for client in clients))
+    finally:
+        stats.finished = time.perf_counter()
+        for client in clients:
+            await client.close()
+    return stats
@@ -0,0 +1,80 @@
+"""
+Нагрузочный прогон по запущенному приложению.
+
+Использует пользователей, созданных командой seed_load_data: для API —
+их токены, для страницы задач — сессии, созданные напрямую в базе, и
+CSRF-токен в cookie и заголовке. Выводит перцентили задержки по операциям
+и пропускную способность.
+"""
+
+import asyncio
+from importlib import import_module
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.crypto import get_random_string
+from rest_framework.authtoken.models import Token
+from tasks.loadtest import API_TARGET, WEB_TARGET, VirtualUser, parse_mix, run_load
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочный прогон эндпоинтов задач и API с отчетом p50/p95/p99 и пропускной способностью'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Адрес приложения')
+        parser.add_argument('--prefix', default='load', help='Префикс имен пользователей seed_load_data')
+        parser.add_argument('--users', type=int, default=50, help='Количество виртуальных пользователей')
+        parser.add_argument('--target', choices=[API_TARGET, WEB_TARGET, 'mixed'], default='mixed',
+                            help='Эндпоинты: API, страница задач или оба')
+        parser.add_argument('--concurrency', type=int, default=20, help='Количество одновременных запросов')
+        parser.add_argument('--duration', type=float, default=30, help='Длительность прогона (сек.)')
+        parser.add_argument('--requests', type=int, default=0,
+                            help='Наибольшее количество запросов (0 — без ограничения)')
+        parser.add_argument('--mix', default='list=60,create=15,toggle=20,delete=5', help='Веса операций')
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options['mix'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        users = list(User.objects.filter(username__startswith=options['prefix'])
+                     .order_by('id')[:options['users']])
+        if not users:
+            raise CommandError(f'Нет пользователей с префиксом {options["prefix"]}. Запустите seed_load_data.')
+
+        virtual_users = [self.make_virtual_user(user, self.get_target(options['target'], number))
+                         for number, user in enumerate(users)]
+        stats = asyncio.run(run_load(options['url'], virtual_users, mix, options['concurrency'],
+                                     options['duration'], options['requests']))
+
+        self.stdout.write(f'{"Операция":<14}{"Запросов":>10}{"Ошибок":>8}'
+                          f'{"p50, мс":>10}{"p95, мс":>10}{"p99, мс":>10}')
+        for name, count, errors, p50, p95, p99 in stats.rows():
+            self.stdout.write(f'{name:<14}{count:>10}{errors:>8}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}')
+        self.stdout.write(f'Всего: {stats.total} запросов за {stats.elapsed:.1f} с, '
+                          f'{stats.throughput:.1f} запросов/с, ошибок: {sum(stats.errors.values())}')
+
+    @staticmethod
+    def get_target(target: str, number: int) -> str:
+        if target == 'mixed':
+            return API_TARGET if number % 2 == 0 else WEB_TARGET
+        return target
+
+    @staticmethod
+    def make_virtual_user(user: User, target: str) -> VirtualUser:
+        task_ids = list(Task.objects.filter(user=user).values_list('id', flat=True)[:500])
+        if target == API_TARGET:
+            token, _ = Token.objects.get_or_create(user=user)
+            return VirtualUser(target, [('Authorization', f'Token {token.key}')], task_ids)
+
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        csrf_token = get_random_string(32)
+        cookie = f'{settings.SESSION_COOKIE_NAME}={session.session_key}; {settings.CSRF_COOKIE_NAME}={csrf_token}'
+        return VirtualUser(target, [('Cookie', cookie), ('X-CSRFToken', csrf_token)], task_ids)
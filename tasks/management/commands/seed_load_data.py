@@ -0,0 +1,81 @@
+"""
+Заполнение базы данными для нагрузочного тестирования.
+
+Создает пользователей с подтвержденным адресом электронной почты, профилями,
+токенами API и задачами. Все записи создаются через bulk_create пачками,
+сигналы моделей не отправляются,
+поэтому после заполнения фильтры занятых имен и E-mail перестраиваются. Пользователи нумеруются после уже созданных
+с тем же префиксом, поэтому команду можно запускать повторно.
+"""
+
+import random
+import time
+from itertools import islice
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+from my_auth.availability import AvailabilityService
+from my_auth.models import Profile
+from tasks.models import Task
+
+TASK_WORDS = ('Купить', 'Позвонить', 'Написать', 'Проверить', 'Оплатить', 'Подготовить',
+              'отчет', 'письмо', 'продукты', 'счет', 'презентацию', 'встречу')
+
+
+class Command(BaseCommand):
+    help = 'Создает пользователей, профили, токены и задачи для нагрузочного тестирования'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Количество пользователей')
+        parser.add_argument('--tasks', type=int, default=50, help='Количество задач у каждого пользователя')
+        parser.add_argument('--completed', type=float, default=0.3, help='Доля выполненных задач')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Размер пачки bulk_create')
+        parser.add_argument('--prefix', default='load', help='Префикс имен пользователей')
+        parser.add_argument('--password', default='loadtest-password', help='Пароль пользователей')
+        parser.add_argument('--seed', type=int, default=None, help='Начальное значение генератора случайных чисел')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        prefix = options['prefix']
+        batch_size = options['batch_size']
+        password = make_password(options['password'])  # хэш вычисляется один раз для всех пользователей
+        start = User.objects.filter(username__startswith=prefix).count()
+        started = time.perf_counter()
+
+        users_count = tasks_count = 0
+        numbers = iter(range(start, start + options['users']))
+        while chunk := list(islice(numbers, batch_size)):
+            with transaction.atomic():
+                users = User.objects.bulk_create([
+                    User(username=f'{prefix}{number}', email=f'{prefix}{number}@example.com', password=password)
+                    for number in chunk
+                ])
+                Profile.objects.bulk_create([
+                    Profile(user=user, email_verified=True, agreement_accepted=True) for user in users
+                ])
+                Token.objects.bulk_create([Token(user=user, key=Token.generate_key()) for user in users])
+                tasks_count += self.create_tasks(users, options['tasks'], options['completed'], batch_size, rng)
+            users_count += len(users)
+
+        # bulk_create не отправляет post_save, поэтому фильтры занятых имен и E-mail строятся заново
+        AvailabilityService.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {users_count}, задач: {tasks_count} '
+            f'за {time.perf_counter() - started:.1f} с'
+        ))
+
+    def create_tasks(self, users, per_user, completed, batch_size, rng) -> int:
+        tasks = (
+            Task(user=user,
+                 name=f'{rng.choice(TASK_WORDS[:6])} {rng.choice(TASK_WORDS[6:])} #{number}',
+                 description=f'Задача {number} пользователя {user.username}',
+                 complete=rng.random() < completed)
+            for user in users for number in range(per_user)
+        )
+        count = 0
+        while batch := list(islice(tasks, batch_size)):
+            Task.objects.bulk_create(batch)
+            count += len(batch)
+        return count
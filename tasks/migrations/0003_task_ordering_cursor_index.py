@@ -0,0 +1,23 @@
+# Generated by Django 5.1.1 on 2026-10-18 18:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_alter_task_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='task',
+            options={'ordering': ['create_at', 'id'], 'verbose_name': 'Задача', 'verbose_name_plural': 'Задачи'},
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'create_at', 'id'], name='task_user_created_id_idx'),
+        ),
+    ]
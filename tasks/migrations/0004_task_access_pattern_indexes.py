@@ -0,0 +1,42 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+from toDo_app.operations import AddIndexConcurrently, DropFieldIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0003_task_ordering_cursor_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['user', 'complete', 'create_at'], name='task_user_complete_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(condition=models.Q(('complete', True)), fields=['user'],
+                               name='task_user_completed_idx'),
+        ),
+        DropFieldIndexConcurrently(
+            model_name='task',
+            name='complete',
+            field=models.BooleanField(default=False),
+        ),
+        DropFieldIndexConcurrently(
+            model_name='task',
+            name='description',
+            field=models.TextField(blank=True),
+        ),
+        DropFieldIndexConcurrently(
+            model_name='task',
+            name='name',
+            field=models.CharField(max_length=100),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:40
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+from toDo_app.operations import AddIndexConcurrently
+
+# Конфигурации полнотекстового поиска на момент миграции (см. settings.TASKS_SEARCH_CONFIGS)
+SEARCH_CONFIGS = ('russian', 'english')
+BACKFILL_BATCH_SIZE = 10000
+
+
+def search_vector_sql(row: str) -> str:
+    """
+    Выражение tsvector по названию (вес A) и описанию (вес B) для всех конфигураций.
+    """
+
+    parts = []
+    for search_config in SEARCH_CONFIGS:
+        parts.append(f"setweight(to_tsvector('{search_config}', coalesce({row}.name, '')), 'A')")
+        parts.append(f"setweight(to_tsvector('{search_config}', coalesce({row}.description, '')), 'B')")
+    return ' || '.join(parts)
+
+
+def create_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(f"""
+        CREATE OR REPLACE FUNCTION tasks_task_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {search_vector_sql('NEW')};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    schema_editor.execute("""
+        CREATE TRIGGER tasks_task_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF name, description ON tasks_task
+        FOR EACH ROW EXECUTE FUNCTION tasks_task_search_vector_update();
+    """)
+
+    # Заполняем вектор для существующих задач пачками, чтобы не держать долгие блокировки
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT coalesce(max(id), 0) FROM tasks_task')
+        max_id = cursor.fetchone()[0]
+        for start in range(0, max_id, BACKFILL_BATCH_SIZE):
+            cursor.execute(
+                f'UPDATE tasks_task SET search_vector = {search_vector_sql("tasks_task")} '
+                f'WHERE id > %s AND id <= %s',
+                [start, start + BACKFILL_BATCH_SIZE],
+            )
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('DROP TRIGGER IF EXISTS tasks_task_search_vector_trigger ON tasks_task')
+    schema_editor.execute('DROP FUNCTION IF EXISTS tasks_task_search_vector_update()')
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0004_task_access_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+        AddIndexConcurrently(
+            model_name='task',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='task_search_vector_gin'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 
 class Task(models.Model):
@@ -15,23 +17,71 @@ class Task(models.Model):
         name (CharField): Название задачи, максимальная длина 100 символов.
         description (TextField): Описание задачи, может быть пустым.
         create_at (DateTimeField): Время создания задачи, автоматически устанавливается при создании.
+        updated_at (DateTimeField): Время последнего изменения задачи, обновляется при каждом сохранении.
         complete (BooleanField): Статус выполнения задачи (выполнена/не выполнена), по умолчанию False.
+        search_vector (SearchVectorField): Полнотекстовый вектор по названию и описанию задачи
+        для всех языков приложения. Заполняется триггером PostgreSQL при записи.
     """
 
     class Meta:
         """
         verbose_name (str): Человекочитаемое имя модели в единственном числе.
         verbose_name_plural (str): Человекочитаемое имя модели во множественном числе.
+        ordering (list): Стабильный порядок задач: по времени создания, затем по id.
+        indexes (list): Составной индекс (user, create_at, id) для курсорной пагинации,
+        составной индекс (user, complete, create_at) для выборок открытых и выполненных задач
+        и частичный индекс по выполненным задачам для их автоочистки,
+        GIN индекс по search_vector для полнотекстового поиска,
+        составной индекс (user, updated_at) для дельта-синхронизации.
         """
 
         verbose_name = "Задача"
         verbose_name_plural = "Задачи"
+        ordering = ['create_at', 'id']
+        indexes = [
+            models.Index(fields=['user', 'create_at', 'id'], name='task_user_created_id_idx'),
+            models.Index(fields=['user', 'complete', 'create_at'], name='task_user_complete_created_idx'),
+            models.Index(fields=['user'], condition=models.Q(complete=True), name='task_user_completed_idx'),
+            GinIndex(fields=['search_vector'], name='task_search_vector_gin'),
+            models.Index(fields=['user', 'updated_at'], name='task_user_updated_idx'),
+        ]
 
     user = models.ForeignKey(User, on_delete=models.PROTECT)
-    name = models.CharField(max_length=100, db_index=True)
-    description = models.TextField(null=False, blank=True, db_index=True)
+    name = models.CharField(max_length=100)
+    description = models.TextField(null=False, blank=True)
     create_at = models.DateTimeField(auto_now_add=True)
-    complete = models.BooleanField(default=False, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    complete = models.BooleanField(default=False)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self) -> str:
         return self.name
+
+
+class TaskTombstone(models.Model):
+    """
+    Модель удаленной задачи
+
+    Хранит сведения об удаленных задачах, чтобы клиенты при
+    дельта-синхронизации узнавали об удалениях, произошедших
+    после их последней синхронизации.
+
+    Атрибуты:
+        user (ForeignKey): Ссылка на пользователя, которому принадлежала задача.
+        task_id (BigIntegerField): Идентификатор удаленной задачи.
+        deleted_at (DateTimeField): Время удаления задачи.
+    """
+
+    class Meta:
+        verbose_name = "Удаленная задача"
+        verbose_name_plural = "Удаленные задачи"
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+        ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    task_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self) -> str:
+        return str(self.task_id)
@@ -0,0 +1,113 @@
+"""
+Постраничная выдача задач для серверной страницы списка.
+
+Открытые и выполненные задачи выбираются отдельными запросами по индексу
+(user, complete, create_at) и отдаются порциями фиксированного размера.
+Позиция задается курсором по (create_at, id), поэтому стоимость
+каждой порции не зависит от того, сколько задач у пользователя.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.db.models import Q
+from django.utils.functional import cached_property
+from .models import Task
+
+PAGE_CURSOR_SALT = 'tasks.page'
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class InvalidPageCursor(ValueError):
+    """
+    Курсор порции задач поврежден или подделан.
+    """
+
+
+def make_page_cursor(task: Task) -> str:
+    """
+    Создает подписанный курсор, указывающий на позицию после задачи.
+
+    :param task: Последняя задача выданной порции.
+    :return: Непрозрачный курсор.
+    """
+
+    microseconds = (task.create_at - EPOCH) // timedelta(microseconds=1)
+    return signing.dumps([microseconds, task.id], salt=PAGE_CURSOR_SALT)
+
+
+def parse_page_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Восстанавливает позицию из курсора.
+
+    :param cursor: Курсор, выданный make_page_cursor.
+    :return: Кортеж (create_at, id) последней выданной задачи.
+    :raises InvalidPageCursor: Если курсор недействителен.
+    """
+
+    try:
+        microseconds, task_id = signing.loads(cursor, salt=PAGE_CURSOR_SALT)
+        return EPOCH + timedelta(microseconds=int(microseconds)), int(task_id)
+    except (signing.BadSignature, TypeError, ValueError, OverflowError):
+        raise InvalidPageCursor(cursor)
+
+
+def get_task_page(user: User, complete: bool, cursor: str | None = None,
+                  page_size: int | None = None) -> tuple[list[Task], str | None]:
+    """
+    Возвращает порцию открытых или выполненных задач пользователя.
+
+    :param user: Пользователь, задачи которого выбираются.
+    :param complete: True для выполненных задач, False для открытых.
+    :param cursor: Курсор предыдущей порции или None для первой порции.
+    :param page_size: Размер порции, по умолчанию settings.TASKS_PAGE_SIZE.
+    :return: Кортеж (задачи, курсор следующей порции или None).
+    :raises InvalidPageCursor: Если курсор недействителен.
+    """
+
+    page_size = page_size or settings.TASKS_PAGE_SIZE
+    queryset = (
+        Task.objects
+        .filter(user=user, complete=complete)
+        .only('id', 'name', 'description', 'complete', 'create_at')
+        .order_by('create_at', 'id')
+    )
+    if cursor:
+        create_at, task_id = parse_page_cursor(cursor)
+        queryset = queryset.filter(Q(create_at__gt=create_at) | Q(create_at=create_at, id__gt=task_id))
+
+    # Лишняя запись показывает, есть ли следующая порция, без отдельного COUNT
+    tasks = list(queryset[:page_size + 1])
+    if len(tasks) <= page_size:
+        return tasks, None
+    tasks = tasks[:page_size]
+    return tasks, make_page_cursor(tasks[-1])
+
+
+class LazyTaskPage:
+    """
+    Порция задач, которая выбирается из базы только при первом обращении.
+
+    Используется в контексте шаблона: если фрагмент со списком задач
+    взят из кэша, запрос к таблице задач не выполняется.
+    """
+
+    def __init__(self, user: User, complete: bool, cursor: str | None = None):
+        self.user = user
+        self.complete = complete
+        self.cursor = cursor
+
+    @cached_property
+    def _page(self) -> tuple[list[Task], str | None]:
+        return get_task_page(self.user, self.complete, self.cursor)
+
+    @property
+    def next_cursor(self) -> str:
+        return self._page[1] or ''
+
+    def __iter__(self):
+        return iter(self._page[0])
+
+    def __len__(self) -> int:
+        return len(self._page[0])
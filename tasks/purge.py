@@ -0,0 +1,115 @@
+"""
+Потоковое удаление выполненных задач.
+
+Задачи удаляются пачками ограниченного размера по возрастанию id:
+каждая пачка — выборка идентификаторов по частичному индексу выполненных
+задач, затем в отдельной короткой транзакции повторная выборка этих задач,
+которые все еще выполнены, с блокировкой строк, один DELETE по ним и один
+INSERT сведений об удаленных задачах. Задача, которую пользователь успел
+вернуть в работу, не удаляется. Объекты задач не загружаются в память
+и сигналы моделей не отправляются: записи для дельта-синхронизации, смену
+версии коллекции задач и событие об удалении удаление выполняет само после
+фиксации каждой пачки.
+Между пачками делается пауза, чтобы не занимать базу данных надолго.
+"""
+
+import functools
+import logging
+import time
+from django.conf import settings
+from django.db import transaction
+from .models import Task, TaskTombstone
+from .bulk import delete_task_rows
+from .events import publish_tasks_changed
+from .versioning import bump_tasks_version
+
+logger = logging.getLogger(__name__)
+
+
+class CompletedTasksPurger:
+    """
+    Удаление выполненных задач пользователей пачками с паузами.
+
+    Атрибуты:
+        batch_size (int): Максимальное количество задач в одной пачке.
+        pause (float): Пауза между пачками в секундах.
+        batches (int): Количество обработанных пачек.
+        deleted (int): Количество удаленных задач.
+        elapsed (float): Время работы в секундах.
+    """
+
+    def __init__(self, batch_size: int | None = None, pause: float | None = None):
+        self.batch_size = batch_size or settings.TASKS_PURGE_BATCH_SIZE
+        self.pause = settings.TASKS_PURGE_BATCH_PAUSE if pause is None else pause
+        self.batches = 0
+        self.deleted = 0
+        self.elapsed = 0.0
+
+    def purge(self, user_ids) -> int:
+        """
+        Удаляет выполненные задачи пользователей.
+
+        :param user_ids: Идентификаторы пользователей.
+        :return: Количество удаленных задач.
+        """
+
+        started_at = time.monotonic()
+        completed = Task.objects.filter(user_id__in=list(user_ids), complete=True).order_by('id')
+        deleted_before = self.deleted
+        last_id = 0
+
+        while True:
+            task_ids = list(completed.filter(id__gt=last_id).values_list('id', flat=True)[:self.batch_size])
+            if not task_ids:
+                break
+            if self.batches and self.pause:
+                time.sleep(self.pause)
+
+            self.deleted += self.delete_batch(task_ids)
+            self.batches += 1
+            last_id = task_ids[-1]
+            logger.debug(f'Удаление выполненных задач: пачка {self.batches}, удалено {self.deleted}')
+
+        self.elapsed += time.monotonic() - started_at
+        return self.deleted - deleted_before
+
+    @staticmethod
+    def delete_batch(task_ids: list[int]) -> int:
+        """
+        Удаляет пачку задач, которые все еще выполнены, одним DELETE и записывает
+        сведения только об удаленных задачах. После фиксации меняет версию
+        коллекции задач и публикует событие для каждого пользователя пачки.
+
+        :param task_ids: Идентификаторы выполненных задач, выбранные до транзакции.
+        :return: Количество удаленных задач.
+        """
+
+        with transaction.atomic():
+            # Блокировка не дает вернуть задачу в работу между выборкой и DELETE
+            rows = list(Task.objects.select_for_update()
+                        .filter(id__in=task_ids, complete=True).order_by('id').values_list('id', 'user_id'))
+            if not rows:
+                return 0
+            deleted = delete_task_rows([task_id for task_id, _ in rows])
+            TaskTombstone.objects.bulk_create([TaskTombstone(user_id=user_id, task_id=task_id)
+                                               for task_id, user_id in rows])
+
+            deleted_ids = {}
+            for task_id, user_id in rows:
+                deleted_ids.setdefault(user_id, []).append(task_id)
+            for user_id, user_task_ids in deleted_ids.items():
+                transaction.on_commit(functools.partial(bump_tasks_version, user_id))
+                publish_tasks_changed(user_id, deleted_ids=user_task_ids)
+        return deleted
+
+    def stats(self) -> dict:
+        """
+        Возвращает показатели работы удаления.
+
+        :return: Словарь с количеством пачек, удаленных задач, временем работы
+                 и скоростью удаления (задач в секунду).
+        """
+
+        rate = self.deleted / self.elapsed if self.elapsed else 0.0
+        return {'batches': self.batches, 'deleted': self.deleted,
+                'elapsed': round(self.elapsed, 3), 'rate': round(rate, 1)}
@@ -0,0 +1,52 @@
+"""
+Полнотекстовый поиск задач.
+
+В PostgreSQL поиск идет по колонке search_vector (GIN индекс) с
+ранжированием результатов. Вектор содержит лексемы для всех языков
+из settings.TASKS_SEARCH_CONFIGS, а запрос разбирается конфигурацией
+текущего языка пользователя. На других СУБД (SQLite в тестах)
+используется поиск по вхождению подстроки.
+"""
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, Q, QuerySet
+from django.utils import translation
+
+
+def get_search_config(language: str | None = None) -> str:
+    """
+    Возвращает конфигурацию полнотекстового поиска PostgreSQL для языка.
+
+    :param language: Код языка, по умолчанию текущий активный язык.
+    :return: Имя конфигурации, например 'russian'.
+    """
+
+    configs = settings.TASKS_SEARCH_CONFIGS
+    language = (language or translation.get_language() or settings.LANGUAGE_CODE).split('-')[0]
+    return configs.get(language, configs[settings.LANGUAGE_CODE])
+
+
+def search_tasks(queryset: QuerySet, query: str, language: str | None = None) -> QuerySet:
+    """
+    Фильтрует задачи по поисковому запросу и упорядочивает их по релевантности.
+
+    :param queryset: Исходный QuerySet задач (обычно задачи пользователя).
+    :param query: Поисковая строка пользователя.
+    :param language: Код языка запроса, по умолчанию текущий активный язык.
+    :return: QuerySet найденных задач.
+    """
+
+    query = query.strip()
+    if not query:
+        return queryset.none()
+
+    if connections[queryset.db].vendor == 'postgresql':
+        search_query = SearchQuery(query, config=get_search_config(language), search_type='websearch')
+        return (queryset.filter(search_vector=search_query)
+                .annotate(rank=SearchRank(F('search_vector'), search_query))
+                .order_by('-rank', '-id'))
+
+    return (queryset.filter(Q(name__icontains=query) | Q(description__icontains=query))
+            .order_by('-id'))
@@ -0,0 +1,26 @@
+"""
+Сигналы на изменение и удаление задач: сохранение сведений об удаленной
+задаче для дельта-синхронизации и смена версии коллекции задач пользователя.
+Версия меняется после фиксации транзакции, чтобы новая версия никогда
+не соответствовала еще не зафиксированным данным.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Task, TaskTombstone
+from .events import publish_tasks_changed
+from .versioning import bump_tasks_version
+
+
+@receiver(post_save, sender=Task)
+def bump_version_on_save(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_tasks_version(instance.user_id))
+    publish_tasks_changed(instance.user_id, saved_ids=[instance.pk])
+
+
+@receiver(post_delete, sender=Task)
+def create_task_tombstone(sender, instance, **kwargs):
+    TaskTombstone.objects.create(user_id=instance.user_id, task_id=instance.pk)
+    transaction.on_commit(lambda: bump_tasks_version(instance.user_id))
+    publish_tasks_changed(instance.user_id, deleted_ids=[instance.pk])
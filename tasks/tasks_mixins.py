@@ -1,6 +1,10 @@
+import asyncio
+from asgiref.sync import sync_to_async
 from django.http import HttpResponse
 from django.shortcuts import render
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.models import User
+from my_auth.models import Profile
 import logging
 
 logger = logging.getLogger(__name__)
@@ -27,14 +31,64 @@ class EmailVerifiedMixin(LoginRequiredMixin):
                  для дальнейшей обработки запроса.
         """
 
+        if self.view_is_async:
+            return self.adispatch(request, *args, **kwargs)
+
         if request.user.is_authenticated:
             # Проверяем, подтверждена ли электронная почта
-            if not request.user.profile.email_verified:
+            if not self.is_email_verified(request.user):
                 logger.warning(f'Пользователь {request.user.id} пытается получить доступ без потвержденной почты.')
                 # Если не подтверждена, рендерим страницу с сообщением
                 return self.handle_email_not_verified(request)
         return super().dispatch(request, *args, **kwargs)
 
+    async def adispatch(self, request, *args, **kwargs) -> HttpResponse:
+        """
+        Асинхронный вариант dispatch для представлений с async-обработчиками.
+
+        Пользователь загружается через request.auser() и подставляется
+        в request.user, а профиль, если бэкенд не загрузил его вместе
+        с пользователем, — через асинхронный ORM, чтобы проверки
+        не обращались к базе данных синхронно.
+
+        :param request: HTTP запрос.
+        :return: HttpResponse с перенаправлением на страницу
+                 подтверждения электронной почты или ответом
+                 для дальнейшей обработки запроса.
+        """
+
+        request.user = await request.auser()
+        if request.user.is_authenticated and not await self.ais_email_verified(request.user):
+            logger.warning(f'Пользователь {request.user.id} пытается получить доступ без потвержденной почты.')
+            return await sync_to_async(self.handle_email_not_verified)(request)
+
+        response = super().dispatch(request, *args, **kwargs)
+        if asyncio.iscoroutine(response):
+            response = await response
+        return response
+
+    @staticmethod
+    def is_email_verified(user) -> bool:
+        """
+        :return: True, если E-mail пользователя подтвержден; False и для пользователя без профиля.
+        """
+
+        profile = getattr(user, 'profile', None)
+        return profile is not None and profile.email_verified
+
+    @staticmethod
+    async def ais_email_verified(user) -> bool:
+        """
+        Асинхронный вариант is_email_verified.
+        """
+
+        if User.profile.is_cached(user):
+            return EmailVerifiedMixin.is_email_verified(user)
+        profile = await Profile.objects.filter(user_id=user.pk).afirst()
+        if profile is not None:
+            user.profile = profile
+        return profile is not None and profile.email_verified
+
     def handle_email_not_verified(self, request) -> HttpResponse:
         """
         Отображает страницу с сообщением о необходимости
@@ -1,9 +1,24 @@
-from django.test import TestCase, Client
+from django.core.cache import cache
+from io import StringIO
+from django.core.management import call_command
+from django.test import LiveServerTestCase, TestCase, Client, override_settings
 from django.contrib.auth.models import User
 from django.urls import reverse
-from .models import Task
+from django.utils import timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+from .bulk import bulk_delete_tasks
+from .loadtest import parse_mix, percentile
+from .events import astream_task_events, publish_tasks_changed, stream_task_events
+from .models import Task, TaskTombstone
+from .paging import InvalidPageCursor, get_task_page
+from .purge import CompletedTasksPurger
+from .search import get_search_config
+from .tasks_mixins import EmailVerifiedMixin
+from .versioning import get_tasks_version
 from my_auth.models import Profile
+from rest_framework.authtoken.models import Token
 import json
+from itertools import islice
 
 
 class TaskModelTests(TestCase):
@@ -30,8 +45,297 @@ class TaskModelTests(TestCase):
         self.assertEqual(str(task), 'Test Task')
 
 
+class CompletedTasksPurgerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.other_user = User.objects.create_user(username='otheruser', password='testpass')
+        for i in range(5):
+            Task.objects.create(user=self.user, name=f'Completed {i}', complete=True)
+        Task.objects.create(user=self.user, name='Open')
+        Task.objects.create(user=self.other_user, name='Other completed', complete=True)
+
+    @patch('tasks.purge.time.sleep')
+    def test_purge_in_batches_with_pause(self, mock_sleep):
+        purger = CompletedTasksPurger(batch_size=2, pause=0.5)
+
+        deleted = purger.purge([self.user.id])
+
+        self.assertEqual(deleted, 5)
+        self.assertEqual(purger.stats()['batches'], 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+        mock_sleep.assert_called_with(0.5)
+        self.assertEqual(list(Task.objects.filter(user=self.user).values_list('name', flat=True)), ['Open'])
+        self.assertTrue(Task.objects.filter(user=self.other_user).exists())
+        self.assertEqual(TaskTombstone.objects.filter(user=self.user).count(), 5)
+
+    def test_purge_batch_query_count(self):
+        purger = CompletedTasksPurger(batch_size=10, pause=0)
+        # Выборка пачки, повторная выборка с блокировкой, DELETE, INSERT сведений
+        # об удалении, пустая выборка и точки сохранения транзакции пачки
+        with self.assertNumQueries(7):
+            purger.purge([self.user.id])
+
+    def test_task_reopened_after_selection_is_kept(self):
+        task_ids = list(Task.objects.filter(user=self.user, complete=True).values_list('id', flat=True))
+        Task.objects.filter(pk=task_ids[0]).update(complete=False)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            deleted = CompletedTasksPurger.delete_batch(task_ids)
+
+        self.assertEqual(deleted, 4)
+        self.assertTrue(Task.objects.filter(pk=task_ids[0]).exists())
+        self.assertFalse(TaskTombstone.objects.filter(task_id=task_ids[0]).exists())
+        self.assertEqual(TaskTombstone.objects.filter(user=self.user).count(), 4)
+
+
+class BulkDeleteTasksTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.other_user = User.objects.create_user(username='otheruser', password='testpass')
+
+    def test_tombstones_only_for_deleted_tasks(self):
+        own = Task.objects.create(user=self.user, name='Own')
+        foreign = Task.objects.create(user=self.other_user, name='Foreign')
+
+        deleted_ids = bulk_delete_tasks(self.user.id, [own.id, foreign.id, 0])
+
+        self.assertEqual(deleted_ids, [own.id])
+        self.assertEqual(list(TaskTombstone.objects.values_list('user_id', 'task_id')), [(self.user.id, own.id)])
+        self.assertTrue(Task.objects.filter(pk=foreign.pk).exists())
+
+
+class TaskPageTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.other_user = User.objects.create_user(username='otheruser', password='testpass')
+        created = timezone.now()
+        # Одинаковое время создания проверяет, что курсор учитывает id
+        for i in range(5):
+            Task.objects.filter(pk=Task.objects.create(user=self.user, name=f'Task {i}').pk).update(create_at=created)
+        Task.objects.create(user=self.other_user, name='Other task')
+
+    def test_pages_cover_all_tasks_once(self):
+        names, cursor = [], None
+        while True:
+            tasks, cursor = get_task_page(self.user, complete=False, cursor=cursor, page_size=2)
+            names.extend(task.name for task in tasks)
+            if cursor is None:
+                break
+        self.assertEqual(names, [f'Task {i}' for i in range(5)])
+
+    def test_page_query_count_does_not_depend_on_task_count(self):
+        with self.assertNumQueries(1):
+            get_task_page(self.user, complete=False, page_size=2)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidPageCursor):
+            get_task_page(self.user, complete=False, cursor='invalid')
+
+
+class TaskEventsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.profile = Profile.objects.get(user=self.user)
+        self.profile.email_verified = True
+        self.profile.save()
+
+    @patch('tasks.events.get_redis_client')
+    def test_publish_after_commit(self, mock_get_client):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(user=self.user, name='Task 1')
+            mock_get_client.return_value.publish.assert_not_called()
+
+        channel, message = mock_get_client.return_value.publish.call_args.args
+        self.assertEqual(channel, f'tasks:events:{self.user.id}')
+        self.assertEqual(json.loads(message), {
+            'version': get_tasks_version(self.user.id),
+            'saved': [task.id],
+            'deleted': [],
+        })
+
+    @patch('tasks.events.get_redis_client')
+    def test_publish_bulk_delete(self, mock_get_client):
+        task = Task.objects.create(user=self.user, name='Task 1')
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_delete_tasks(self.user.id, [task.id])
+
+        message = json.loads(mock_get_client.return_value.publish.call_args.args[1])
+        self.assertEqual(message['deleted'], [task.id])
+
+    @patch('tasks.events.get_redis_client')
+    def test_publish_without_queries(self, mock_get_client):
+        with self.captureOnCommitCallbacks() as callbacks:
+            publish_tasks_changed(self.user.id, saved_ids=[1], deleted_ids=[2])
+        with self.assertNumQueries(0):
+            callbacks[0]()
+
+    @override_settings(TASKS_EVENTS_MAX_IDS=2)
+    @patch('tasks.events.get_redis_client')
+    def test_publish_large_change_as_resync(self, mock_get_client):
+        with self.captureOnCommitCallbacks(execute=True):
+            publish_tasks_changed(self.user.id, deleted_ids=[1, 2, 3])
+
+        message = json.loads(mock_get_client.return_value.publish.call_args.args[1])
+        self.assertEqual(message, {'version': get_tasks_version(self.user.id), 'resync': True})
+
+    def test_sync_view(self):
+        task = Task.objects.create(user=self.user, name='Task 1')
+        Task.objects.create(user=self.user, name='Task 2', complete=True)
+        foreign = Task.objects.create(user=User.objects.create_user(username='otheruser', password='testpass'),
+                                      name='Foreign')
+        self.client.login(username='testuser', password='testpass')
+
+        response = self.client.get(reverse('task:task_sync'), {'ids': f'{task.id},{foreign.id}'})
+
+        self.assertEqual(response.json(), {
+            'success': True,
+            'tasks': [{'id': task.id, 'name': 'Task 1', 'description': '', 'complete': False}],
+            'incomplete_count': 1,
+        })
+
+    def test_sync_view_invalid_ids(self):
+        self.client.login(username='testuser', password='testpass')
+        response = self.client.get(reverse('task:task_sync'), {'ids': '1,abc'})
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(TASKS_EVENTS_REDIS_URL='')
+    def test_publish_disabled(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            publish_tasks_changed(self.user.id, saved_ids=[1])
+        self.assertEqual(callbacks, [])
+
+    @patch('tasks.events.get_redis_client')
+    def test_stream(self, mock_get_client):
+        pubsub = mock_get_client.return_value.pubsub.return_value
+        pubsub.get_message.side_effect = [None, {'data': b'{"deleted": [1]}'}]
+
+        stream = stream_task_events(self.user.id)
+        chunks = list(islice(stream, 3))
+        stream.close()
+
+        pubsub.subscribe.assert_called_once_with(f'tasks:events:{self.user.id}')
+        self.assertEqual(chunks[1:], [': ping\n\n', 'event: tasks\ndata: {"deleted": [1]}\n\n'])
+        pubsub.close.assert_called_once()
+
+    @override_settings(TASKS_EVENTS_REDIS_URL='')
+    def test_view_disabled(self):
+        self.client.login(username='testuser', password='testpass')
+        response = self.client.get(reverse('task:task_events'))
+        self.assertEqual(response.status_code, 204)
+
+    @patch('tasks.views.stream_task_events', return_value=iter([': ping\n\n']))
+    @patch('tasks.views.get_redis_client')
+    def test_view_stream(self, mock_get_client, mock_stream):
+        self.client.login(username='testuser', password='testpass')
+        response = self.client.get(reverse('task:task_events'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(b''.join(response.streaming_content), b': ping\n\n')
+        mock_stream.assert_called_once_with(self.user.id)
+
+    @patch('tasks.views.connections.close_all')
+    @patch('tasks.views.stream_task_events', return_value=iter([': ping\n\n']))
+    @patch('tasks.views.get_redis_client')
+    def test_view_stream_releases_db_connections(self, mock_get_client, mock_stream, mock_close_all):
+        self.client.login(username='testuser', password='testpass')
+        self.client.get(reverse('task:task_events'))
+        mock_close_all.assert_called_once_with()
+
+
+class AsyncTaskViewsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.profile = self.user.profile
+        self.profile.email_verified = True
+        self.profile.save()
+
+    async def test_add_update_delete_task(self):
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.post(reverse('task:add_task'), {'name': 'New Task'},
+                                                content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        task_id = response.json()['task_id']
+
+        response = await self.async_client.post(reverse('task:update_task', args=[task_id]), {'complete': True},
+                                                content_type='application/json')
+        self.assertEqual(response.json(), {'success': True, 'complete': True})
+
+        response = await self.async_client.delete(reverse('task:delete_task', args=[task_id]))
+        self.assertEqual(response.json(), {'success': True})
+        self.assertFalse(await Task.objects.filter(id=task_id).aexists())
+
+    @patch('tasks.views.get_redis_client')
+    @patch('tasks.views.astream_task_events', new_callable=MagicMock)
+    async def test_events_stream_under_asgi(self, mock_stream, mock_get_client):
+        async def events(user_id):
+            yield ': ping\n\n'
+        mock_stream.side_effect = events
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(reverse('task:task_events'))
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual([chunk async for chunk in response.streaming_content], [b': ping\n\n'])
+        mock_stream.assert_called_once_with(self.user.id)
+
+    async def test_events_unverified_email(self):
+        self.profile.email_verified = False
+        await self.profile.asave()
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(reverse('task:task_events'))
+
+        self.assertTemplateUsed(response, 'email_verification_required.html')
+
+    @override_settings(AUTHENTICATION_BACKENDS=['django.contrib.auth.backends.ModelBackend'])
+    @patch('tasks.views.get_redis_client', return_value=None)
+    async def test_events_profile_loaded_asynchronously(self, mock_get_client):
+        # ModelBackend не загружает профиль вместе с пользователем
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('task:task_events'))
+        self.assertEqual(response.status_code, 204)
+
+    async def test_user_without_profile_not_verified(self):
+        await Profile.objects.filter(user=self.user).adelete()
+        user = await User.objects.aget(pk=self.user.pk)
+        self.assertFalse(await EmailVerifiedMixin.ais_email_verified(user))
+
+    async def test_events_anonymous_redirect(self):
+        response = await self.async_client.get(reverse('task:task_events'))
+        self.assertEqual(response.status_code, 302)
+
+    @patch('tasks.events.redis.asyncio.Redis.from_url')
+    async def test_astream(self, mock_from_url):
+        client = mock_from_url.return_value
+        client.aclose = AsyncMock()
+        pubsub = client.pubsub.return_value
+        pubsub.subscribe = AsyncMock()
+        pubsub.aclose = AsyncMock()
+        pubsub.get_message = AsyncMock(side_effect=[{'data': b'{"deleted": [1]}'}])
+
+        stream = astream_task_events(self.user.id)
+        chunks = [await anext(stream), await anext(stream)]
+        await stream.aclose()
+
+        self.assertEqual(chunks[1], 'event: tasks\ndata: {"deleted": [1]}\n\n')
+        pubsub.aclose.assert_awaited_once()
+        client.aclose.assert_awaited_once()
+
+
+class SearchConfigTests(TestCase):
+    def test_config_for_supported_languages(self):
+        self.assertEqual(get_search_config('ru'), 'russian')
+        self.assertEqual(get_search_config('en-us'), 'english')
+
+    def test_config_fallback_to_default_language(self):
+        self.assertEqual(get_search_config('de'), 'russian')
+
+
 class TaskViewTests(TestCase):
     def setUp(self):
+        # Версия задач и фрагменты шаблона хранятся в кэше, а в TestCase
+        # версия не меняется: on_commit не вызывается при откате транзакции
+        cache.clear()
         self.client = Client()
         self.user = User.objects.create_user(username='testuser', password='testpass')
         self.profile, created = Profile.objects.get_or_create(user=self.user)
@@ -48,6 +352,68 @@ class TaskViewTests(TestCase):
         self.assertTemplateUsed(response, 'index.html')
         self.assertEqual(len(response.context['task_list']), 2)
 
+    def test_task_list_view_first_page_of_open_tasks(self):
+        for i in range(4):
+            Task.objects.create(user=self.user, name=f'Open {i}')
+        Task.objects.create(user=self.user, name='Done', complete=True)
+
+        with self.settings(TASKS_PAGE_SIZE=3):
+            response = self.client.get(reverse('task:task_view'))
+
+        self.assertEqual([task.name for task in response.context['task_list']], ['Open 0', 'Open 1', 'Open 2'])
+        self.assertTrue(response.context['task_list'].next_cursor)
+        self.assertEqual(response.context['incomplete_count'], 4)
+        self.assertNotContains(response, 'Done')
+
+    def test_task_chunk_view(self):
+        for i in range(5):
+            Task.objects.create(user=self.user, name=f'Done {i}', complete=True)
+        Task.objects.create(user=self.user, name='Open')
+        url = reverse('task:task_chunk')
+
+        with self.settings(TASKS_PAGE_SIZE=3):
+            first = self.client.get(url, {'complete': '1'}).json()
+            second = self.client.get(url, {'complete': '1', 'cursor': first['next']}).json()
+
+        self.assertIn('Done 2', first['html'])
+        self.assertNotIn('Done 3', first['html'])
+        self.assertIn('Done 4', second['html'])
+        self.assertNotIn('Open', first['html'] + second['html'])
+        self.assertIsNone(second['next'])
+
+    def test_task_chunk_view_invalid_cursor(self):
+        response = self.client.get(reverse('task:task_chunk'), {'complete': '0', 'cursor': 'invalid'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_task_list_fragment_cached_until_tasks_change(self):
+        Task.objects.create(user=self.user, name='Task 1')
+        url = reverse('task:task_view')
+        self.client.get(url)
+
+        with self.assertNumQueries(2):  # сессия и пользователь с профилем
+            response = self.client.get(url)
+        self.assertContains(response, 'Task 1')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('task:add_task'), data=json.dumps({'name': 'Task 2'}),
+                             content_type='application/json')
+        response = self.client.get(url)
+        self.assertContains(response, 'Task 2')
+
+    def test_task_chunk_cached_until_tasks_change(self):
+        task = Task.objects.create(user=self.user, name='Done', complete=True)
+        url = reverse('task:task_chunk')
+        self.client.get(url, {'complete': '1'})
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'complete': '1'})
+        self.assertIn('Done', response.json()['html'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('task:delete_task', args=[task.id]))
+        response = self.client.get(url, {'complete': '1'})
+        self.assertNotIn('Done', response.json()['html'])
+
     def test_add_task_view(self):
         response = self.client.post(reverse('task:add_task'), data=json.dumps({
             'name': 'New Task',
@@ -94,3 +460,41 @@ class EmailVerifiedMixinTests(TestCase):
         response = self.client.get(reverse('task:task_view'))
         self.assertTemplateUsed(response, 'email_verification_required.html')
         self.assertEqual(response.status_code, 200)
+
+
+class SeedLoadDataCommandTests(TestCase):
+    def test_creates_verified_users_with_tokens_and_tasks(self):
+        call_command('seed_load_data', users=3, tasks=4, batch_size=2, seed=1, stdout=StringIO())
+        call_command('seed_load_data', users=1, tasks=1, stdout=StringIO())
+
+        users = User.objects.filter(username__startswith='load')
+        self.assertEqual(sorted(users.values_list('username', flat=True)), ['load0', 'load1', 'load2', 'load3'])
+        self.assertEqual(Profile.objects.filter(user__in=users, email_verified=True).count(), 4)
+        self.assertEqual(Token.objects.filter(user__in=users).count(), 4)
+        self.assertEqual(Task.objects.filter(user__username='load0').count(), 4)
+        self.assertTrue(User.objects.get(username='load3').check_password('loadtest-password'))
+
+
+class LoadTestTests(LiveServerTestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix('list=3,delete=1'), {'list': 3, 'delete': 1})
+        with self.assertRaises(ValueError):
+            parse_mix('update=1')
+
+    def test_load_run_report(self):
+        call_command('seed_load_data', users=2, tasks=3, stdout=StringIO())
+        out = StringIO()
+
+        call_command('load_test', url=self.live_server_url, requests=40, concurrency=2, stdout=out)
+
+        report = out.getvalue()
+        self.assertIn('api:list', report)
+        self.assertIn('web:list', report)
+        self.assertIn('Всего: 40 запросов', report)
+        self.assertIn('ошибок: 0', report)
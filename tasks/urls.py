@@ -1,11 +1,14 @@
 from django.urls import path
-from .views import TaskView, UpdateTaskView, DeleteTaskView, AddTaskView, MainPageTask
+from .views import TaskView, TaskChunkView, TaskSyncView, TaskEventsView, UpdateTaskView, DeleteTaskView, AddTaskView, MainPageTask
 
 app_name = 'task'
 
 urlpatterns = [
     path('', MainPageTask.as_view(), name='main_page'),
     path('tasks/', TaskView.as_view(), name="task_view"),
+    path('tasks/chunk/', TaskChunkView.as_view(), name='task_chunk'),
+    path('tasks/sync/', TaskSyncView.as_view(), name='task_sync'),
+    path('tasks/events/', TaskEventsView.as_view(), name='task_events'),
     path('update-task/<int:task_id>/', UpdateTaskView.as_view(), name='update_task'),
     path('delete-task/<int:task_id>/', DeleteTaskView.as_view(), name='delete_task'),
     path('add-task/', AddTaskView.as_view(), name='add_task'),
@@ -0,0 +1,61 @@
+"""
+Версия коллекции задач пользователя.
+
+Версия хранится в общем кэше и меняется при любой записи задач
+пользователя. По ней строятся ETag ответов API и ключи кэша
+фрагментов, поэтому проверка "изменилось ли что-нибудь" не требует
+запроса к таблице задач.
+
+Значение версии — время ее смены в наносекундах. Пока с последней записи
+не прошло DATABASE_REPLICA_PIN_SECONDS, реплика может еще не получить
+изменения, и данные для кэша и ETag читаются из основной базы
+(read_version_from_primary); позже чтение идет из реплик.
+"""
+
+import time
+from django.conf import settings
+from django.core.cache import cache
+from toDo_app.db_router import read_from_primary
+
+TASKS_VERSION_KEY = 'tasks:version:{user_id}'
+
+
+def get_tasks_version(user_id: int) -> str:
+    """
+    Возвращает текущую версию коллекции задач пользователя.
+
+    Если версии нет в кэше (первое обращение или вытеснение),
+    создается новая, не совпадающая ни с одной выданной ранее.
+
+    :param user_id: Идентификатор пользователя.
+    :return: Версия коллекции задач.
+    """
+
+    key = TASKS_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, str(time.time_ns()), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_tasks_version(user_id: int) -> None:
+    """
+    Меняет версию коллекции задач пользователя после записи.
+
+    :param user_id: Идентификатор пользователя.
+    """
+
+    cache.set(TASKS_VERSION_KEY.format(user_id=user_id), str(time.time_ns()), timeout=None)
+
+
+def read_version_from_primary(version: str) -> None:
+    """
+    Закрепляет чтение текущего запроса за основной базой, если версия
+    сменилась недавно и реплики могут отставать от нее.
+
+    :param version: Версия коллекции задач, по которой кэшируются данные.
+    """
+
+    if time.time_ns() - int(version) < settings.DATABASE_REPLICA_PIN_SECONDS * 10 ** 9:
+        read_from_primary()
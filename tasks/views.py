@@ -1,36 +1,174 @@
-from django.db.models import QuerySet
 import logging
-from django.http import JsonResponse, HttpResponse
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.shortcuts import redirect
+from django.template.loader import render_to_string
 import json
 from django.urls import reverse_lazy
-from django.views.generic import ListView, View, TemplateView
+from django.utils import translation
+from django.utils.functional import SimpleLazyObject
+from django.views.generic import View, TemplateView
+from toDo_app.db_router import read_from_primary
 from .models import Task
+from .events import astream_task_events, get_redis_client, stream_task_events
+from .paging import InvalidPageCursor, LazyTaskPage, get_task_page
+from .versioning import get_tasks_version, read_version_from_primary
 from .tasks_mixins import EmailVerifiedMixin
 
 logger = logging.getLogger(__name__)
 
 
-class TaskView(EmailVerifiedMixin, ListView):
+class TaskView(EmailVerifiedMixin, TemplateView):
     """
-    Этот класс предоставляет список задач,
-    связанных с текущим пользователем. Доступ к этому представлению
-    разрешен только для пользователей с подтвержденным адресом электронной почты.
+    Этот класс предоставляет страницу задач текущего пользователя.
+    Доступ к этому представлению разрешен только для пользователей
+    с подтвержденным адресом электронной почты.
+
+    На странице сразу выводится только первая порция невыполненных задач,
+    остальные невыполненные и выполненные задачи подгружаются порциями
+    через TaskChunkView.
     """
 
-    model = Task
     template_name = 'index.html'
-    context_object_name = 'task_list'
     login_url = reverse_lazy('my_auth:login')
 
-    def get_queryset(self) -> QuerySet[Task]:
+    def get_context_data(self, **kwargs) -> dict:
+        """
+        Добавляет в контекст первую порцию невыполненных задач,
+        количество невыполненных задач и версию коллекции задач.
+
+        Задачи и количество выбираются лениво: при попадании в кэш
+        фрагментов шаблона запросы к таблице задач не выполняются.
+        Фрагменты кэшируются по версии, поэтому вскоре после записи задачи
+        читаются из основной базы.
+
+        :return: Контекст шаблона.
+        """
+
+        context = super().get_context_data(**kwargs)
+        user = self.request.user
+        context['task_list'] = LazyTaskPage(user, complete=False)
+        context['incomplete_count'] = SimpleLazyObject(
+            lambda: Task.objects.filter(user=user, complete=False).count()
+        )
+        context['tasks_version'] = get_tasks_version(user.id)
+        read_version_from_primary(context['tasks_version'])
+        context['fragment_cache_timeout'] = settings.TASKS_FRAGMENT_CACHE_TIMEOUT
+        return context
+
+
+class TaskChunkView(EmailVerifiedMixin, View):
+    """
+    Класс для подгрузки очередной порции задач на страницу задач.
+
+    Возвращает HTML-фрагмент с элементами списка и курсор следующей порции.
+    Порция кэшируется по пользователю, версии коллекции задач, языку
+    и курсору; любая запись задач меняет версию и тем самым сбрасывает кэш.
+    """
+
+    def get(self, request) -> JsonResponse:
+        """
+        Обрабатывает запрос порции невыполненных или выполненных задач.
+
+        :param request: HTTP запрос с параметрами complete (0 или 1) и cursor.
+        :return: JsonResponse с HTML-фрагментом и курсором следующей порции
+                 или сообщение об ошибке, если курсор недействителен.
+        """
+
+        complete = request.GET.get('complete') == '1'
+        cursor = request.GET.get('cursor') or ''
+        version = get_tasks_version(request.user.id)
+        cache_key = make_template_fragment_key('task_chunk', [
+            request.user.id, version, translation.get_language(), complete, cursor,
+        ])
+        chunk = cache.get(cache_key)
+        if chunk is None:
+            read_version_from_primary(version)
+            try:
+                tasks, next_cursor = get_task_page(request.user, complete, cursor)
+            except InvalidPageCursor:
+                logger.warning('Недействительный курсор задач у пользователя %s', request.user.id)
+                return JsonResponse({'success': False, 'error': 'Недействительный курсор.'}, status=400)
+            html = render_to_string('task_items.html', {'tasks': tasks}, request=request)
+            chunk = {'html': html, 'next': next_cursor}
+            cache.set(cache_key, chunk, settings.TASKS_FRAGMENT_CACHE_TIMEOUT)
+
+        return JsonResponse({'success': True, **chunk})
+
+
+class TaskSyncView(EmailVerifiedMixin, View):
+    """
+    Класс для получения данных задач из события TaskEventsView.
+
+    Событие содержит только идентификаторы измененных задач, поэтому
+    страница задач запрашивает здесь их актуальные данные и количество
+    невыполненных задач.
+    """
+
+    def get(self, request) -> JsonResponse:
+        """
+        Возвращает задачи пользователя с указанными идентификаторами.
+
+        :param request: HTTP запрос с параметром ids (идентификаторы через запятую).
+        :return: JsonResponse с данными задач и количеством невыполненных задач
+                 или сообщение об ошибке, если идентификаторы некорректны.
+        """
+
+        try:
+            task_ids = [int(task_id) for task_id in request.GET.get('ids', '').split(',') if task_id]
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'Некорректные идентификаторы задач.'}, status=400)
+        if len(task_ids) > settings.TASKS_EVENTS_MAX_IDS:
+            return JsonResponse({'success': False, 'error': 'Слишком много идентификаторов задач.'}, status=400)
+
+        # Событие приходит сразу после фиксации, реплика может еще не получить изменения
+        read_from_primary()
+        tasks = list(Task.objects.filter(user=request.user, id__in=task_ids)
+                     .values('id', 'name', 'description', 'complete')) if task_ids else []
+        incomplete_count = Task.objects.filter(user=request.user, complete=False).count()
+        return JsonResponse({'success': True, 'tasks': tasks, 'incomplete_count': incomplete_count})
+
+
+class TaskEventsView(EmailVerifiedMixin, View):
+    """
+    Класс для потока Server-Sent Events с изменениями задач пользователя.
+
+    Страница задач подписывается на поток через EventSource и применяет
+    изменения, сделанные в других вкладках и на других устройствах.
+    Под ASGI поток читается из Redis асинхронно и не занимает поток
+    процесса; под WSGI используется синхронный генератор.
+    """
+
+    async def get(self, request) -> HttpResponse:
         """
-        Возвращает набор задач, связанных с текущим пользователем.
+        Открывает поток событий задач текущего пользователя.
 
-        :return: QuerySet задач пользователя.
+        :param request: HTTP запрос.
+        :return: StreamingHttpResponse с потоком text/event-stream или ответ 204,
+                 если события отключены (EventSource не будет переподключаться).
         """
 
-        return Task.objects.filter(user=self.request.user)
+        if get_redis_client() is None:
+            return HttpResponse(status=204)
+
+        if isinstance(request, ASGIRequest):
+            events = astream_task_events(request.user.id)
+        else:
+            events = stream_task_events(request.user.id)
+
+        # Поток не обращается к БД: соединения закрываются сразу, а не после
+        # отключения клиента, чтобы открытые вкладки не занимали соединения Postgres
+        await sync_to_async(connections.close_all)()
+
+        response = StreamingHttpResponse(events, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # nginx не должен буферизовать поток
+        return response
 
 
 class UpdateTaskView(View):
@@ -42,7 +180,7 @@ class UpdateTaskView(View):
     обновляет поле 'complete' задачи и сохраняет изменения в базе данных.
     """
 
-    def post(self, request, task_id) -> JsonResponse:
+    async def post(self, request, task_id) -> JsonResponse:
         """
         Обрабатывает обновление статуса задачи.
 
@@ -52,15 +190,16 @@ class UpdateTaskView(View):
                  или сообщение об ошибке, если задача не найдена.
         """
 
+        user = await request.auser()
         try:
-            task = Task.objects.get(id=task_id)
+            task = await Task.objects.aget(id=task_id)
             data = json.loads(request.body)
             task.complete = data.get('complete', False)
-            task.save()
-            logger.info(f'Задача с номером {task_id} у пользователя {request.user.id} выполнена ={task.complete}')
+            await task.asave()
+            logger.info('Задача с номером %s у пользователя %s выполнена =%s', task_id, user.id, task.complete)
             return JsonResponse({'success': True, 'complete': task.complete})
         except Task.DoesNotExist:
-            logger.error(f'Задача id {task_id} не найдена у пользователя {request.user.id}')
+            logger.error('Задача id %s не найдена у пользователя %s', task_id, user.id)
             return JsonResponse({'success': False, 'error': 'Task not found'})
 
 
@@ -72,7 +211,7 @@ class DeleteTaskView(View):
     по заданному идентификатору из базы данных.
     """
 
-    def delete(self, request, task_id) -> JsonResponse:
+    async def delete(self, request, task_id) -> JsonResponse:
         """
         Обрабатывает удаление задачи.
 
@@ -82,10 +221,11 @@ class DeleteTaskView(View):
                  или сообщение об ошибке, если задача не найдена.
         """
 
+        user = await request.auser()
         try:
-            task = Task.objects.get(pk=task_id)
-            task.delete()
-            logger.info(f'Задача с номером {task_id} удалена у пользователя {request.user.id}')
+            task = await Task.objects.aget(pk=task_id)
+            await task.adelete()
+            logger.info('Задача с номером %s удалена у пользователя %s', task_id, user.id)
             return JsonResponse({'success': True})
         except Task.DoesNotExist:
             return JsonResponse({'success': False, 'error': 'Задача не найдена.'})
@@ -100,7 +240,7 @@ class AddTaskView(View):
      и добавляет в базу данных.
     """
 
-    def post(self, request) -> JsonResponse:
+    async def post(self, request) -> JsonResponse:
         """
         Обрабатывает добавление задачи.
 
@@ -116,10 +256,10 @@ class AddTaskView(View):
         if not name:
             return JsonResponse({'success': False, 'error': 'Название обязательны.'}, status=400)
 
-        user = request.user
+        user = await request.auser()
 
-        task = Task.objects.create(user=user, name=name, description=description, complete=False)
-        logger.info(f'Добавлена новая задача {task.id} у пользователя {user.id}')
+        task = await Task.objects.acreate(user=user, name=name, description=description, complete=False)
+        logger.info('Добавлена новая задача %s у пользователя %s', task.id, user.id)
         return JsonResponse({'success': True, 'task_id': task.id}, status=201)
 
 
@@ -145,6 +285,6 @@ class MainPageTask(TemplateView):
         """
 
         if request.user.is_authenticated:
-            logger.info(f'Пользователь {request.user.id} перенаправлен на станицу список задач')
+            logger.info('Пользователь %s перенаправлен на станицу список задач', request.user.id)
             return redirect(reverse_lazy('task:task_view'))
         return super().dispatch(request, *args, **kwargs)
@@ -1,5 +1,8 @@
 import os
+import time
 from celery import Celery
+from celery.signals import task_failure, task_postrun, task_prerun, worker_init
+from .metrics import CELERY_TASK_DURATION, CELERY_TASK_FAILURES, clear_multiprocess_dir
 
 """Подключение Celery"""
 
@@ -8,3 +11,33 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'toDo_app.settings')
 app = Celery('toDo_app')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
+
+"""
+Метрики Prometheus для задач Celery: длительность выполнения и количество сбоев.
+"""
+
+# Время начала выполняемых задач процесса по task_id
+_task_started = {}
+
+
+@worker_init.connect
+def clear_worker_metrics(**kwargs):
+    clear_multiprocess_dir(os.environ.get('PROMETHEUS_MULTIPROC_DIR', ''))
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def observe_task_duration(task_id=None, task=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None and task is not None:
+        CELERY_TASK_DURATION.labels(task=task.name).observe(time.perf_counter() - started)
+
+
+@task_failure.connect
+def count_task_failure(sender=None, **kwargs):
+    if sender is not None:
+        CELERY_TASK_FAILURES.labels(task=sender.name).inc()
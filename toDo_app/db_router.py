@@ -0,0 +1,102 @@
+"""
+Маршрутизация запросов между основной базой данных и репликами.
+
+Запись всегда идет в основную базу (default). Чтение в безопасных
+HTTP-запросах (GET, HEAD, OPTIONS) распределяется по репликам из
+settings.DATABASE_REPLICAS. Запрос закрепляется за основной базой, если:
+- метод запроса изменяет данные;
+- в этом запросе уже была запись;
+- пользователь недавно что-то записал (cookie, которую выставляет
+  ReplicaRoutingMiddleware на settings.DATABASE_REPLICA_PIN_SECONDS),
+  чтобы он сразу видел свои изменения несмотря на отставание реплик;
+- ответ кэшируется по версии коллекции задач (ETag, кэш фрагментов):
+  версия меняется при фиксации записи, и отстающая реплика сохранила бы
+  старые строки под новой версией (см. read_from_primary).
+Вне HTTP-запросов (Celery, команды управления) чтение идет из основной базы.
+"""
+
+import random
+from contextvars import ContextVar
+from django.conf import settings
+
+PRIMARY_DB = 'default'
+PRIMARY_PIN_COOKIE = 'db_primary_pin'
+
+
+class RoutingState:
+    """
+    Состояние маршрутизации текущего HTTP-запроса.
+
+    Атрибуты:
+        pinned (bool): Читать из основной базы.
+        wrote (bool): В запросе была запись в базу данных.
+    """
+
+    def __init__(self, pinned: bool):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_routing_state: ContextVar[RoutingState | None] = ContextVar('db_routing_state', default=None)
+
+
+def start_routing(pinned: bool) -> RoutingState:
+    """
+    Начинает маршрутизацию для HTTP-запроса.
+
+    :param pinned: True, если запрос должен читать из основной базы.
+    :return: Состояние маршрутизации запроса.
+    """
+
+    state = RoutingState(pinned)
+    _routing_state.set(state)
+    return state
+
+
+def finish_routing() -> None:
+    """
+    Завершает маршрутизацию HTTP-запроса. Значение сбрасывается через set,
+    а не через токен: под ASGI начало и конец запроса в middleware
+    выполняются в разных копиях контекста.
+    """
+
+    _routing_state.set(None)
+
+
+def read_from_primary() -> None:
+    """
+    Закрепляет чтение текущего HTTP-запроса за основной базой. Вызывается
+    перед чтением данных, которые сохраняются в кэше или ETag по версии
+    коллекции задач: версия читается раньше данных, и основная база
+    возвращает строки не старше этой версии.
+    """
+
+    state = _routing_state.get()
+    if state is not None:
+        state.pinned = True
+
+
+class PrimaryReplicaRouter:
+    """
+    Роутер баз данных: запись в основную базу, чтение из реплик
+    с гарантией чтения собственных записей.
+    """
+
+    def db_for_read(self, model, **hints) -> str:
+        state = _routing_state.get()
+        if state is None or state.pinned or not settings.DATABASE_REPLICAS:
+            return PRIMARY_DB
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints) -> str:
+        state = _routing_state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        # Реплики содержат те же данные, что и основная база
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints) -> bool:
+        return db == PRIMARY_DB
@@ -0,0 +1,134 @@
+"""
+Запись логов в отдельном потоке процесса.
+
+BackgroundHandler только кладет запись в очередь, а форматирование и запись
+в файл, консоль или syslog выполняет поток QueueListener. Поэтому запись логов
+не блокирует обработку запроса. Аргументы сообщения и трассировка исключения
+подставляются в текст еще в потоке запроса, как в QueueHandler.prepare:
+в очередь не попадают изменяемые объекты и кадры стека.
+
+После fork (дочерние процессы Celery) поток и обработчик создаются заново.
+Дочерний процесс пишет в файл с номером слота: занимает свободный слот
+блокировкой файла '<файл логов>.<номер>.lock', которая снимается при
+завершении процесса. Поэтому файлы дочерних процессов переиспользуются,
+и их не больше, чем одновременно работающих процессов.
+"""
+
+import atexit
+import copy
+import fcntl
+import itertools
+import logging
+import os
+import queue
+import weakref
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from django.utils.module_loading import import_string
+
+_handlers = weakref.WeakSet()
+
+
+def get_process_name() -> str:
+    """
+    :return: имя процесса для файла логов: LOG_PROCESS_NAME (воркеры gunicorn
+             получают его в gunicorn.conf.py) или 'main'
+    """
+    return os.environ.get('LOG_PROCESS_NAME', 'main')
+
+
+def acquire_slot(path: str) -> tuple:
+    """
+    Занимает первый свободный слот файла логов для дочернего процесса.
+
+    :param path: шаблон имени файла логов с {process}
+    :return: номер слота и открытый файл блокировки (держится до завершения процесса)
+    """
+    for slot in itertools.count():
+        lock_file = open(f'{path.format(process=get_process_name())}.{slot}.lock', 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            continue
+        return slot, lock_file
+
+
+class BackgroundHandler(QueueHandler):
+    """
+    Обработчик, передающий записи в поток записи процесса.
+
+    :param target: путь к классу обработчика, который выполняет запись
+    :param kwargs: параметры обработчика; в filename подставляется {process}
+    """
+
+    def __init__(self, target: str, **kwargs):
+        super().__init__(queue.SimpleQueue())
+        self._target_class = import_string(target)
+        self._target_kwargs = kwargs
+        self._process_name = get_process_name()
+        self._slot_lock = None
+        self._stopped = False
+        self._start()
+        _handlers.add(self)
+
+    def _start(self):
+        kwargs = dict(self._target_kwargs)
+        if 'filename' in kwargs:
+            kwargs['filename'] = str(kwargs['filename']).format(process=self._process_name)
+            Path(kwargs['filename']).parent.mkdir(parents=True, exist_ok=True)
+        self.target = self._target_class(**kwargs)
+        if self.formatter is not None:
+            self.target.setFormatter(self.formatter)
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+
+    def _restart_in_child(self):
+        # Поток записи не переживает fork, а файл родителя должен писать только родитель
+        if self._stopped:
+            return
+        self.queue = queue.SimpleQueue()
+        if 'filename' in self._target_kwargs:
+            slot, self._slot_lock = acquire_slot(str(self._target_kwargs['filename']))
+            self._process_name = f'{get_process_name()}-{slot}'
+        self._start()
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Как QueueHandler.prepare, но префикс формата (время, уровень) добавляет поток записи
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = (self.formatter or logging.Formatter()).formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def stop(self):
+        """Дописывает оставшиеся в очереди записи и останавливает поток."""
+        self._stopped = True
+        if self.listener._thread is not None:
+            self.listener.stop()
+        self.target.close()
+
+    def close(self):
+        self.stop()
+        super().close()
+
+
+def _restart_handlers_in_child():
+    for handler in list(_handlers):
+        handler._restart_in_child()
+
+
+def _stop_handlers():
+    for handler in list(_handlers):
+        handler.stop()
+
+
+# Регистрируются один раз на процесс, а не для каждого обработчика
+os.register_at_fork(after_in_child=_restart_handlers_in_child)
+atexit.register(_stop_handlers)
@@ -0,0 +1,171 @@
+"""
+Метрики Prometheus для web-процессов и воркеров Celery.
+
+При запуске в нескольких процессах (воркеры gunicorn, Celery) каждый процесс
+пишет значения в файлы каталога из переменной окружения PROMETHEUS_MULTIPROC_DIR,
+а представление /metrics объединяет файлы из каталогов METRICS_DIRS. Без
+PROMETHEUS_MULTIPROC_DIR отдаются метрики текущего процесса.
+"""
+
+import glob
+import os
+import time
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram,
+                               generate_latest)
+from prometheus_client.multiprocess import MultiProcessCollector
+
+HTTP_REQUEST_DURATION = Histogram(
+    'django_http_request_duration_seconds',
+    'Время обработки HTTP-запроса',
+    ['route', 'method', 'status'],
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    'django_http_request_db_queries',
+    'Количество запросов к БД за один HTTP-запрос',
+    ['route'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, float('inf')),
+)
+HTTP_REQUEST_DB_DURATION = Histogram(
+    'django_http_request_db_duration_seconds',
+    'Суммарное время запросов к БД за один HTTP-запрос',
+    ['route'],
+)
+CACHE_REQUESTS = Counter(
+    'django_cache_requests_total',
+    'Обращения к кэшу на чтение по результату (hit/miss)',
+    ['result'],
+)
+CELERY_TASK_DURATION = Histogram(
+    'celery_task_duration_seconds',
+    'Время выполнения задачи Celery',
+    ['task'],
+    buckets=(.01, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60, 300, float('inf')),
+)
+CELERY_TASK_FAILURES = Counter(
+    'celery_task_failures_total',
+    'Количество неудачных выполнений задачи Celery',
+    ['task'],
+)
+
+UNMATCHED_ROUTE = 'unmatched'
+
+
+class RequestMetrics:
+    """Время начала HTTP-запроса и накопленная статистика запросов к БД."""
+
+    __slots__ = ('started', 'db_queries', 'db_seconds')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+
+_request_metrics: ContextVar = ContextVar('request_metrics', default=None)
+
+
+def query_metrics_wrapper(execute, sql, params, many, context):
+    """
+    Обертка выполнения SQL: учитывает запрос в статистике текущего HTTP-запроса.
+    """
+    metrics = _request_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_queries += 1
+        metrics.db_seconds += time.perf_counter() - started
+
+
+def start_request_metrics() -> RequestMetrics:
+    """
+    Начинает сбор метрик запроса и подключает обертку к соединениям с БД
+    текущего потока (в нем же выполняется синхронный код представления).
+
+    :return: статистика запроса
+    """
+    for connection in connections.all():
+        if query_metrics_wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(query_metrics_wrapper)
+    metrics = RequestMetrics()
+    _request_metrics.set(metrics)
+    return metrics
+
+
+def finish_request_metrics(request, response, metrics: RequestMetrics):
+    """
+    Записывает длительность запроса и статистику запросов к БД.
+    Маршрут берется из имени представления, чтобы не плодить метки по параметрам URL.
+    """
+    _request_metrics.set(None)
+    match = getattr(request, 'resolver_match', None)
+    route = match.view_name if match is not None and match.view_name else UNMATCHED_ROUTE
+
+    HTTP_REQUEST_DURATION.labels(route=route, method=request.method,
+                                 status=str(response.status_code)).observe(time.perf_counter() - metrics.started)
+    HTTP_REQUEST_DB_QUERIES.labels(route=route).observe(metrics.db_queries)
+    HTTP_REQUEST_DB_DURATION.labels(route=route).observe(metrics.db_seconds)
+
+
+def record_cache_lookup(hits: int, misses: int):
+    if hits:
+        CACHE_REQUESTS.labels(result='hit').inc(hits)
+    if misses:
+        CACHE_REQUESTS.labels(result='miss').inc(misses)
+
+
+def clear_multiprocess_dir(path: str):
+    """
+    Удаляет файлы метрик прошлого запуска. Вызывается главным процессом
+    gunicorn или Celery до запуска дочерних процессов.
+    """
+    if path and os.path.isdir(path):
+        for filename in glob.glob(os.path.join(path, '*.db')):
+            os.remove(filename)
+
+
+class MultiDirectoryCollector:
+    """Объединяет файлы метрик из нескольких каталогов (web и Celery)."""
+
+    def __init__(self, paths, registry=None):
+        self._paths = list(paths)
+        if registry is not None:
+            registry.register(self)
+
+    def collect(self):
+        files = []
+        for path in self._paths:
+            files.extend(glob.glob(os.path.join(path, '*.db')))
+        return MultiProcessCollector.merge(files, accumulate=True)
+
+
+def get_metrics_registry():
+    """
+    :return: реестр с метриками всех процессов или реестр текущего процесса
+    """
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return REGISTRY
+    registry = CollectorRegistry()
+    MultiDirectoryCollector(settings.METRICS_DIRS or [os.environ['PROMETHEUS_MULTIPROC_DIR']], registry)
+    return registry
+
+
+def metrics_view(request):
+    """
+    Отдает метрики в текстовом формате Prometheus по заголовку
+    Authorization: Bearer <METRICS_TOKEN>. Без METRICS_TOKEN метрики не отдаются (404).
+    """
+    if not settings.METRICS_TOKEN:
+        raise Http404
+    token = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not constant_time_compare(token, settings.METRICS_TOKEN):
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(get_metrics_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -1,6 +1,15 @@
+import logging
 from django.utils import translation
 from django.utils.deprecation import MiddlewareMixin
 from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY
+from .db_router import PRIMARY_PIN_COOKIE, finish_routing, start_routing
+from .metrics import finish_request_metrics, start_request_metrics
+from .queries import start_recording, stop_recording
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
 
 
 class LanguageMiddleware(MiddlewareMixin):
@@ -20,3 +29,80 @@ class LanguageMiddleware(MiddlewareMixin):
                     translation.activate(settings.LANGUAGE_CODE)
             else:
                 translation.activate(settings.LANGUAGE_CODE)
+
+
+class SessionBackendMiddleware(MiddlewareMixin):
+    """
+    Переводит сессии, созданные до ProfileModelBackend, на текущий бэкенд.
+    В таких сессиях записан путь ModelBackend, которого нет
+    в AUTHENTICATION_BACKENDS, и без замены пользователь был бы разлогинен.
+    Должен стоять после SessionMiddleware и до AuthenticationMiddleware.
+    """
+
+    LEGACY_BACKENDS = ('django.contrib.auth.backends.ModelBackend',)
+
+    def process_request(self, request):
+        if request.session.get(BACKEND_SESSION_KEY) in self.LEGACY_BACKENDS:
+            request.session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """
+    Собирает метрики Prometheus по запросу: длительность по маршруту,
+    количество и время запросов к БД. Должен стоять первым в MIDDLEWARE.
+    """
+
+    def process_request(self, request):
+        request.request_metrics = start_request_metrics()
+
+    def process_response(self, request, response):
+        metrics = getattr(request, 'request_metrics', None)
+        if metrics is not None:
+            finish_request_metrics(request, response, metrics)
+        return response
+
+
+class QueryInspectionMiddleware(MiddlewareMixin):
+    """
+    При включенном QUERY_INSPECTION записывает SQL-запросы запроса: добавляет
+    заголовки X-Query-Count и X-Query-Duration и пишет в лог предупреждение
+    о запросах, повторившихся не меньше QUERY_REPEAT_THRESHOLD раз (N+1).
+    """
+
+    def process_request(self, request):
+        if settings.QUERY_INSPECTION:
+            request.query_recorder = start_recording()
+
+    def process_response(self, request, response):
+        recorder = getattr(request, 'query_recorder', None)
+        if recorder is None:
+            return response
+
+        stop_recording(recorder)
+        response['X-Query-Count'] = recorder.count
+        response['X-Query-Duration'] = f'{recorder.duration * 1000:.1f}ms'
+        for shape, count in recorder.repeated(settings.QUERY_REPEAT_THRESHOLD).items():
+            logger.warning(f'Запрос повторился {count} раз при обработке {request.method} {request.path}: {shape}')
+        return response
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """
+    Включает чтение из реплик для безопасных запросов и закрепляет
+    за основной базой пользователя, который недавно выполнял запись.
+    """
+
+    def process_request(self, request):
+        pinned = request.method not in SAFE_METHODS or PRIMARY_PIN_COOKIE in request.COOKIES
+        request.db_routing_state = start_routing(pinned)
+
+    def process_response(self, request, response):
+        state = getattr(request, 'db_routing_state', None)
+        if state is None:
+            return response
+
+        if state.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(PRIMARY_PIN_COOKIE, '1', max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        finish_routing()
+        return response
@@ -0,0 +1,110 @@
+"""
+Операции миграций для изменения индексов на работающей базе.
+
+В PostgreSQL индексы создаются и удаляются через CONCURRENTLY, чтобы
+не блокировать запись в таблицу. На остальных СУБД (SQLite в тестах и
+локальной разработке) выполняются обычные операции Django, а индексы,
+специфичные для PostgreSQL (GIN и т.п.), не создаются.
+Миграции с этими операциями должны быть объявлены с atomic = False.
+"""
+
+from django.contrib.postgres.indexes import PostgresIndex
+from django.contrib.postgres.operations import AddIndexConcurrently as PostgresAddIndexConcurrently
+from django.db.migrations import AddIndex, AlterField
+from django.db.migrations.operations.base import Operation
+
+
+def is_postgres(schema_editor) -> bool:
+    return schema_editor.connection.vendor == 'postgresql'
+
+
+class AddIndexConcurrently(PostgresAddIndexConcurrently):
+    """
+    Создает индекс через CREATE INDEX CONCURRENTLY в PostgreSQL
+    и обычным CREATE INDEX на других СУБД.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if is_postgres(schema_editor):
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        if isinstance(self.index, PostgresIndex):
+            return None
+        return AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if is_postgres(schema_editor):
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        if isinstance(self.index, PostgresIndex):
+            return None
+        return AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class DropFieldIndexConcurrently(AlterField):
+    """
+    Снимает db_index с поля модели.
+
+    В PostgreSQL индексы поля (включая varchar_pattern_ops индекс ``_like``)
+    находятся через интроспекцию и удаляются через DROP INDEX CONCURRENTLY.
+    На других СУБД выполняется обычный AlterField.
+    """
+
+    atomic = False
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if not is_postgres(schema_editor):
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+        if schema_editor.connection.in_atomic_block:
+            raise RuntimeError(
+                f'Операция {self.__class__.__name__} не может выполняться внутри транзакции. '
+                f'Укажите atomic = False в миграции.'
+            )
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+
+        column = model._meta.get_field(self.name).column
+        index_names = schema_editor._constraint_names(
+            model, [column], index=True, unique=False, primary_key=False,
+            exclude={index.name for index in model._meta.indexes},
+        )
+        for index_name in index_names:
+            schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {schema_editor.quote_name(index_name)}')
+
+
+class AddModelIndexConcurrently(Operation):
+    """
+    Создает индекс на таблице модели другого приложения (например, auth.User),
+    у которой нельзя объявить индекс в Meta. Состояние моделей не меняется.
+
+    В PostgreSQL индекс создается и удаляется через CONCURRENTLY, поэтому
+    миграция должна быть объявлена с atomic = False.
+    """
+
+    atomic = False
+    reversible = True
+
+    def __init__(self, app_label, model_name, index):
+        self.app_label = app_label
+        self.model_name = model_name
+        self.index = index
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(self.app_label, self.model_name)
+        if is_postgres(schema_editor):
+            schema_editor.add_index(model, self.index, concurrently=True)
+        else:
+            schema_editor.add_index(model, self.index)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(self.app_label, self.model_name)
+        if is_postgres(schema_editor):
+            schema_editor.remove_index(model, self.index, concurrently=True)
+        else:
+            schema_editor.remove_index(model, self.index)
+
+    def describe(self):
+        return f'Create index {self.index.name} on {self.app_label}.{self.model_name}'
@@ -0,0 +1,96 @@
+"""
+Запись SQL-запросов, выполненных за время запроса или блока кода.
+
+Записываются текст и длительность каждого запроса. Запросы приводятся к форме
+без литералов и с одинаковыми списками IN (...), чтобы находить повторения
+одного и того же запроса с разными параметрами (N+1).
+"""
+
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import connections
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)')
+
+# Активные записи текущего контекста; записи могут быть вложенными (тест и middleware)
+_active_recorders: ContextVar = ContextVar('query_recorders', default=())
+
+
+def get_query_shape(sql: str) -> str:
+    """
+    :param sql: текст SQL-запроса
+    :return: форма запроса без литералов и с одинаковыми списками IN
+    """
+    shape = _LITERAL_RE.sub('?', sql)
+    return _IN_LIST_RE.sub('IN (...)', shape.replace('%s', '?'))
+
+
+class QueryRecorder:
+    """Список выполненных запросов: пары (sql, длительность в секундах)."""
+
+    def __init__(self):
+        self.queries = []
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def duration(self) -> float:
+        return sum(duration for _, duration in self.queries)
+
+    def repeated(self, threshold: int) -> dict:
+        """
+        :param threshold: сколько раз должна повториться форма запроса
+        :return: формы запросов, повторившиеся не меньше threshold раз, и число повторов
+        """
+        shapes = Counter(get_query_shape(sql) for sql, _ in self.queries)
+        return {shape: count for shape, count in shapes.most_common() if count >= threshold}
+
+
+def query_recorder_wrapper(execute, sql, params, many, context):
+    recorders = _active_recorders.get()
+    if not recorders:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        for recorder in recorders:
+            recorder.queries.append((sql, duration))
+
+
+def start_recording() -> QueryRecorder:
+    """
+    Начинает запись запросов и подключает обертку к соединениям с БД текущего потока.
+
+    :return: запись запросов
+    """
+    for connection in connections.all():
+        if query_recorder_wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(query_recorder_wrapper)
+    recorder = QueryRecorder()
+    _active_recorders.set(_active_recorders.get() + (recorder,))
+    return recorder
+
+
+def stop_recording(recorder: QueryRecorder):
+    _active_recorders.set(tuple(active for active in _active_recorders.get() if active is not recorder))
+
+
+@contextmanager
+def record_queries():
+    """
+    Записывает запросы, выполненные внутри блока with.
+    """
+    recorder = start_recording()
+    try:
+        yield recorder
+    finally:
+        stop_recording(recorder)
@@ -0,0 +1,198 @@
+"""
+Ограничение частоты запросов корзинами токенов (token bucket).
+
+У каждого ключа (IP-адрес клиента или учетная запись) есть корзина емкостью
+N токенов, которая восполняется целиком за период лимита 'N/период'. Запрос
+забирает по токену из всех своих корзин; если хотя бы одна пуста, запрос
+отклоняется и токены не списываются. Проверка и списание выполняются одним
+Lua-скриптом в Redis, поэтому корзины общие для всех процессов и не
+расходятся при одновременных запросах. Без RATELIMIT_REDIS_URL корзины
+хранятся в памяти процесса.
+
+Проверка выполняется до аутентификации, хэширования пароля и запросов к БД.
+"""
+
+import functools
+import hashlib
+import logging
+import math
+import threading
+import time
+import redis
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.translation import gettext as _
+
+logger = logging.getLogger(__name__)
+
+RATELIMIT_KEY = 'ratelimit:{scope}:{kind}:{ident}'
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Возвращает 0, если токены списаны, иначе время до появления токена во всех корзинах (сек.)
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local tokens = {}
+local wait = 0
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[i * 2])
+    local period = tonumber(ARGV[i * 2 + 1])
+    local bucket = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local available = tonumber(bucket[1]) or capacity
+    local elapsed = math.max(0, now - (tonumber(bucket[2]) or now))
+    available = math.min(capacity, available + elapsed * capacity / period)
+    if available < 1 then
+        wait = math.max(wait, (1 - available) * period / capacity)
+    end
+    tokens[i] = available
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i = 1, #KEYS do
+    redis.call('HSET', KEYS[i], 'tokens', tostring(tokens[i] - 1), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[i], math.ceil(tonumber(ARGV[i * 2 + 1])))
+end
+return '0'
+"""
+
+
+def parse_rate(rate: str) -> tuple:
+    """
+    :param rate: лимит вида '5/m' (периоды s, m, h, d)
+    :return: емкость корзины и период ее восполнения (сек.)
+    """
+    count, _separator, period = rate.partition('/')
+    return int(count), PERIODS[period[0]]
+
+
+def get_client_ip(request) -> str:
+    """
+    :return: IP-адрес клиента. За NUM_PROXIES доверенными прокси берется адрес,
+             добавленный в X-Forwarded-For ближайшим из них.
+    """
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if settings.NUM_PROXIES and forwarded:
+        addresses = [address.strip() for address in forwarded.split(',')]
+        return addresses[-min(settings.NUM_PROXIES, len(addresses))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+@functools.lru_cache
+def _get_client(url: str) -> redis.Redis:
+    return redis.Redis.from_url(url)
+
+
+class TokenBucketLimiter:
+    """
+    Хранилище корзин токенов: Redis или, без RATELIMIT_REDIS_URL, память процесса.
+    """
+
+    # Наибольшее количество корзин в памяти процесса до удаления восполненных
+    MAX_LOCAL_BUCKETS = 10000
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, buckets: list) -> float:
+        """
+        Забирает по токену из каждой корзины, если во всех есть токены.
+
+        :param buckets: список (ключ, емкость, период)
+        :return: 0, если запрос разрешен, иначе время ожидания (сек.)
+        """
+        if not settings.RATELIMIT_REDIS_URL:
+            return self._consume_local(buckets, time.monotonic())
+
+        args = [time.time()]
+        for _key, capacity, period in buckets:
+            args.extend((capacity, period))
+        try:
+            client = _get_client(settings.RATELIMIT_REDIS_URL)
+            return float(client.eval(TOKEN_BUCKET_SCRIPT, len(buckets), *(key for key, *_ in buckets), *args))
+        except redis.RedisError as e:
+            # Недоступный Redis не должен блокировать вход
+            logger.error('Хранилище ограничений запросов недоступно: %s', e)
+            return 0.0
+
+    def _consume_local(self, buckets: list, now: float) -> float:
+        with self._lock:
+            tokens = []
+            wait = 0.0
+            for key, capacity, period in buckets:
+                available, updated, _period = self._buckets.get(key, (capacity, now, period))
+                available = min(capacity, available + (now - updated) * capacity / period)
+                if available < 1:
+                    wait = max(wait, (1 - available) * period / capacity)
+                tokens.append(available)
+            if wait:
+                return wait
+
+            if len(self._buckets) > self.MAX_LOCAL_BUCKETS:
+                self._prune(now)
+            for (key, _capacity, period), available in zip(buckets, tokens):
+                self._buckets[key] = (available - 1, now, period)
+            return 0.0
+
+    def _prune(self, now: float):
+        # Корзина восполняется целиком за свой период, хранить ее дольше не нужно
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if now - bucket[1] < bucket[2]}
+
+    def reset(self):
+        with self._lock:
+            self._buckets = {}
+
+
+limiter = TokenBucketLimiter()
+
+
+def get_buckets(request, scope: str, account: str | None = None) -> list:
+    """
+    :param scope: вид запросов; лимиты берутся из RATELIMIT_RATES['<scope>_ip'] и ['<scope>_account']
+    :param account: имя пользователя или E-mail из запроса
+    :return: корзины запроса: по IP-адресу и, если указана учетная запись, по ней
+    """
+    capacity, period = parse_rate(settings.RATELIMIT_RATES[f'{scope}_ip'])
+    buckets = [(RATELIMIT_KEY.format(scope=scope, kind='ip', ident=get_client_ip(request)), capacity, period)]
+    account = str(account or '').strip().lower()
+    if account:
+        # В ключе хранится хэш, а не имя пользователя или E-mail
+        ident = hashlib.sha256(account.encode()).hexdigest()[:32]
+        capacity, period = parse_rate(settings.RATELIMIT_RATES[f'{scope}_account'])
+        buckets.append((RATELIMIT_KEY.format(scope=scope, kind='account', ident=ident), capacity, period))
+    return buckets
+
+
+def check_rate_limit(request, scope: str, account: str | None = None) -> float:
+    """
+    :return: 0, если запрос разрешен, иначе время ожидания до следующей попытки (сек.)
+    """
+    wait = limiter.consume(get_buckets(request, scope, account))
+    if wait:
+        logger.warning('Превышен лимит запросов %s: IP %s, учетная запись %s', scope, get_client_ip(request), account)
+    return wait
+
+
+def ratelimit(scope: str, account_field: str):
+    """
+    Декоратор представления: ограничивает POST-запросы по IP-адресу и по
+    учетной записи из поля формы account_field. При превышении лимита
+    возвращает ответ 429 с заголовком Retry-After.
+    """
+
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method == 'POST':
+                wait = check_rate_limit(request, scope, request.POST.get(account_field))
+                if wait:
+                    response = HttpResponse(_('Слишком много попыток. Повторите позже.'), status=429,
+                                            content_type='text/plain; charset=utf-8')
+                    response['Retry-After'] = str(math.ceil(wait))
+                    return response
+            return view_func(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,6 +1,7 @@
 from pathlib import Path
 import os.path
 from decouple import config
+from celery.schedules import crontab
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -35,16 +36,26 @@ X_FRAME_OPTIONS = "SAMEORIGIN"
 SILENCED_SYSTEM_CHECKS = ["security.W019"]
 
 MIDDLEWARE = [
+    'toDo_app.middleware.MetricsMiddleware',
+    'toDo_app.middleware.QueryInspectionMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'toDo_app.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'toDo_app.middleware.LanguageMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
+    'toDo_app.middleware.SessionBackendMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Пользователь сессии загружается вместе с профилем одним запросом. Сессии с путем прежнего
+# ModelBackend переводятся на этот бэкенд в toDo_app.middleware.SessionBackendMiddleware
+AUTHENTICATION_BACKENDS = [
+    'my_auth.backends.ProfileModelBackend',
+]
+
 ROOT_URLCONF = 'toDo_app.urls'
 
 TEMPLATES = [
@@ -74,9 +85,50 @@ DATABASES = {
         'PASSWORD': config('PASSWORD_DB', 'password'),
         'HOST': config('HOST_DB', 'db'),
         'PORT': config('PORT_DB', '5432'),
+        # Время жизни соединения в секундах (0 — новое соединение на каждый запрос,
+        # None — без ограничения) и проверка соединения перед повторным использованием.
+        # Под ASGI соединения не переиспользуются между запросами, поэтому для web
+        # оставляется 0, а повторное использование обеспечивает pgbouncer;
+        # воркеры Celery держат соединение между задачами и закрывают устаревшие
+        # на границах задач.
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', 0, cast=lambda value: None if value == 'None' else int(value)),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', True, cast=bool),
+        # Для pgbouncer в режиме pool_mode=transaction серверные курсоры нужно отключить
+        'DISABLE_SERVER_SIDE_CURSORS': config('DB_DISABLE_SERVER_SIDE_CURSORS', False, cast=bool),
     }
 }
 
+# Реплики PostgreSQL только для чтения: хосты через пробел (остальные параметры как у основной базы).
+# Чтение в GET-запросах идет в реплики, запись и чтение сразу после записи пользователя —
+# в основную базу (см. toDo_app.db_router).
+DATABASE_REPLICAS = []
+for index, host in enumerate(config('REPLICA_HOSTS_DB', '').split(), start=1):
+    DATABASES[f'replica{index}'] = {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica{index}')
+
+DATABASE_ROUTERS = ['toDo_app.db_router.PrimaryReplicaRouter']
+
+# Сколько секунд после записи пользователь читает из основной базы (больше отставания реплик)
+DATABASE_REPLICA_PIN_SECONDS = config('DATABASE_REPLICA_PIN_SECONDS', 5, cast=int)
+
+# Общий кэш процессов (Redis). Без CACHE_URL используется локальный кэш процесса,
+# подходящий только для разработки и тестов.
+CACHE_URL = config('CACHE_URL', '')
+
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'toDo_app.cache.InstrumentedRedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'toDo_app.cache.InstrumentedLocMemCache',
+        }
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -92,6 +144,30 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Алгоритм хэширования паролей: 'argon2', 'scrypt' или 'pbkdf2'. Хэши остальных алгоритмов
+# списка проверяются и пересчитываются выбранным алгоритмом при входе пользователя
+PASSWORD_HASHER = config('PASSWORD_HASHER', 'argon2')
+PASSWORD_HASHER_CLASSES = {
+    'argon2': 'my_auth.hashers.TunedArgon2PasswordHasher',
+    'scrypt': 'my_auth.hashers.TunedScryptPasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    hasher for name, hasher in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
+# Параметры argon2id (память в КиБ) и scrypt. По умолчанию — рекомендации OWASP:
+# argon2id m=19 МиБ, t=2, p=1; scrypt N=2**14, r=8, p=5 (16 МиБ)
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', 2, cast=int)
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST', 19456, cast=int)
+PASSWORD_ARGON2_PARALLELISM = config('PASSWORD_ARGON2_PARALLELISM', 1, cast=int)
+PASSWORD_SCRYPT_WORK_FACTOR = config('PASSWORD_SCRYPT_WORK_FACTOR', 2 ** 14, cast=int)
+PASSWORD_SCRYPT_BLOCK_SIZE = config('PASSWORD_SCRYPT_BLOCK_SIZE', 8, cast=int)
+PASSWORD_SCRYPT_PARALLELISM = config('PASSWORD_SCRYPT_PARALLELISM', 5, cast=int)
+
+# Количество потоков проверки паролей в процессе для асинхронных представлений
+PASSWORD_HASHING_THREADS = config('PASSWORD_HASHING_THREADS', 2, cast=int)
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -102,6 +178,12 @@ LANGUAGES = [
 
 LANGUAGE_CODE = 'ru'
 
+# Конфигурации полнотекстового поиска PostgreSQL для языков из LANGUAGES
+TASKS_SEARCH_CONFIGS = {
+    'ru': 'russian',
+    'en': 'english',
+}
+
 LOCALE_PATHS = [
     os.path.join(BASE_DIR, 'locale'),
 ]
@@ -144,19 +226,146 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 CELERY_BEAT_SCHEDULER = config('CELERY_BEAT_SCHEDULER')
+CELERY_BEAT_SCHEDULE = {
+    'purge_completed_tasks_minute': {
+        'task': 'my_auth.tasks.purge_completed_tasks',
+        'schedule': crontab(),
+        'args': ('minute',),
+        'options': {'expires': 50},
+    },
+    'purge_completed_tasks_hour': {
+        'task': 'my_auth.tasks.purge_completed_tasks',
+        'schedule': crontab(minute=0),
+        'args': ('hour',),
+        'options': {'expires': 50 * 60},
+    },
+    'purge_completed_tasks_day': {
+        'task': 'my_auth.tasks.purge_completed_tasks',
+        'schedule': crontab(minute=0, hour=0),
+        'args': ('day',),
+    },
+    'purge_completed_tasks_week': {
+        'task': 'my_auth.tasks.purge_completed_tasks',
+        'schedule': crontab(minute=0, hour=0, day_of_week=1),
+        'args': ('week',),
+    },
+    'purge_completed_tasks_month': {
+        'task': 'my_auth.tasks.purge_completed_tasks',
+        'schedule': crontab(minute=0, hour=0, day_of_month=1),
+        'args': ('month',),
+    },
+    'delete_expired_task_tombstones': {
+        'task': 'my_auth.tasks.delete_expired_task_tombstones',
+        'schedule': crontab(minute=30, hour=3),
+    },
+    'delete_expired_email_verifications': {
+        'task': 'my_auth.tasks.delete_expired_email_verifications',
+        'schedule': crontab(minute=45, hour=3),
+    },
+}
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
 }
 
+# Срок действия ссылки подтверждения E-mail (ч.) и размер пачки при удалении
+# использованных и просроченных токенов
+EMAIL_VERIFICATION_TTL_HOURS = config('EMAIL_VERIFICATION_TTL_HOURS', 48, cast=int)
+EMAIL_VERIFICATION_CLEANUP_BATCH = config('EMAIL_VERIFICATION_CLEANUP_BATCH', 1000, cast=int)
+
+# Фильтры Блума занятых имен пользователей и E-mail для проверки при регистрации: адрес Redis
+# (без него фильтр строится в памяти процесса), размер в битах, количество хэш-функций и интервал
+# обновления копии фильтра в процессе (сек.; без Redis — перестроения по БД). 2**23 бит и 7 хэшей дают ~1% ложных совпадений на 800 тыс. значений
+AVAILABILITY_REDIS_URL = config('AVAILABILITY_REDIS_URL', CACHE_URL)
+AVAILABILITY_BLOOM_BITS = config('AVAILABILITY_BLOOM_BITS', 2 ** 23, cast=int)
+AVAILABILITY_BLOOM_HASHES = config('AVAILABILITY_BLOOM_HASHES', 7, cast=int)
+AVAILABILITY_REFRESH_SECONDS = config('AVAILABILITY_REFRESH_SECONDS', 5, cast=int)
+
+# Ограничение попыток входа и сброса пароля корзинами токенов: адрес Redis (без него корзины
+# хранятся в памяти процесса) и лимиты 'количество/период' (s, m, h, d) по IP-адресу и по учетной записи.
+# Количество — емкость корзины, за период она восполняется целиком
+RATELIMIT_REDIS_URL = config('RATELIMIT_REDIS_URL', CACHE_URL)
+RATELIMIT_RATES = {
+    'login_ip': config('RATELIMIT_LOGIN_IP', '20/m'),
+    'login_account': config('RATELIMIT_LOGIN_ACCOUNT', '5/m'),
+    'password_reset_ip': config('RATELIMIT_PASSWORD_RESET_IP', '5/m'),
+    'password_reset_account': config('RATELIMIT_PASSWORD_RESET_ACCOUNT', '3/h'),
+}
+
+# Количество доверенных прокси перед приложением (nginx): IP-адрес клиента берется из X-Forwarded-For
+NUM_PROXIES = config('NUM_PROXIES', 0, cast=int)
+
+# Время хранения токена, пользователя и профиля в кэше аутентификации (сек.)
+AUTH_TOKEN_CACHE_TIMEOUT = config('AUTH_TOKEN_CACHE_TIMEOUT', 300, cast=int)
+# Время, в течение которого сброшенный токен не записывается в кэш повторно (сек.)
+AUTH_TOKEN_INVALIDATION_TIMEOUT = config('AUTH_TOKEN_INVALIDATION_TIMEOUT', 30, cast=int)
+
+# Размер страницы списка задач в API и верхняя граница для параметра page_size
+TASKS_PAGE_SIZE = config('TASKS_PAGE_SIZE', 50, cast=int)
+TASKS_MAX_PAGE_SIZE = config('TASKS_MAX_PAGE_SIZE', 200, cast=int)
+
+# Время хранения фрагментов страницы задач в кэше (сек.); ключ включает версию коллекции задач
+TASKS_FRAGMENT_CACHE_TIMEOUT = config('TASKS_FRAGMENT_CACHE_TIMEOUT', 600, cast=int)
+
+# Максимальное количество задач в одном пакетном запросе API
+TASKS_BULK_MAX_ITEMS = config('TASKS_BULK_MAX_ITEMS', 1000, cast=int)
+
+# Удаление выполненных задач по расписанию: сколько пользователей обрабатывать
+# за один проход, сколько задач удалять одним запросом и пауза между запросами (сек.)
+TASKS_PURGE_USERS_CHUNK = config('TASKS_PURGE_USERS_CHUNK', 500, cast=int)
+TASKS_PURGE_BATCH_SIZE = config('TASKS_PURGE_BATCH_SIZE', 1000, cast=int)
+TASKS_PURGE_BATCH_PAUSE = config('TASKS_PURGE_BATCH_PAUSE', 0.05, cast=float)
+
+# События об изменении задач (Server-Sent Events через Redis pub/sub): адрес Redis,
+# интервал пингов и наибольшая длительность одного потока (сек.). Без адреса события отключены
+TASKS_EVENTS_REDIS_URL = config('TASKS_EVENTS_REDIS_URL', CACHE_URL)
+TASKS_EVENTS_HEARTBEAT = config('TASKS_EVENTS_HEARTBEAT', 15, cast=int)
+TASKS_EVENTS_STREAM_TIMEOUT = config('TASKS_EVENTS_STREAM_TIMEOUT', 300, cast=int)
+# Наибольшее количество идентификаторов задач в событии; при большем клиент загружает страницу заново
+TASKS_EVENTS_MAX_IDS = config('TASKS_EVENTS_MAX_IDS', 200, cast=int)
+
+# Дельта-синхронизация: перекрытие окна запроса и срок хранения записей об удаленных задачах
+TASKS_SYNC_OVERLAP_SECONDS = config('TASKS_SYNC_OVERLAP_SECONDS', 5, cast=int)
+TASKS_SYNC_TOMBSTONE_DAYS = config('TASKS_SYNC_TOMBSTONE_DAYS', 30, cast=int)
+
+# Метрики Prometheus (/metrics). Процессы пишут метрики в каталог из переменной окружения
+# PROMETHEUS_MULTIPROC_DIR; METRICS_DIRS — каталоги через пробел, метрики из которых отдает
+# /metrics (web и Celery) по заголовку Authorization: Bearer <METRICS_TOKEN>; без токена /metrics отвечает 404
+METRICS_DIRS = config('METRICS_DIRS', '').split()
+METRICS_TOKEN = config('METRICS_TOKEN', '')
+
+# Запись SQL-запросов каждого запроса (по умолчанию при DEBUG): заголовки X-Query-Count и
+# X-Query-Duration и предупреждение в логе, если один запрос повторился QUERY_REPEAT_THRESHOLD раз (N+1)
+QUERY_INSPECTION = config('QUERY_INSPECTION', DEBUG, cast=bool)
+QUERY_REPEAT_THRESHOLD = config('QUERY_REPEAT_THRESHOLD', 3, cast=int)
+
 APPEND_SLASH = True
 
-LOGFILE_NAME = BASE_DIR / 'logs' / 'log.txt'
+# Логи пишутся в отдельном потоке каждого процесса (toDo_app.log_handlers).
+# У каждого процесса свой файл: {process} — имя процесса (web-0, web-1, ... у воркеров gunicorn)
+LOGFILE_NAME = BASE_DIR / 'logs' / 'log.{process}.txt'
 LOGFILE_SIZE = 5 * 1024 * 1024  # 5mb
 LOGFILE_COUNT = 3
 
+# Вместо файлов логи можно отправлять в syslog: 'host:port' (UDP) или путь к unix-сокету
+LOG_SYSLOG_ADDRESS = config('LOG_SYSLOG_ADDRESS', '')
+
+if LOG_SYSLOG_ADDRESS:
+    host, _, port = LOG_SYSLOG_ADDRESS.rpartition(':')
+    LOG_SINK = {
+        'target': 'logging.handlers.SysLogHandler',
+        'address': (host, int(port)) if host else LOG_SYSLOG_ADDRESS,
+    }
+else:
+    LOG_SINK = {
+        'target': 'logging.handlers.RotatingFileHandler',
+        'filename': LOGFILE_NAME,
+        'maxBytes': LOGFILE_SIZE,
+        'backupCount': LOGFILE_COUNT,
+    }
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -170,14 +379,13 @@ LOGGING = {
     },
     'handlers': {
         'console': {
-            'class': 'logging.StreamHandler',
+            '()': 'toDo_app.log_handlers.BackgroundHandler',
+            'target': 'logging.StreamHandler',
             'formatter': 'simple',
         },
         'logfile': {
-            'class': 'logging.handlers.RotatingFileHandler',
-            'filename': LOGFILE_NAME,
-            'maxBytes': LOGFILE_SIZE,
-            'backupCount': LOGFILE_COUNT,
+            '()': 'toDo_app.log_handlers.BackgroundHandler',
+            **LOG_SINK,
             'formatter': 'verbose',
         },
     },
@@ -198,5 +406,9 @@ LOGGING = {
             'handlers': ['console', 'logfile'],
             'level': 'INFO',
         },
+        'toDo_app': {
+            'handlers': ['console', 'logfile'],
+            'level': 'INFO',
+        },
     },
 }
@@ -0,0 +1,33 @@
+"""
+Помощники для тестов: ограничение количества SQL-запросов и проверка на N+1.
+"""
+
+from contextlib import contextmanager
+from django.conf import settings
+from .queries import record_queries
+
+
+class QueryBudgetMixin:
+    """
+    Примесь к TestCase с проверкой бюджета запросов к БД:
+
+        with self.assertQueryBudget(3):
+            self.client.get(url)
+
+    Тест падает, если запросов больше бюджета или один и тот же запрос
+    с разными параметрами повторился не меньше QUERY_REPEAT_THRESHOLD раз.
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, max_queries: int, repeat_threshold: int = None):
+        with record_queries() as recorder:
+            yield recorder
+
+        executed = '\n'.join(f'{number}. {sql}' for number, (sql, _) in enumerate(recorder.queries, start=1))
+        if recorder.count > max_queries:
+            self.fail(f'Выполнено {recorder.count} запросов к БД при бюджете {max_queries}:\n{executed}')
+
+        repeated = recorder.repeated(repeat_threshold or settings.QUERY_REPEAT_THRESHOLD)
+        if repeated:
+            shapes = '\n'.join(f'{count} раз: {shape}' for shape, count in repeated.items())
+            self.fail(f'Повторяющиеся запросы к БД (N+1):\n{shapes}')
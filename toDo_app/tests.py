@@ -0,0 +1,335 @@
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+import redis
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework.authtoken.models import Token
+from my_auth.tasks import delete_completed_tasks
+from tasks.models import Task
+from tasks.versioning import TASKS_VERSION_KEY
+from .db_router import PRIMARY_PIN_COOKIE, PrimaryReplicaRouter, finish_routing, read_from_primary, start_routing
+from .log_handlers import BackgroundHandler, acquire_slot
+from .middleware import QueryInspectionMiddleware, ReplicaRoutingMiddleware
+from .queries import get_query_shape
+from .ratelimit import TokenBucketLimiter, get_buckets, get_client_ip, parse_rate
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class PrimaryReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.addCleanup(finish_routing)
+
+    def test_read_outside_request_uses_primary(self):
+        self.assertEqual(self.router.db_for_read(Task), 'default')
+
+    def test_read_in_safe_request_uses_replica(self):
+        start_routing(pinned=False)
+        self.assertIn(self.router.db_for_read(Task), ['replica1', 'replica2'])
+
+    def test_read_after_write_uses_primary(self):
+        state = start_routing(pinned=False)
+        self.assertEqual(self.router.db_for_write(Task), 'default')
+        self.assertEqual(self.router.db_for_read(Task), 'default')
+        self.assertTrue(state.wrote)
+
+    def test_read_from_primary_pins_request(self):
+        start_routing(pinned=False)
+        read_from_primary()
+        self.assertEqual(self.router.db_for_read(Task), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_read_without_replicas_uses_primary(self):
+        start_routing(pinned=False)
+        self.assertEqual(self.router.db_for_read(Task), 'default')
+
+    def test_migrate_only_primary(self):
+        self.assertTrue(self.router.allow_migrate('default', 'tasks'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'tasks'))
+
+
+# Реплика указывает на ту же тестовую базу: проверяется закрепление, а не реальное чтение из реплики
+@override_settings(DATABASE_REPLICAS=['default'])
+class ReplicaRoutingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def get_state(self, request):
+        states = []
+
+        def get_response(request):
+            states.append(request.db_routing_state)
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(get_response)(request)
+        return states[0], response
+
+    def test_safe_request_not_pinned(self):
+        state, response = self.get_state(self.factory.get('/'))
+        self.assertFalse(state.pinned)
+        self.assertNotIn(PRIMARY_PIN_COOKIE, response.cookies)
+
+    def test_unsafe_request_pinned(self):
+        state, _ = self.get_state(self.factory.post('/'))
+        self.assertTrue(state.pinned)
+
+    def test_pin_cookie_pins_safe_request(self):
+        request = self.factory.get('/')
+        request.COOKIES[PRIMARY_PIN_COOKIE] = '1'
+        state, _ = self.get_state(request)
+        self.assertTrue(state.pinned)
+
+    def test_version_cached_reads_pinned_only_after_recent_write(self):
+        user = User.objects.create_user(username='testuser', password='testpass')
+        user.profile.email_verified = True
+        user.profile.save()
+        self.client.force_login(user)
+        token = Token.objects.create(user=user)
+        version_key = TASKS_VERSION_KEY.format(user_id=user.id)
+
+        for url in (reverse('api:task-list'), reverse('task:task_view'), reverse('task:task_chunk')):
+            for changed_ago, pinned in ((0, True), (60, False)):
+                cache.clear()
+                cache.set(version_key, str(time.time_ns() - changed_ago * 10 ** 9), timeout=None)
+                response = self.client.get(url, HTTP_AUTHORIZATION=f'Token {token.key}')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.wsgi_request.db_routing_state.pinned, pinned, (url, changed_ago))
+                self.assertNotIn(PRIMARY_PIN_COOKIE, response.cookies)
+
+    def test_write_sets_pin_cookie(self):
+        user = User.objects.create_user(username='testuser', password='testpass')
+        user.profile.email_verified = True
+        user.profile.save()
+        self.client.force_login(user)
+
+        response = self.client.post(reverse('task:add_task'), data=json.dumps({'name': 'Task'}),
+                                    content_type='application/json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.cookies[PRIMARY_PIN_COOKIE]['max-age'], 5)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.user.profile.email_verified = True
+        self.user.profile.save()
+        self.client.force_login(self.user)
+        cache.clear()
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_request_latency_and_db_queries_by_route(self):
+        Task.objects.create(user=self.user, name='Task')
+        before = self.sample('django_http_request_duration_seconds_count',
+                             route='task:task_view', method='GET', status='200')
+        queries_before = self.sample('django_http_request_db_queries_sum', route='task:task_view')
+
+        self.client.get(reverse('task:task_view'))
+
+        self.assertEqual(self.sample('django_http_request_duration_seconds_count',
+                                     route='task:task_view', method='GET', status='200'), before + 1)
+        self.assertGreater(self.sample('django_http_request_db_queries_sum', route='task:task_view'),
+                           queries_before)
+
+    def test_unmatched_route(self):
+        before = self.sample('django_http_request_duration_seconds_count',
+                             route='unmatched', method='GET', status='404')
+        self.client.get('/no-such-page/')
+        self.assertEqual(self.sample('django_http_request_duration_seconds_count',
+                                     route='unmatched', method='GET', status='404'), before + 1)
+
+    def test_cache_hits_and_misses(self):
+        hits = self.sample('django_cache_requests_total', result='hit')
+        misses = self.sample('django_cache_requests_total', result='miss')
+
+        cache.get('metrics-test')
+        cache.set('metrics-test', 1)
+        cache.get('metrics-test')
+
+        self.assertEqual(self.sample('django_cache_requests_total', result='hit'), hits + 1)
+        self.assertEqual(self.sample('django_cache_requests_total', result='miss'), misses + 1)
+
+    def test_celery_task_duration_and_failures(self):
+        name = delete_completed_tasks.name
+        count = self.sample('celery_task_duration_seconds_count', task=name)
+        failures = self.sample('celery_task_failures_total', task=name)
+
+        delete_completed_tasks.apply(args=[self.user.id])
+        with patch('my_auth.tasks.CompletedTasksPurger.purge', side_effect=RuntimeError):
+            delete_completed_tasks.apply(args=[self.user.id])
+
+        self.assertEqual(self.sample('celery_task_duration_seconds_count', task=name), count + 2)
+        self.assertEqual(self.sample('celery_task_failures_total', task=name), failures + 1)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_endpoint(self):
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'django_http_request_duration_seconds', response.content)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_metrics_endpoint_disabled_without_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_endpoint_requires_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+
+class QueryInspectionTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        for i in range(3):
+            Task.objects.create(user=self.user, name=f'Task {i}')
+
+    def get_response(self, request):
+        for task in Task.objects.all():
+            User.objects.get(pk=task.user_id)
+        return HttpResponse()
+
+    def test_query_shape(self):
+        self.assertEqual(get_query_shape('SELECT * FROM t WHERE id IN (%s, %s) AND name = \'a\' LIMIT 21'),
+                         'SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?')
+
+    @override_settings(QUERY_INSPECTION=True, QUERY_REPEAT_THRESHOLD=3)
+    def test_query_count_header_and_repeated_queries_warning(self):
+        with self.assertLogs('toDo_app.middleware', level='WARNING') as logs:
+            response = QueryInspectionMiddleware(self.get_response)(self.factory.get('/'))
+
+        self.assertEqual(response['X-Query-Count'], '4')
+        self.assertIn('X-Query-Duration', response)
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('3 раз', logs.output[0])
+
+    @override_settings(QUERY_INSPECTION=False)
+    def test_disabled(self):
+        response = QueryInspectionMiddleware(self.get_response)(self.factory.get('/'))
+        self.assertNotIn('X-Query-Count', response)
+
+
+class BackgroundHandlerTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.handler = BackgroundHandler('logging.FileHandler',
+                                         filename=str(Path(self.directory.name) / 'log.{process}.txt'))
+        self.handler.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+        self.addCleanup(self.handler.close)
+        self.logger = logging.getLogger('toDo_app.tests.background')
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+
+    def test_records_written_by_listener(self):
+        self.logger.warning('Задача %s удалена', 42)
+        self.handler.stop()
+
+        content = (Path(self.directory.name) / 'log.main.txt').read_text()
+        self.assertEqual(content, 'WARNING Задача 42 удалена\n')
+
+    def test_arguments_and_exception_rendered_in_caller(self):
+        try:
+            raise ValueError('ошибка')
+        except ValueError:
+            record = self.logger.makeRecord(self.logger.name, logging.ERROR, __file__, 0, 'Задача %s', (1,),
+                                            sys.exc_info())
+        prepared = self.handler.prepare(record)
+        self.assertEqual((prepared.msg, prepared.args, prepared.exc_info), ('Задача 1', None, None))
+        self.assertIn('ValueError: ошибка', prepared.exc_text)
+        self.assertIsNotNone(record.exc_info)
+
+    def test_forked_children_reuse_slot_files(self):
+        pattern = str(Path(self.directory.name) / 'log.{process}.txt')
+        first_slot, first_lock = acquire_slot(pattern)
+        second_slot, second_lock = acquire_slot(pattern)
+        self.assertEqual((first_slot, second_slot), (0, 1))
+
+        # Слот завершившегося процесса занимает следующий дочерний процесс
+        first_lock.close()
+        slot, lock = acquire_slot(pattern)
+        self.assertEqual(slot, 0)
+        lock.close()
+        second_lock.close()
+
+    def test_child_writes_to_slot_file(self):
+        # В дочернем процессе потока записи родителя нет
+        self.handler.listener.stop()
+        self.handler.target.close()
+        self.handler._restart_in_child()
+        self.addCleanup(self.handler._slot_lock.close)
+        self.logger.warning('Из дочернего процесса')
+        self.handler.stop()
+
+        content = (Path(self.directory.name) / 'log.main-0.txt').read_text()
+        self.assertEqual(content, 'WARNING Из дочернего процесса\n')
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        self.limiter = TokenBucketLimiter()
+        self.factory = RequestFactory()
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('5/m'), (5, 60))
+        self.assertEqual(parse_rate('3/hour'), (3, 3600))
+
+    def test_bucket_rejects_when_empty_and_refills(self):
+        buckets = [('ip', 2, 60)]
+        self.assertEqual(self.limiter._consume_local(buckets, 0), 0)
+        self.assertEqual(self.limiter._consume_local(buckets, 0), 0)
+        self.assertAlmostEqual(self.limiter._consume_local(buckets, 0), 30)
+        self.assertAlmostEqual(self.limiter._consume_local(buckets, 20), 10)
+        self.assertEqual(self.limiter._consume_local(buckets, 30), 0)
+
+    def test_rejected_request_does_not_consume_other_buckets(self):
+        self.limiter._consume_local([('account', 1, 60)], 0)
+        self.assertTrue(self.limiter._consume_local([('ip', 5, 60), ('account', 1, 60)], 0))
+        self.assertEqual(self.limiter._buckets.get('ip'), None)
+
+    @override_settings(NUM_PROXIES=1)
+    def test_client_ip_from_trusted_proxy(self):
+        request = self.factory.get('/', HTTP_X_FORWARDED_FOR='10.0.0.1, 203.0.113.5', REMOTE_ADDR='172.18.0.2')
+        self.assertEqual(get_client_ip(request), '203.0.113.5')
+
+    def test_forwarded_for_ignored_without_proxies(self):
+        request = self.factory.get('/', HTTP_X_FORWARDED_FOR='10.0.0.1', REMOTE_ADDR='203.0.113.5')
+        self.assertEqual(get_client_ip(request), '203.0.113.5')
+
+    def test_account_key_is_normalized_and_hashed(self):
+        request = self.factory.post('/')
+        key = get_buckets(request, 'login', ' TestUser')[1][0]
+        self.assertEqual(key, get_buckets(request, 'login', 'testuser')[1][0])
+        self.assertNotIn('testuser', key)
+        self.assertEqual(len(get_buckets(request, 'login', '')), 1)
+
+    @override_settings(RATELIMIT_REDIS_URL='redis://redis:6379/0')
+    @patch('toDo_app.ratelimit._get_client')
+    def test_redis_script_receives_all_buckets(self, mock_get_client):
+        client = MagicMock()
+        client.eval.return_value = b'1.5'
+        mock_get_client.return_value = client
+
+        self.assertEqual(self.limiter.consume([('ip', 20, 60), ('account', 5, 60)]), 1.5)
+        args = client.eval.call_args.args
+        self.assertEqual(args[1:4], (2, 'ip', 'account'))
+        self.assertEqual(args[5:], (20, 60, 5, 60))
+
+    @override_settings(RATELIMIT_REDIS_URL='redis://redis:6379/0')
+    @patch('toDo_app.ratelimit._get_client')
+    def test_redis_error_allows_request(self, mock_get_client):
+        mock_get_client.return_value.eval.side_effect = redis.ConnectionError('down')
+        with self.assertLogs('toDo_app.ratelimit', 'ERROR'):
+            self.assertEqual(self.limiter.consume([('ip', 20, 60)]), 0)